@@ -199,7 +199,12 @@ class ApiService {
       throw new Error(error.message || "Quiz creation failed");
     }
 
-    const result = await response.json();
+    let result = await response.json();
+    if (response.status === 202) {
+      // Generation was queued; wait for the job to finish
+      const job = await this.waitForQuizGenerationJob(result.data.job_id);
+      result = { success: true, message: "Quiz created successfully", data: job };
+    }
     return result.data
       ? result
       : {
@@ -209,8 +214,29 @@ class ApiService {
       };
   }
 
+  async getQuizGenerationJob(jobId: string): Promise<any> {
+    const token = localStorage.getItem("token");
+    const response = await fetch(`${API_BASE_URL}/api/quiz/jobs/${jobId}/`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+      credentials: "include",
+    });
+    if (!response.ok) throw new Error("Failed to fetch quiz generation status");
+    return response.json();
+  }
+
+  async waitForQuizGenerationJob(jobId: string, intervalMs = 1500, timeoutMs = 180000): Promise<any> {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+      const job = await this.getQuizGenerationJob(jobId);
+      if (job.status === "succeeded") return job;
+      if (job.status === "failed") throw new Error(job.error || "Quiz creation failed");
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+    throw new Error("Quiz creation is taking longer than expected");
+  }
+
   async getQuizList(): Promise<ApiResponse<{ quizzes: any[]; count: number }>> {
-    const response = await fetch(`${API_BASE_URL}/api/quiz/list/`);
+    const response = await fetch(`${API_BASE_URL}/api/quiz/list/?legacy=true`);
     if (!response.ok) throw new Error("Failed to fetch quizzes");
     return response.json();
   }
@@ -358,6 +384,29 @@ class ApiService {
     return response.json();
   }
 
+  async searchQuizzes(query: string, page = 1, pageSize = 20): Promise<any> {
+    const params = new URLSearchParams({ q: query, page: String(page), page_size: String(pageSize) });
+    const response = await fetch(`${API_BASE_URL}/api/quiz/search/?${params}`);
+    if (!response.ok) throw new Error("Failed to search quizzes");
+    return response.json();
+  }
+
+  async getSurpriseQuizzes(options: { category?: string; level?: string; count?: number; kind?: "quiz" | "question" } = {}): Promise<any> {
+    const params = new URLSearchParams();
+    Object.entries(options).forEach(([key, value]) => {
+      if (value !== undefined && value !== "") params.set(key, String(value));
+    });
+    const response = await fetch(`${API_BASE_URL}/api/quiz/surprise/?${params}`);
+    if (!response.ok) throw new Error("Failed to fetch random quizzes");
+    return response.json();
+  }
+
+  async getQuizFacets(): Promise<any> {
+    const response = await fetch(`${API_BASE_URL}/api/quiz/facets/`);
+    if (!response.ok) throw new Error("Failed to fetch quiz facets");
+    return response.json();
+  }
+
   async getQuizDetail(quizId: string): Promise<ApiResponse<any>> {
     const response = await fetch(
       `${API_BASE_URL}/api/quiz/detail/${quizId}/`
@@ -366,6 +415,23 @@ class ApiService {
     return response.json();
   }
 
+  async getQuizBundle(quizId: string, contentHash: string): Promise<ApiResponse<any>> {
+    // Immutable URL: the browser cache can serve it without revalidating
+    const response = await fetch(`${API_BASE_URL}/api/quiz/bundle/${quizId}/${contentHash}/`);
+    if (!response.ok) throw new Error("Failed to fetch quiz details");
+    return response.json();
+  }
+
+  async getQuizBatch(quizIds: string[]): Promise<any> {
+    const response = await fetch(`${API_BASE_URL}/api/quiz/batch/`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ quiz_ids: quizIds }),
+    });
+    if (!response.ok) throw new Error("Failed to fetch quizzes");
+    return response.json();
+  }
+
   async getQuizQuestionsFromCSV(quizId: string): Promise<any> {
     const response = await fetch(
       `${API_BASE_URL}/api/quiz/csv/${quizId}/questions/`
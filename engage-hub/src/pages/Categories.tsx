@@ -88,19 +88,25 @@ const Categories = () => {
 
       const counts: Record<string, number> = {};
 
-      for (const topic of TOPICS) {
-        const subtopics = SUBTOPICS[topic as keyof typeof SUBTOPICS];
-        if (!subtopics) continue;
-
-        for (const subtopic of subtopics) {
-          try {
-            const response = await api.countQuizzesByCategory(topic, subtopic);
-            const key = `${topic}::${subtopic}`;
-            counts[key] = response.count || 0;
-          } catch (error) {
-            counts[`${topic}::${subtopic}`] = cachedCounts?.[`${topic}::${subtopic}`] || 0;
+      try {
+        // One facets request instead of a count request per tile
+        const response = await api.getQuizFacets();
+        const facetCounts: Record<string, number> = {};
+        for (const facet of response.subtopics || []) {
+          const key = `${facet.category.trim().toLowerCase()}::${facet.name.trim().toLowerCase()}`;
+          facetCounts[key] = facet.count;
+        }
+
+        for (const topic of TOPICS) {
+          const subtopics = SUBTOPICS[topic as keyof typeof SUBTOPICS];
+          if (!subtopics) continue;
+
+          for (const subtopic of subtopics) {
+            counts[`${topic}::${subtopic}`] = facetCounts[`${topic.toLowerCase()}::${subtopic.toLowerCase()}`] || 0;
           }
         }
+      } catch (error) {
+        Object.assign(counts, cachedCounts || {});
       }
 
       setQuizCounts(counts);
@@ -686,6 +686,28 @@ class GoogleSignInView(APIView):
 
 # Quiz History Views
 from quiz_app.models import Quiz, Question, QuizHistory
+from quiz_app.streaming import wants_stream, streaming_json_response, STREAMED_ITEMS, STREAMED_COUNT
+from quiz_app.fieldsets import Fieldset, InvalidFields
+
+
+def _attempt_percentage(h):
+    return round((h.score / h.total_questions * 100)) if h.total_questions > 0 else 0
+
+
+# Entries of GetHistoryView, for ?fields=
+ATTEMPT_FIELDS = Fieldset({
+    'attempt_id': (('id',), lambda h: h.id),
+    'quiz_id': (('quiz__quiz_id',), lambda h: h.quiz.quiz_id),
+    'title': (('quiz__title',), lambda h: h.quiz.title),
+    'topic': (('quiz__category', 'quiz__topic'), lambda h: h.quiz.category or h.quiz.topic),
+    'level': (('quiz__level', 'quiz__difficulty_level'), lambda h: h.quiz.level or h.quiz.difficulty_level),
+    'quiz_type': (('quiz_type',), lambda h: h.quiz_type),  # Include quiz mode for displaying in frontend
+    'questions_answered': (('score',), lambda h: h.score),
+    'total_questions': (('total_questions',), lambda h: h.total_questions),
+    'score': (('score',), lambda h: h.score),
+    'percentage': (('score', 'total_questions'), _attempt_percentage),
+    'completed_at': (('completed_at',), lambda h: h.completed_at.isoformat() if h.completed_at else None),
+}, always=('id', 'completed_at'), relations=('quiz',))
 
 class SaveQuizAttemptView(APIView):
     permission_classes = [IsAuthenticated]
@@ -693,8 +715,6 @@ class SaveQuizAttemptView(APIView):
     def post(self, request):
         from quiz_app.utils import generate_unique_quiz_id
         from django.utils import timezone
-        import csv
-        import os
         
         quiz_id = request.data.get('quiz_id')
         selected_answers = request.data.get('selected_answers', {})
@@ -734,44 +754,28 @@ class SaveQuizAttemptView(APIView):
                         'is_correct': is_correct
                     })
             else:
-                # Quiz not in database - try to fetch from CSV
-                csv_path = os.path.join(
-                    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                    'dataset',
-                    'categoryQuizzes.csv'
-                )
+                # Quiz not in database - try to fetch from the dataset catalog
+                from quiz_app.catalog import get_catalog
                 
-                if not os.path.exists(csv_path):
-                    return ResponseFormatter.error("Quiz not found in database or CSV", status_code=404)
-                
-                # Fetch quiz data from CSV
+                entry = get_catalog().get_quiz(quiz_id)
                 questions_from_csv = []
                 quiz_info = None
                 
-                with open(csv_path, 'r', encoding='utf-8') as file:
-                    reader = csv.DictReader(file)
-                    for row in reader:
-                        if row['QuizID'] == str(quiz_id):
-                            if not quiz_info:
-                                quiz_info = {
-                                    'quiz_id': row['QuizID'],
-                                    'category': row['Category'],
-                                    'subtopic': row['Subtopic'],
-                                    'title': row['Title'],
-                                    'level': row['Level'],
-                                    'duration_seconds': row['DurationSeconds']
-                                }
-                            
-                            questions_from_csv.append({
-                                'question_text': row['QuestionText'],
-                                'options': {
-                                    'A': row['OptionA'],
-                                    'B': row['OptionB'],
-                                    'C': row['OptionC'],
-                                    'D': row['OptionD']
-                                },
-                                'correct_answer': row['CorrectAnswer']
-                            })
+                if entry:
+                    quiz_info = {
+                        'quiz_id': entry['quiz_id'],
+                        'category': entry['category'],
+                        'subtopic': entry['subtopic'],
+                        'title': entry['title'],
+                        'level': entry['level'],
+                        'duration_seconds': entry['duration_raw']
+                    }
+                    for q in entry['questions']:
+                        questions_from_csv.append({
+                            'question_text': q['text'],
+                            'options': q['options'],
+                            'correct_answer': q['correct_answer']
+                        })
                 
                 if not quiz_info:
                     return ResponseFormatter.error("Quiz not found", status_code=404)
@@ -889,36 +893,42 @@ class SaveQuizAttemptView(APIView):
 
 
 class GetHistoryView(APIView):
+    """
+    Completed quiz attempts for the current user, newest first.
+    Pass ?stream=true to stream the attempts instead of building the full list,
+    and ?fields=a,b,c to return (and load) only those attempt fields.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         try:
-            history = QuizHistory.objects.filter(
-                user=request.user,
-                completed_at__isnull=False
-            ).select_related('quiz').order_by('-completed_at')
-            
-            attempts = []
-            for h in history:
-                percentage = round((h.score / h.total_questions * 100)) if h.total_questions > 0 else 0
-                attempts.append({
-                    'attempt_id': h.id,
-                    'quiz_id': h.quiz.quiz_id,
-                    'title': h.quiz.title,
-                    'topic': h.quiz.category or h.quiz.topic,
-                    'level': h.quiz.level or h.quiz.difficulty_level,
-                    'quiz_type': h.quiz_type,  # Include quiz mode for displaying in frontend
-                    'questions_answered': h.score,
-                    'total_questions': h.total_questions,
-                    'score': h.score,
-                    'percentage': percentage,
-                    'completed_at': h.completed_at.isoformat() if h.completed_at else None
-                })
-            
+            fields = ATTEMPT_FIELDS.parse(request.query_params.get('fields'))
+        except InvalidFields as e:
+            return ResponseFormatter.error(str(e), status_code=400)
+
+        try:
+            attempts = self.iter_attempts(request.user, fields)
+            if wants_stream(request):
+                return streaming_json_response(request, {
+                    'success': True,
+                    'message': 'Success',
+                    'data': {'attempts': STREAMED_ITEMS, 'count': STREAMED_COUNT}
+                }, attempts)
+
+            attempts = list(attempts)
             return ResponseFormatter.success({'attempts': attempts, 'count': len(attempts)})
         except Exception as e:
             return ResponseFormatter.error(f"Failed to fetch: {str(e)}", status_code=500)
 
+    def iter_attempts(self, user, fields=None):
+        history = ATTEMPT_FIELDS.apply(QuizHistory.objects.filter(
+            user=user,
+            completed_at__isnull=False
+        ), fields).order_by('-completed_at')
+
+        for h in history.iterator(chunk_size=500):
+            yield ATTEMPT_FIELDS.serialize(h, fields)
+
 
 class GetHistoryDetailView(APIView):
     permission_classes = [IsAuthenticated]
@@ -1101,108 +1111,42 @@ class CreateUserQuizView(APIView):
     Create a new quiz with AI-generated questions.
     Requires authentication and associates quiz with the user.
     Saves to database and CSV file.
+
+    Quizzes the question bank can fill are created right away; otherwise
+    a generation job is queued (202) - poll /api/quiz/jobs/<job_id>/.
     """
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        from quiz_app.models import Quiz, Question
-        from quiz_app.utils import generate_unique_quiz_id, append_quiz_to_csv
-        from quiz_app.gemini_utils import generate_quiz_questions
-        from django.db import transaction
+        from quiz_app.services.question_bank import take_from_bank
+        from quiz_app.services.generation_jobs import (
+            quiz_params, InvalidQuizParams, save_quiz, enqueue_generation, job_payload
+        )
         import logging
         
         logger = logging.getLogger(__name__)
         
-        # Get quiz details from request
-        category = request.data.get('category')
-        title = request.data.get('title')
-        level = request.data.get('level', 'easy')
-        num_questions = request.data.get('num_questions', 10)
-        duration_seconds = request.data.get('duration_seconds', 600)
-        additional_instructions = request.data.get('additional_instructions', '')
-        language = request.data.get('language', 'English')
-        
-        # Validate required fields
-        if not category or not title:
-            return ResponseFormatter.error("Category and title are required", status_code=400)
+        try:
+            params = quiz_params(request.data, record_in_profile=True)
+        except InvalidQuizParams as e:
+            return ResponseFormatter.error(str(e), status_code=400)
         
         try:
-            # Step 1: Generate unique quiz_id
-            logger.info(f"Generating quiz: {title} - {category} ({language}) for user {request.user.email}")
-            quiz_id = generate_unique_quiz_id()
-            logger.info(f"Generated quiz_id: {quiz_id}")
-            
-            # Step 2: Generate questions using Gemini
-            logger.info(f"Calling Gemini API for {num_questions} questions")
-            questions_data, error_msg = generate_quiz_questions(
-                category=category,
-                title=title,
-                level=level,
-                num_questions=num_questions,
-                additional_instructions=additional_instructions,
-                language=language
+            logger.info(f"Creating quiz: {params['title']} - {params['category']} ({params['language']}) for user {request.user.email}")
+            questions_data, _ = take_from_bank(
+                params['category'], params['level'], params['num_questions'],
+                params['additional_instructions'], params['language'], request.user
             )
-            
-            if not questions_data:
-                logger.error(f"Gemini API failed: {error_msg}")
-                return ResponseFormatter.error("Failed to generate questions", status_code=502)
-            
-            logger.info(f"Successfully generated {len(questions_data)} questions")
-            
-            # Step 3: Create Quiz and Question objects
-            with transaction.atomic():
-                # Create quiz
-                quiz = Quiz.objects.create(
-                    quiz_id=quiz_id,
-                    category=category,
-                    title=title,
-                    topic=category,
-                    level=level,
-                    difficulty_level=level,
-                    num_questions=num_questions,
-                    duration_seconds=duration_seconds,
-                    duration_minutes=duration_seconds // 60,
-                    created_by=request.user,
-                    is_mock=False,
-                    language=language
-                )
-                
-                # Create question objects
-                question_objects = []
-                for idx, q_data in enumerate(questions_data, start=1):
-                    question = Question(
-                        quiz=quiz,
-                        order=idx,
-                        text=q_data['text'],
-                        question_text=q_data['text'],
-                        options=q_data['options'],
-                        correct_answer=q_data['correct_answer'],
-                        metadata={}
-                    )
-                    question_objects.append(question)
-                
-                # Save to database
-                Question.objects.bulk_create(question_objects)
-                
-                # Step 4: Add quiz_id to user's created_quiz_ids
-                profile = request.user.profile
-                created_quizzes = profile.created_quiz_ids or []
-                if quiz_id not in created_quizzes:
-                    created_quizzes.append(quiz_id)
-                    profile.created_quiz_ids = created_quizzes
-                    profile.save()
-                
-                # Step 5: Append to CSV file
-                csv_success = append_quiz_to_csv(quiz, question_objects)
-                if not csv_success:
-                    logger.warning(f"CSV append failed for quiz {quiz_id}")
-                else:
-                    logger.info(f"Successfully saved quiz {quiz_id} to CSV")
-            
-            # Step 6: Return success response
+            if len(questions_data) < params['num_questions']:
+                # Gemini is needed: a generation worker takes it from here
+                job = enqueue_generation(params, request.user)
+                return ResponseFormatter.success(job_payload(job), message="Quiz generation started", status_code=202)
+
+            quiz = save_quiz(params, questions_data, request.user)
+            logger.info(f"Created quiz {quiz.quiz_id} from the question bank")
             return ResponseFormatter.success({
                 'quiz_id': quiz.quiz_id,
-                'num_questions': len(question_objects),
+                'num_questions': quiz.num_questions,
                 'category': quiz.category,
                 'title': quiz.title,
                 'level': quiz.level,
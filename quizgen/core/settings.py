@@ -83,6 +83,19 @@ DATABASES = {
     )
 }
 
+# The default cache is shared by every worker process: the catalog
+# generation counter, cached list responses and rebuild locks in it must
+# be the same for all of them. Create the table with createcachetable.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'quizgen_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int),
+        },
+    }
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,144 @@
+import hashlib
+import math
+import random
+import time
+import logging
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CATALOG_GENERATION_KEY = 'catalog_generation'
+
+# Catalog entries are invalidated by bumping the generation, so the TTL
+# only bounds how long unreachable old generations linger in the cache.
+# This relies on the default cache being shared by all processes (see
+# CACHES in settings); a bump in one worker is seen by every other.
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_version(key):
+    """
+    Return the shared version counter stored under key.
+
+    The counter is seeded from the clock so that if the cache ever drops
+    it, the new value is still higher than any version used before.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Move the counter under key to a new version."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key missing (never set or evicted): seed a fresh version
+        get_version(key)
+        return cache.incr(key)
+
+
+def get_catalog_generation():
+    """Return the current catalog generation."""
+    return get_version(CATALOG_GENERATION_KEY)
+
+
+def bump_catalog_generation():
+    """Invalidate every catalog cache entry by moving to a new generation."""
+    return bump_version(CATALOG_GENERATION_KEY)
+
+
+def bump_catalog_generation_on_commit():
+    """Bump the generation once the current transaction (if any) commits."""
+    transaction.on_commit(bump_catalog_generation)
+
+
+def catalog_cache_key(name, *parts):
+    """
+    Build a cache key for catalog data, scoped to the current generation.
+
+    The parts (often raw request values) are hashed, so keys stay short
+    and safe for any cache backend however long the values are.
+
+    Example:
+        catalog_cache_key('cat_quizzes', 'Science', 'Physics')
+        -> 'cat_quizzes_v1700000000000_<sha1 of the parts>'
+    """
+    key = f"{name}_v{get_catalog_generation()}"
+    if parts:
+        key += '_' + hashlib.sha1('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return key
+
+
+def get_or_build(key, builder, timeout, stale_timeout=None, lock_timeout=30, wait_timeout=5.0, beta=1.0):
+    """
+    Return the cached value for key, rebuilding it with builder() when needed.
+
+    Protects expensive keys against cache stampedes:
+    - Only the worker holding the per-key rebuild lock runs builder();
+      others keep serving the stale value while it revalidates.
+    - Hot keys are refreshed early at random (probabilistic early
+      expiration), weighted by how long the last rebuild took, so most
+      refreshes happen before the value actually expires.
+    - When there is no value at all, waiters poll briefly for the lock
+      holder's result before falling back to building it themselves.
+
+    Args:
+        key: Cache key
+        builder: Zero-argument callable producing the value
+        timeout: Seconds the value is considered fresh
+        stale_timeout: Extra seconds a stale value may be served while a
+            rebuild is in progress (default: same as timeout)
+        lock_timeout: Seconds before an abandoned rebuild lock expires
+        wait_timeout: Max seconds to wait for another worker's rebuild
+        beta: Early refresh aggressiveness (> 1 refreshes earlier)
+
+    Returns:
+        The cached or freshly built value
+    """
+    entry = cache.get(key)
+    now = time.time()
+
+    if entry is not None:
+        # XFetch: -log(random()) is exponentially distributed, so the chance
+        # of refreshing grows as expiry approaches and with rebuild cost
+        early = entry['delta'] * beta * -math.log(1.0 - random.random())
+        if now + early < entry['expires_at']:
+            return entry['value']
+
+    lock_key = f"{key}_rebuild_lock"
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        try:
+            return _rebuild(key, builder, timeout, stale_timeout)
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        # Someone else is rebuilding: serve stale while it revalidates
+        return entry['value']
+
+    deadline = time.monotonic() + wait_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+
+    logger.warning(f"Timed out waiting for rebuild of {key}; building it locally")
+    return _rebuild(key, builder, timeout, stale_timeout)
+
+
+def _rebuild(key, builder, timeout, stale_timeout):
+    started = time.time()
+    value = builder()
+    finished = time.time()
+    entry = {
+        'value': value,
+        'expires_at': finished + timeout,
+        'delta': finished - started,
+    }
+    cache.set(key, entry, timeout=timeout + (timeout if stale_timeout is None else stale_timeout))
+    return value
@@ -0,0 +1,267 @@
+import csv
+import os
+import re
+import threading
+import time
+import logging
+from django.utils.text import slugify
+from .compiled_dataset import load_compiled_dataset
+from .cache_utils import bump_catalog_generation
+
+logger = logging.getLogger(__name__)
+
+DATASET_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'dataset'
+)
+
+COMPILED_DATASET_NAME = 'catalog.bin'
+
+# Quizzes created in the app are appended to quiz.csv (rotated to
+# quiz-<n>.csv) by the dataset writer. They live in the database too and
+# don't use the dataset schema, so those files are left out of the
+# signature: appending to them must not make catalog.bin stale.
+GENERATED_DATASET_NAME = 'quiz'
+GENERATED_DATASET_PATTERN = re.compile(rf"^{GENERATED_DATASET_NAME}(-\d+)?\.csv$")
+
+# How often (seconds) the dataset files are re-stat'ed for changes.
+# Between checks, lookups are served purely from memory.
+CHECK_INTERVAL_SECONDS = 2.0
+
+DEFAULT_DURATION_SECONDS = 600
+
+
+def normalize_key(value):
+    """Normalize a category/subtopic string for index lookups."""
+    return (value or '').strip().lower()
+
+
+def canonical_slug(value, default='general'):
+    """
+    Canonical slug for a category/subtopic name.
+
+    Used as the Category/SubCategory slug and as the dataset topic index
+    key, so both sides of the catalog agree on one spelling. Non-Latin
+    names keep their own letters instead of all becoming the default.
+    """
+    return slugify(value or '', allow_unicode=True)[:255] or default
+
+
+def topic_key(category, subtopic):
+    """Dataset topic index key for a (category, subtopic) pair."""
+    return (canonical_slug(category), canonical_slug(subtopic))
+
+
+def parse_duration(raw, default=DEFAULT_DURATION_SECONDS):
+    """Parse a DurationSeconds cell, falling back to the default."""
+    raw = (raw or '').strip()
+    return int(raw) if raw.isdigit() else default
+
+
+class CatalogSnapshot:
+    """
+    Immutable set of indexes built from one version of the dataset files.
+
+    Attributes:
+        signature: Tuple of (filename, mtime_ns, size) for every CSV read
+        quizzes: Dict of quiz_id -> quiz dict (metadata + questions)
+        order: List of quiz_ids in dataset order
+        by_topic: Dict of (category, subtopic) slugs -> list of quiz_ids
+    """
+
+    def __init__(self, signature=()):
+        self.signature = signature
+        self.quizzes = {}
+        self.order = []
+        self.by_topic = {}
+
+    def add_row(self, row):
+        quiz_id = (row.get('QuizID') or '').strip()
+        if not quiz_id:
+            return
+
+        quiz = self.quizzes.get(quiz_id)
+        if quiz is None:
+            category = row.get('Category', 'General')
+            subtopic = row.get('Subtopic', row.get('Category', 'General'))
+            quiz = {
+                'quiz_id': quiz_id,
+                'category': category,
+                'subtopic': subtopic,
+                'title': row.get('Title', 'Untitled Quiz'),
+                'level': row.get('Level', 'Medium'),
+                'duration_raw': row.get('DurationSeconds', ''),
+                'num_questions': 0,
+                'questions': [],
+            }
+            self.quizzes[quiz_id] = quiz
+            self.order.append(quiz_id)
+            self.by_topic.setdefault(topic_key(category, subtopic), []).append(quiz_id)
+
+        quiz['questions'].append({
+            'text': row.get('QuestionText', ''),
+            'options': {
+                'A': row.get('OptionA', ''),
+                'B': row.get('OptionB', ''),
+                'C': row.get('OptionC', ''),
+                'D': row.get('OptionD', ''),
+            },
+            'correct_answer': row.get('CorrectAnswer', ''),
+        })
+        quiz['num_questions'] += 1
+
+    def get(self, quiz_id):
+        return self.quizzes.get(quiz_id)
+
+    def __contains__(self, quiz_id):
+        return quiz_id in self.quizzes
+
+    def summaries(self):
+        return [self.quizzes[quiz_id] for quiz_id in self.order]
+
+    def iter_summaries(self):
+        for quiz_id in self.order:
+            yield self.quizzes[quiz_id]
+
+    def topic_summaries(self, topic_key):
+        return [self.quizzes[quiz_id] for quiz_id in self.by_topic.get(topic_key, [])]
+
+    def topic_quiz_ids(self, topic_key):
+        return self.by_topic.get(topic_key, [])
+
+    def __len__(self):
+        return len(self.quizzes)
+
+
+class DatasetCatalog:
+    """
+    Per-process index over the quiz CSVs in the dataset folder.
+
+    The dataset is parsed once and kept in memory, keyed by QuizID and by
+    (category, subtopic) slug. Files are re-stat'ed at most every
+    CHECK_INTERVAL_SECONDS and the indexes are rebuilt only when a file's
+    mtime or size changes. Only files using the dataset schema (with a
+    QuizID column) are indexed.
+
+    If a compiled dataset (see the compile_dataset command) built from the
+    current CSVs exists, it is memory-mapped instead of parsing the CSVs.
+    """
+
+    def __init__(self, dataset_dir=DATASET_DIR, check_interval=CHECK_INTERVAL_SECONDS, compiled_path=None):
+        self.dataset_dir = dataset_dir
+        self.compiled_path = compiled_path or os.path.join(dataset_dir, COMPILED_DATASET_NAME)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._compiled_stat = None
+        self._next_check = 0.0
+
+    def file_signature(self):
+        """Return (filename, mtime_ns, size) for every dataset CSV (not the app-written quiz CSVs)."""
+        if not os.path.isdir(self.dataset_dir):
+            return ()
+
+        signature = []
+        for filename in sorted(os.listdir(self.dataset_dir)):
+            if not filename.endswith('.csv') or GENERATED_DATASET_PATTERN.match(filename):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.dataset_dir, filename))
+            except OSError:
+                continue
+            signature.append((filename, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _compiled_file_stat(self):
+        try:
+            stat = os.stat(self.compiled_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _build(self, signature):
+        compiled = load_compiled_dataset(self.compiled_path, signature)
+        if compiled is not None:
+            logger.info(f"Mapped compiled quiz catalog: {len(compiled)} quizzes from {self.compiled_path}")
+            return compiled
+        return self.parse_csv(signature)
+
+    def parse_csv(self, signature=None):
+        """Parse the dataset CSVs into an in-memory CatalogSnapshot."""
+        if signature is None:
+            signature = self.file_signature()
+        snapshot = CatalogSnapshot(signature)
+        for filename, _, _ in signature:
+            csv_path = os.path.join(self.dataset_dir, filename)
+            try:
+                with open(csv_path, 'r', encoding='utf-8') as file:
+                    reader = csv.DictReader(file)
+                    if not reader.fieldnames or 'QuizID' not in reader.fieldnames:
+                        continue
+                    for row in reader:
+                        snapshot.add_row(row)
+            except Exception as e:
+                logger.error(f"Error reading CSV {filename}: {str(e)}")
+                continue
+
+        logger.info(f"Loaded quiz catalog: {len(snapshot)} quizzes from {len(signature)} files")
+        return snapshot
+
+    def snapshot(self):
+        """Return the current snapshot, reloading if the files changed."""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now < self._next_check:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and now < self._next_check:
+                return self._snapshot
+
+            signature = self.file_signature()
+            compiled_stat = self._compiled_file_stat()
+            if (self._snapshot is None
+                    or signature != self._snapshot.signature
+                    or compiled_stat != self._compiled_stat):
+                changed = self._snapshot is not None and signature != self._snapshot.signature
+                self._snapshot = self._build(signature)
+                self._compiled_stat = compiled_stat
+                if changed:
+                    # Dataset files changed on disk: drop cached catalog responses
+                    bump_catalog_generation()
+            self._next_check = time.monotonic() + self.check_interval
+            return self._snapshot
+
+    def invalidate(self):
+        """Force the next lookup to re-check the dataset files."""
+        self._next_check = 0.0
+
+    def has_quiz(self, quiz_id):
+        """True if quiz_id is a dataset quiz."""
+        return str(quiz_id) in self.snapshot()
+
+    def get_quiz(self, quiz_id):
+        """Return the quiz dict (with questions) for quiz_id, or None."""
+        return self.snapshot().get(str(quiz_id))
+
+    def all_quizzes(self):
+        """Return summary dicts for every dataset quiz, in dataset order."""
+        return self.snapshot().summaries()
+
+    def iter_quizzes(self):
+        """Yield summary dicts for every dataset quiz, in dataset order, one at a time."""
+        return self.snapshot().iter_summaries()
+
+    def quizzes_for_topic(self, category, subtopic):
+        return self.snapshot().topic_summaries(topic_key(category, subtopic))
+
+    def quiz_ids_for_topic(self, category, subtopic):
+        return self.snapshot().topic_quiz_ids(topic_key(category, subtopic))
+
+
+_catalog = DatasetCatalog()
+
+
+def get_catalog():
+    """Return the shared per-process dataset catalog."""
+    return _catalog
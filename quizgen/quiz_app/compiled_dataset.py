@@ -0,0 +1,323 @@
+"""
+Compact binary format for the quiz dataset.
+
+The compiled file is produced by the ``compile_dataset`` management command
+and memory-mapped read-only by the catalog, so every worker process shares
+one page-cache copy and only decodes the rows a request actually touches.
+
+Layout (all integers little-endian):
+
+    header          HEADER
+    signature       JSON list of [filename, mtime_ns, size] for the source CSVs
+    string data     UTF-8 bytes of every distinct string
+    string index    STRING_ENTRY per string (absolute offset, length)
+    quizzes         QUIZ_RECORD per quiz, in dataset order
+    questions       QUESTION_RECORD per question, grouped by quiz
+    id index        ID_INDEX_ENTRY per quiz, sorted by QuizID
+    topics          TOPIC_RECORD per (category, subtopic) slug pair, sorted by key
+    topic members   MEMBER_ENTRY per quiz, grouped by topic
+"""
+import json
+import mmap
+import os
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'QZCAT\x00\x00\x00'
+VERSION = 2
+
+# magic, version, quiz_count, question_count, string_count, topic_count,
+# then absolute offsets of: signature (+ length), string index, quizzes,
+# questions, id index, topics, topic members
+HEADER = struct.Struct('<8sIIIIIQQQQQQQQ')
+STRING_ENTRY = struct.Struct('<QI')
+# quiz_id, category, subtopic, title, level, duration (string ids),
+# first question index, question count
+QUIZ_RECORD = struct.Struct('<IIIIIIII')
+# text, option A-D, correct answer (string ids)
+QUESTION_RECORD = struct.Struct('<IIIIII')
+ID_INDEX_ENTRY = struct.Struct('<I')
+# topic key (string id), first member index, member count
+TOPIC_RECORD = struct.Struct('<III')
+MEMBER_ENTRY = struct.Struct('<I')
+
+TOPIC_KEY_SEPARATOR = '\x1f'
+
+
+class CompiledDatasetError(Exception):
+    pass
+
+
+def topic_key_string(topic_key):
+    return TOPIC_KEY_SEPARATOR.join(topic_key)
+
+
+def write_compiled_dataset(snapshot, output_path):
+    """
+    Serialize a CatalogSnapshot to output_path.
+
+    The file is written next to the target and moved into place atomically,
+    so readers never observe a partially written file.
+
+    Returns:
+        dict: Counts of quizzes, questions and strings written
+    """
+    strings = []
+    string_ids = {}
+
+    def intern(value):
+        value = value or ''
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = len(strings)
+            string_ids[value] = string_id
+            strings.append(value)
+        return string_id
+
+    quiz_records = []
+    question_records = []
+    for quiz_id in snapshot.order:
+        quiz = snapshot.quizzes[quiz_id]
+        first_question = len(question_records)
+        for q in quiz['questions']:
+            options = q['options']
+            question_records.append((
+                intern(q['text']),
+                intern(options.get('A')),
+                intern(options.get('B')),
+                intern(options.get('C')),
+                intern(options.get('D')),
+                intern(q['correct_answer']),
+            ))
+        quiz_records.append((
+            intern(quiz['quiz_id']),
+            intern(quiz['category']),
+            intern(quiz['subtopic']),
+            intern(quiz['title']),
+            intern(quiz['level']),
+            intern(quiz['duration_raw']),
+            first_question,
+            len(quiz['questions']),
+        ))
+
+    record_index = {quiz_id: idx for idx, quiz_id in enumerate(snapshot.order)}
+    id_index = sorted(range(len(snapshot.order)), key=lambda idx: snapshot.order[idx])
+
+    topic_records = []
+    members = []
+    for topic_key in sorted(snapshot.by_topic, key=topic_key_string):
+        quiz_ids = snapshot.by_topic[topic_key]
+        topic_records.append((intern(topic_key_string(topic_key)), len(members), len(quiz_ids)))
+        members.extend(record_index[quiz_id] for quiz_id in quiz_ids)
+
+    signature = json.dumps([list(entry) for entry in snapshot.signature]).encode('utf-8')
+    encoded = [value.encode('utf-8') for value in strings]
+
+    tmp_path = f"{output_path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as out:
+        out.write(b'\x00' * HEADER.size)
+
+        signature_offset = out.tell()
+        out.write(signature)
+
+        string_offsets = []
+        for data in encoded:
+            string_offsets.append(out.tell())
+            out.write(data)
+
+        string_index_offset = out.tell()
+        for offset, data in zip(string_offsets, encoded):
+            out.write(STRING_ENTRY.pack(offset, len(data)))
+
+        quizzes_offset = out.tell()
+        for record in quiz_records:
+            out.write(QUIZ_RECORD.pack(*record))
+
+        questions_offset = out.tell()
+        for record in question_records:
+            out.write(QUESTION_RECORD.pack(*record))
+
+        id_index_offset = out.tell()
+        for idx in id_index:
+            out.write(ID_INDEX_ENTRY.pack(idx))
+
+        topics_offset = out.tell()
+        for record in topic_records:
+            out.write(TOPIC_RECORD.pack(*record))
+
+        members_offset = out.tell()
+        for idx in members:
+            out.write(MEMBER_ENTRY.pack(idx))
+
+        out.seek(0)
+        out.write(HEADER.pack(
+            MAGIC, VERSION,
+            len(quiz_records), len(question_records), len(strings), len(topic_records),
+            signature_offset, len(signature),
+            string_index_offset, quizzes_offset, questions_offset,
+            id_index_offset, topics_offset, members_offset,
+        ))
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(tmp_path, output_path)
+
+    return {
+        'quizzes': len(quiz_records),
+        'questions': len(question_records),
+        'strings': len(strings),
+        'topics': len(topic_records),
+    }
+
+
+class CompiledSnapshot:
+    """
+    Read-only view over a memory-mapped compiled dataset.
+
+    Exposes the same lookup methods as catalog.CatalogSnapshot, decoding
+    records on demand instead of holding parsed rows in memory.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mm) < HEADER.size:
+            raise CompiledDatasetError(f"{path} is truncated")
+
+        (magic, version,
+         self.quiz_count, self.question_count, self.string_count, self.topic_count,
+         signature_offset, signature_length,
+         self._strings_offset, self._quizzes_offset, self._questions_offset,
+         self._id_index_offset, self._topics_offset, self._members_offset) = HEADER.unpack_from(self._mm, 0)
+
+        if magic != MAGIC or version != VERSION:
+            raise CompiledDatasetError(f"{path} is not a compiled dataset (version {VERSION})")
+
+        raw_signature = self._mm[signature_offset:signature_offset + signature_length]
+        self.signature = tuple(tuple(entry) for entry in json.loads(raw_signature.decode('utf-8')))
+
+    def _string(self, string_id):
+        offset, length = STRING_ENTRY.unpack_from(self._mm, self._strings_offset + string_id * STRING_ENTRY.size)
+        return self._mm[offset:offset + length].decode('utf-8')
+
+    def _quiz_record(self, idx):
+        return QUIZ_RECORD.unpack_from(self._mm, self._quizzes_offset + idx * QUIZ_RECORD.size)
+
+    def _summary(self, idx):
+        quiz_id, category, subtopic, title, level, duration, _, question_count = self._quiz_record(idx)
+        return {
+            'quiz_id': self._string(quiz_id),
+            'category': self._string(category),
+            'subtopic': self._string(subtopic),
+            'title': self._string(title),
+            'level': self._string(level),
+            'duration_raw': self._string(duration),
+            'num_questions': question_count,
+        }
+
+    def _questions(self, first, count):
+        questions = []
+        for idx in range(first, first + count):
+            text, a, b, c, d, correct = QUESTION_RECORD.unpack_from(
+                self._mm, self._questions_offset + idx * QUESTION_RECORD.size
+            )
+            questions.append({
+                'text': self._string(text),
+                'options': {
+                    'A': self._string(a),
+                    'B': self._string(b),
+                    'C': self._string(c),
+                    'D': self._string(d),
+                },
+                'correct_answer': self._string(correct),
+            })
+        return questions
+
+    def _find_quiz(self, quiz_id):
+        lo, hi = 0, self.quiz_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (idx,) = ID_INDEX_ENTRY.unpack_from(self._mm, self._id_index_offset + mid * ID_INDEX_ENTRY.size)
+            current = self._string(self._quiz_record(idx)[0])
+            if current == quiz_id:
+                return idx
+            if current < quiz_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _find_topic(self, key):
+        lo, hi = 0, self.topic_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_id, first, count = TOPIC_RECORD.unpack_from(self._mm, self._topics_offset + mid * TOPIC_RECORD.size)
+            current = self._string(key_id)
+            if current == key:
+                return first, count
+            if current < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return 0, 0
+
+    def _topic_members(self, topic_key):
+        first, count = self._find_topic(topic_key_string(topic_key))
+        return [
+            MEMBER_ENTRY.unpack_from(self._mm, self._members_offset + idx * MEMBER_ENTRY.size)[0]
+            for idx in range(first, first + count)
+        ]
+
+    def __contains__(self, quiz_id):
+        return self._find_quiz(quiz_id) is not None
+
+    def get(self, quiz_id):
+        idx = self._find_quiz(quiz_id)
+        if idx is None:
+            return None
+        quiz = self._summary(idx)
+        record = self._quiz_record(idx)
+        quiz['questions'] = self._questions(record[6], record[7])
+        return quiz
+
+    def summaries(self):
+        return [self._summary(idx) for idx in range(self.quiz_count)]
+
+    def iter_summaries(self):
+        for idx in range(self.quiz_count):
+            yield self._summary(idx)
+
+    def topic_summaries(self, topic_key):
+        return [self._summary(idx) for idx in self._topic_members(topic_key)]
+
+    def topic_quiz_ids(self, topic_key):
+        return [self._string(self._quiz_record(idx)[0]) for idx in self._topic_members(topic_key)]
+
+    def __len__(self):
+        return self.quiz_count
+
+
+def load_compiled_dataset(path, expected_signature):
+    """
+    Map the compiled dataset at path if it was built from the current CSVs.
+
+    Returns:
+        CompiledSnapshot or None if the file is missing, invalid or stale
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        snapshot = CompiledSnapshot(path)
+    except (OSError, ValueError, CompiledDatasetError) as e:
+        logger.error(f"Failed to load compiled dataset {path}: {str(e)}")
+        return None
+
+    if snapshot.signature != expected_signature:
+        logger.warning(f"Compiled dataset {path} is stale; run compile_dataset to rebuild it")
+        return None
+
+    return snapshot
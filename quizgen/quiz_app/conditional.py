@@ -0,0 +1,127 @@
+"""
+HTTP validators (ETag / Last-Modified) for catalog endpoints.
+
+Validators are computed from cheap metadata only: the dataset file
+signature (name, mtime, size), aggregates over Quiz timestamps and, for a
+single quiz, the content hash of its (cached) detail payload. Requests carrying a matching
+If-None-Match / If-Modified-Since get a 304 without the view running.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from .models import Quiz
+from .catalog import get_catalog
+from .cache_utils import catalog_cache_key, get_or_build, CATALOG_CACHE_TIMEOUT
+from .services.quiz_payloads import quiz_detail_bytes, content_hash
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _dataset_last_modified(signature):
+    if not signature:
+        return None
+    return datetime.fromtimestamp(max(mtime_ns for _, mtime_ns, _ in signature) / 1e9, tz=dt_timezone.utc)
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def build_catalog_validators():
+    signature = get_catalog().snapshot().signature
+    stats = Quiz.objects.aggregate(
+        last_updated=Max('updated_at'),
+        last_created=Max('created_at'),
+        total=Count('id'),
+    )
+    return {
+        'etag': _digest([signature, stats]),
+        'last_modified': _latest(_dataset_last_modified(signature), stats['last_updated'], stats['last_created']),
+    }
+
+
+def catalog_validators():
+    """Return {'etag', 'last_modified'} for the whole catalog (DB + dataset)."""
+    # Re-check the dataset files first so a change moves to a new generation
+    get_catalog().snapshot()
+    return get_or_build(catalog_cache_key('catalog_validators'), build_catalog_validators, timeout=CATALOG_CACHE_TIMEOUT)
+
+
+def quiz_validators(quiz_id):
+    """
+    Return {'etag', 'last_modified'} for one quiz, or None if it doesn't exist.
+
+    The ETag is the content hash of the detail payload, read through the
+    payload cache (so it is built at most once per content version and the
+    view then serves the same cached bytes). Only dataset quizzes carry a
+    Last-Modified, from the dataset files.
+    """
+    data = quiz_detail_bytes(quiz_id)
+    if data is None:
+        return None
+    entry = get_catalog().get_quiz(quiz_id)
+    return {
+        'etag': content_hash(data),
+        'last_modified': _dataset_last_modified(get_catalog().snapshot().signature) if entry else None,
+    }
+
+
+def _memoized(request, attr, compute):
+    # condition() asks for the ETag and Last-Modified separately
+    if not hasattr(request, attr):
+        setattr(request, attr, compute())
+    return getattr(request, attr)
+
+
+def _list_validators(request):
+    return _memoized(request, '_catalog_validators', catalog_validators)
+
+
+def _list_etag(request, *args, **kwargs):
+    # Pages, filters and response modes are distinct representations
+    return _digest([_list_validators(request)['etag'], request.get_full_path()])
+
+
+def _list_last_modified(request, *args, **kwargs):
+    return _list_validators(request)['last_modified']
+
+
+def _quiz_validators(request, quiz_id):
+    return _memoized(request, '_quiz_validators', lambda: quiz_validators(quiz_id))
+
+
+def _quiz_etag(request, quiz_id, *args, **kwargs):
+    validators = _quiz_validators(request, quiz_id)
+    return validators['etag'] if validators else None
+
+
+def _quiz_last_modified(request, quiz_id, *args, **kwargs):
+    validators = _quiz_validators(request, quiz_id)
+    return validators['last_modified'] if validators else None
+
+
+def _revalidate(conditional_view):
+    @wraps(conditional_view)
+    def inner(request, *args, **kwargs):
+        response = conditional_view(request, *args, **kwargs)
+        # Let clients keep the body but always check the validators first
+        patch_cache_control(response, no_cache=True)
+        return response
+    return inner
+
+
+def catalog_conditional(view):
+    """Conditional GET for views over the whole catalog (validators vary by full path)."""
+    return _revalidate(condition(etag_func=_list_etag, last_modified_func=_list_last_modified)(view))
+
+
+def quiz_conditional(view):
+    """Conditional GET for views over one quiz, identified by the quiz_id URL kwarg."""
+    return _revalidate(condition(etag_func=_quiz_etag, last_modified_func=_quiz_last_modified)(view))
@@ -0,0 +1,95 @@
+"""
+Sparse fieldsets (?fields=a,b,c) for list endpoints.
+
+An endpoint describes each output field with the model columns it needs
+and how to compute it. Only the requested fields are loaded (through
+.only()) and serialized, so clients skip columns they never render.
+"""
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def parse_fields(value, allowed, required=()):
+    """
+    Parse a comma-separated fields parameter.
+
+    Args:
+        value: Raw parameter value (None or blank means all fields)
+        allowed: Field names the endpoint supports
+        required: Fields always included when a subset is requested
+
+    Returns:
+        A tuple of field names in the order of allowed, or None for all
+
+    Raises:
+        InvalidFields: If a requested field is unknown
+    """
+    if not value or not value.strip():
+        return None
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    requested.update(required)
+    return tuple(name for name in allowed if name in requested)
+
+
+def project(item, fields):
+    """Keep only fields (None keeps everything) of a serialized dict."""
+    if fields is None:
+        return item
+    return {name: item[name] for name in fields if name in item}
+
+
+class Fieldset:
+    """
+    Output fields of one list endpoint.
+
+    Args:
+        specs: Dict of field name -> (columns, getter), in output order;
+            columns are the .only() paths the getter reads
+        always: Columns always loaded (e.g. those used for ordering)
+        relations: select_related() paths; each is joined only when a
+            loaded column goes through it
+        required: Fields always included when a subset is requested
+    """
+
+    def __init__(self, specs, always=('pk',), relations=(), required=()):
+        self.specs = specs
+        self.always = tuple(always)
+        self.relations = tuple(relations)
+        self.required = tuple(required)
+
+    @property
+    def names(self):
+        return tuple(self.specs)
+
+    def parse(self, value):
+        return parse_fields(value, self.names, self.required)
+
+    def columns(self, fields):
+        columns = list(self.always)
+        for name in fields if fields is not None else self.names:
+            for column in self.specs[name][0]:
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    def apply(self, queryset, fields):
+        """Restrict queryset to the columns (and joins) the fields need."""
+        columns = self.columns(fields)
+        related = [
+            relation for relation in self.relations
+            if any(column.startswith(relation + '__') for column in columns)
+        ]
+        # Traversed foreign keys can't be deferred
+        columns.extend(relation for relation in related if relation not in columns)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+    def serialize(self, obj, fields):
+        names = fields if fields is not None else self.names
+        return {name: self.specs[name][1](obj) for name in names}
@@ -0,0 +1,184 @@
+"""
+Shared HTTP client for the Gemini API.
+
+All Gemini calls go through one requests.Session, so connections (and
+TLS sessions) are pooled and reused instead of set up per call. Each call
+has a connect/read timeout; 429 and 5xx responses and network errors are
+retried a bounded number of times with jittered exponential backoff
+(honouring Retry-After). A circuit breaker counts calls that still fail
+and, past a threshold, fails every call fast until a cool-down has
+passed, so a degraded upstream doesn't tie up request workers.
+"""
+import random
+import threading
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-flash-latest:generateContent"
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 30)
+POOL_SIZE = 10
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Consecutive failed calls that open the circuit, and how long it stays open
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30
+
+
+class GeminiError(Exception):
+    """A Gemini call failed; status is the HTTP status if there was a response."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class GeminiUnavailable(GeminiError):
+    """The circuit is open: Gemini failed repeatedly and isn't being called."""
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. Open (after failure_threshold consecutive
+    failures): calls are refused for reset_timeout seconds. Half-open (after
+    that): one trial call goes through; it closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Gemini circuit opened after {self._failures} failed calls")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class GeminiClient:
+    """Pooled, retrying, circuit-broken client for generateContent."""
+
+    def __init__(self, api_key=None, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES, breaker=None):
+        self._api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json'})
+
+    @property
+    def api_key(self):
+        return self._api_key or config('GEMINI_API_KEY', default=None)
+
+    def generate(self, prompt, timeout=None):
+        """
+        Return the text of the first candidate Gemini generates for prompt.
+
+        Raises:
+            GeminiUnavailable: If the circuit is open
+            GeminiError: If the call failed (after retries) or the
+                response has no text
+        """
+        api_key = self.api_key
+        if not api_key:
+            raise GeminiError("GEMINI_API_KEY not found")
+        if not self.breaker.allow():
+            raise GeminiUnavailable("Gemini is unavailable, try again shortly")
+
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        try:
+            response = self._post(payload, api_key, timeout or self.timeout)
+        except GeminiError as e:
+            # Client errors (bad request, bad key) say nothing about upstream health
+            if e.status is None or e.status in RETRY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+
+        try:
+            return response.json()['candidates'][0]['content']['parts'][0]['text']
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise GeminiError(f"Parse Error: {str(e)}", status=response.status_code)
+
+    def _post(self, payload, api_key, timeout):
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.post(
+                    GEMINI_URL, json=payload, headers={'x-goog-api-key': api_key}, timeout=timeout
+                )
+            except requests.RequestException as e:
+                logger.warning(f"Gemini request failed (attempt {attempt + 1}): {e}")
+                if last_attempt:
+                    raise GeminiError(f"Network Error: {str(e)}")
+                self._sleep(attempt)
+                continue
+
+            if response.status_code == 200:
+                return response
+            logger.error(f"Gemini API Error: {response.status_code} - {response.text[:500]}")
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                raise GeminiError(f"Gemini API Error: {response.status_code}", status=response.status_code)
+            self._sleep(attempt, response.headers.get('Retry-After'))
+
+    def _sleep(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), BACKOFF_MAX))
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+
+def strip_code_fences(text):
+    """Remove markdown code fences Gemini sometimes wraps JSON in."""
+    return text.replace('```json', '').replace('```', '').strip()
+
+
+_client = GeminiClient()
+
+
+def get_gemini_client():
+    """Return the shared per-process Gemini client."""
+    return _client
@@ -1,8 +1,11 @@
 import os
-import requests
+import re
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from decouple import config
+from .gemini_client import get_gemini_client, GeminiError, strip_code_fences
+from .generation_cache import get_generation_cache
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +18,6 @@ def generate_quiz_content(topic, difficulty, num_questions):
         logger.error("GEMINI_API_KEY not found in environment variables.")
         return None, "GEMINI_API_KEY not found in environment variables"
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-flash-latest:generateContent?key={api_key}"
-
     prompt = r"""
     Generate a quiz strictly based on the topic: "{topic}".
     Number of questions: {num_questions}.
@@ -49,27 +50,14 @@ def generate_quiz_content(topic, difficulty, num_questions):
     3. Do NOT use single backslashes for escaping unless it is a standard JSON escape sequence (like \n, \t, \"). 
     """
 
-    payload = {
-        "contents": [{
-            "parts": [{"text": prompt.format(topic=topic, num_questions=num_questions, difficulty=difficulty)}]
-        }]
-    }
-
-    headers = {'Content-Type': 'application/json'}
-
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        
-        if response.status_code != 200:
-            logger.error(f"Gemini API Error: {response.status_code} - {response.text}")
-            return None, f"Gemini API Error: {response.status_code}"
-
-        data = response.json()
+        text_content = get_gemini_client().generate(
+            prompt.format(topic=topic, num_questions=num_questions, difficulty=difficulty)
+        )
         
         try:
-            text_content = data['candidates'][0]['content']['parts'][0]['text']
             # Clean up potential markdown code blocks
-            text_content = text_content.replace('```json', '').replace('```', '').strip()
+            text_content = strip_code_fences(text_content)
             
             # Fix invalid escape sequences (e.g., \s, \d, \e not allowed in JSON unless escaped \\s)
             # This regex looks for a backslash that is NOT followed by " / \ b f n r t u
@@ -83,9 +71,9 @@ def generate_quiz_content(topic, difficulty, num_questions):
             logger.error(f"Response text: {text_content}") # Log the specific text that failed
             return None, f"Parse Error: {str(e)}"
 
-    except requests.RequestException as e:
+    except GeminiError as e:
         logger.error(f"Error calling Gemini API: {e}")
-        return None, f"Network Error: {str(e)}"
+        return None, str(e)
 
 
 
@@ -104,15 +92,42 @@ def generate_quiz_questions(category, title, level, num_questions, additional_in
     Returns:
         tuple: (list of questions, error_message)
                Each question is a dict with 'text', 'options', 'correct_answer'
+
+    Validated results are cached (see quiz_app.generation_cache), so an
+    identical request is answered without calling Gemini again.
     """
-    api_key = config('GEMINI_API_KEY', default=None)
-    if not api_key:
-        logger.error("GEMINI_API_KEY not found in environment variables.")
-        return None, "GEMINI_API_KEY not found"
+    inputs = {
+        'category': category,
+        'title': title,
+        'level': level,
+        'num_questions': num_questions,
+        'additional_instructions': additional_instructions,
+        'language': language,
+    }
+    return get_generation_cache().cached('quiz_questions', inputs, lambda: _generate_quiz_questions(**inputs))
+
+
+# Large quizzes are generated as parallel chunks of about this many questions
+CHUNK_SIZE = 10
+MAX_CHUNK_WORKERS = 5
+# Tries per chunk; a retry only asks for the questions still missing
+MAX_CHUNK_ATTEMPTS = 2
+# Each chunk of a large quiz covers a different angle, so chunks don't overlap
+CHUNK_FOCUSES = [
+    "core facts, terms and definitions",
+    "notable people, places and events",
+    "numbers, dates and records",
+    "how and why things work (cause and effect)",
+    "everyday examples and practical applications",
+]
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-flash-latest:generateContent?key={api_key}"
 
-    prompt = f"""Generate {num_questions} multiple-choice questions for a quiz.
+def _questions_prompt(category, title, level, num_questions, additional_instructions, language, focus=None, avoid=()):
+    focus_line = f"- Focus: questions about {focus}\n" if focus else ''
+    avoid_line = ''
+    if avoid:
+        avoid_line = "- Do NOT repeat any of these existing questions: " + " | ".join(avoid) + "\n"
+    return f"""Generate {num_questions} multiple-choice questions for a quiz.
 
 Context:
 - Category: {category}
@@ -120,7 +135,7 @@ Context:
 - Level: {level}
 - Language: {language}
 - Constraints: Each question must have EXACTLY 4 options. Mark the correct answer explicitly.
-{f'- Additional instructions: {additional_instructions}' if additional_instructions else ''}
+{focus_line}{avoid_line}{f'- Additional instructions: {additional_instructions}' if additional_instructions else ''}
 
 TARGET AUDIENCE & CONTEXT:
 1. Target Audience: Indian students and general Indian users.
@@ -149,96 +164,152 @@ CRITICAL RULES:
 8. Properly escape all JSON special characters
 """
 
-    payload = {
-        "contents": [{
-            "parts": [{"text": prompt}]
-        }]
-    }
 
-    headers = {'Content-Type': 'application/json'}
+def _valid_question(q):
+    return (
+        isinstance(q, dict)
+        and isinstance(q.get('text'), str) and q['text'].strip()
+        and isinstance(q.get('options'), list) and len(q['options']) == 4
+        and q.get('correct_answer') in q['options']
+    )
+
 
+def _question_key(text):
+    return ' '.join(text.lower().split())
+
+
+def _request_questions(prompt):
+    """
+    Return (valid questions, error) for one Gemini call. Invalid items are
+    dropped rather than failing the whole response.
+    """
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        
-        if response.status_code != 200:
-            logger.error(f"Gemini API Error: {response.status_code} - {response.text}")
-            return None, f"Gemini API Error: {response.status_code}"
+        text_content = get_gemini_client().generate(prompt)
+    except GeminiError as e:
+        logger.error(f"Error calling Gemini API: {e}")
+        return [], str(e)
 
-        data = response.json()
-        
-        try:
-            text_content = data['candidates'][0]['content']['parts'][0]['text']
-            # Clean up markdown code blocks if present
-            text_content = text_content.replace('```json', '').replace('```', '').strip()
-            
-            # Fix invalid escape sequences
-            import re
-            text_content = re.sub(r'\\(?![/\\\\bfnrtu"])', r'\\\\\\\\', text_content)
+    # Clean up markdown code blocks if present
+    text_content = strip_code_fences(text_content)
+    # Fix invalid escape sequences
+    text_content = re.sub(r'\\(?![/\\\\bfnrtu"])', r'\\\\\\\\', text_content)
+    try:
+        questions = json.loads(text_content)
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse Gemini response: {e}")
+        logger.error(f"Response text: {text_content[:500]}")
+        return [], f"Parse Error: {str(e)}"
 
-            questions = json.loads(text_content)
-            
-            # Validate the response
-            if not isinstance(questions, list):
-                return None, "Response is not a list"
-            
-            if len(questions) != num_questions:
-                return None, f"Expected {num_questions} questions, got {len(questions)}"
-            
-            # Validate each question
-            for i, q in enumerate(questions):
-                if not all(k in q for k in ['text', 'options', 'correct_answer']):
-                    return None, f"Question {i+1} missing required fields"
-                
-                if not isinstance(q['options'], list) or len(q['options']) != 4:
-                    return None, f"Question {i+1} must have exactly 4 options"
-                
-                if q['correct_answer'] not in q['options']:
-                    return None, f"Question {i+1} correct_answer not in options"
-            
-            logger.info(f"Successfully generated {len(questions)} questions")
+    if not isinstance(questions, list):
+        return [], "Response is not a list"
+    valid = [q for q in questions if _valid_question(q)]
+    if len(valid) < len(questions):
+        logger.warning(f"Dropped {len(questions) - len(valid)} invalid generated questions")
+    return [{'text': q['text'], 'options': q['options'], 'correct_answer': q['correct_answer']} for q in valid], None
+
+
+def _generate_chunk(context, count, focus=None, avoid=()):
+    """
+    Return (questions, error) for one chunk: up to count valid, distinct
+    questions. A short result is topped up by asking only for the rest.
+    """
+    questions, seen, error = [], set(avoid), None
+    for _ in range(MAX_CHUNK_ATTEMPTS):
+        prompt = _questions_prompt(
+            num_questions=count - len(questions), focus=focus,
+            avoid=(list(avoid) + [q['text'] for q in questions])[-30:], **context
+        )
+        generated, error = _request_questions(prompt)
+        for q in generated:
+            key = _question_key(q['text'])
+            if key not in seen and len(questions) < count:
+                seen.add(key)
+                questions.append(q)
+        if len(questions) >= count:
             return questions, None
-            
-        except (KeyError, IndexError, json.JSONDecodeError) as e:
-            logger.error(f"Failed to parse Gemini response: {e}")
-            logger.error(f"Response text: {text_content[:500]}")
-            return None, f"Parse Error: {str(e)}"
+    return questions, error or f"Expected {count} questions, got {len(questions)}"
 
-    except requests.RequestException as e:
-        logger.error(f"Error calling Gemini API: {e}")
-        return None, f"Network Error: {str(e)}"
+
+def _chunk_sizes(num_questions):
+    chunks = max(1, -(-num_questions // CHUNK_SIZE))
+    base, extra = divmod(num_questions, chunks)
+    return [base + (1 if idx < extra else 0) for idx in range(chunks)]
+
+
+def _generate_quiz_questions(category, title, level, num_questions, additional_instructions, language):
+    api_key = config('GEMINI_API_KEY', default=None)
+    if not api_key:
+        logger.error("GEMINI_API_KEY not found in environment variables.")
+        return None, "GEMINI_API_KEY not found"
+
+    try:
+        num_questions = int(num_questions)
+    except (TypeError, ValueError):
+        return None, "num_questions must be an integer"
+
+    context = {
+        'category': category,
+        'title': title,
+        'level': level,
+        'additional_instructions': additional_instructions,
+        'language': language,
+    }
+    sizes = _chunk_sizes(num_questions)
+    if len(sizes) == 1:
+        results = [_generate_chunk(context, num_questions)]
+    else:
+        # Chunks run in parallel, so latency follows chunk size, not quiz size
+        with ThreadPoolExecutor(max_workers=min(MAX_CHUNK_WORKERS, len(sizes))) as pool:
+            futures = [
+                pool.submit(_generate_chunk, context, size, CHUNK_FOCUSES[idx % len(CHUNK_FOCUSES)])
+                for idx, size in enumerate(sizes)
+            ]
+            results = [future.result() for future in futures]
+
+    questions, seen, errors = [], set(), []
+    for idx, (chunk, error) in enumerate(results, start=1):
+        if error:
+            errors.append(f"Chunk {idx}: {error}")
+        for q in chunk:
+            key = _question_key(q['text'])
+            if key not in seen:
+                seen.add(key)
+                questions.append(q)
+
+    # Questions lost to failed chunks or cross-chunk duplicates get one more
+    # chunk (unless nothing worked at all)
+    if questions and len(questions) < num_questions:
+        extra, error = _generate_chunk(
+            context, num_questions - len(questions), avoid=tuple(seen)
+        )
+        questions.extend(extra)
+        if error:
+            errors.append(f"Top-up: {error}")
+
+    if len(questions) < num_questions:
+        logger.error(f"Generated {len(questions)}/{num_questions} questions: {'; '.join(errors)}")
+        return None, f"Expected {num_questions} questions, got {len(questions)}" + (f" ({'; '.join(errors)})" if errors else '')
+
+    logger.info(f"Successfully generated {num_questions} questions in {len(sizes)} chunks")
+    return questions[:num_questions], None
 
 def generate_content_with_gemini(prompt):
     """
     Generic function to get raw text content from Gemini for a given prompt.
     Returns the text content directly (or validation error string).
+    Not cached: the raw text is unvalidated.
     """
+    text, error = _generate_content(prompt)
+    return text if error is None else error
+
+
+def _generate_content(prompt):
     api_key = config('GEMINI_API_KEY', default=None)
     if not api_key:
-        return "GEMINI_API_KEY not set"
+        return None, "GEMINI_API_KEY not set"
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-flash-latest:generateContent?key={api_key}"
-    
-    payload = {
-        "contents": [{
-            "parts": [{"text": prompt}]
-        }]
-    }
-    
-    headers = {'Content-Type': 'application/json'}
-    
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        if response.status_code != 200:
-            return f"Error: {response.status_code} {response.text}"
-            
-        data = response.json()
-        try:
-            text = data['candidates'][0]['content']['parts'][0]['text']
-            # Clean generic markdown
-            text = text.replace('```json', '').replace('```', '').strip()
-            return text
-        except (KeyError, IndexError) as e:
-            return f"Parse Error: {str(e)}"
-            
-    except Exception as e:
-        return f"Request Error: {str(e)}"
+        # Clean generic markdown
+        return strip_code_fences(get_gemini_client().generate(prompt)), None
+    except GeminiError as e:
+        return None, f"Error: {str(e)}"
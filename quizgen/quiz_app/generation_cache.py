@@ -0,0 +1,229 @@
+"""
+Cache of Gemini generation results, keyed by a hash of the inputs.
+
+Identical requests (same normalized category, title, level, language,
+instructions, ...) get the stored output instead of another paid call.
+Lookups go through a bounded in-process LRU, then the
+GenerationCacheEntry table, which is shared by all processes and
+survives restarts. Only outputs that passed validation are stored.
+
+Entries expire after GENERATION_CACHE_TTL; past DB_MAX_ENTRIES the least
+recently used rows are evicted. Hit/miss counters and the generation
+time saved are counted in memory and added to GenerationCacheStat rows
+in batches, so every process (and the generation_cache command) sees the
+same totals (see stats()) without a write per lookup.
+"""
+import hashlib
+import json
+import threading
+import time
+import logging
+from collections import Counter
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .payload_cache import LRUBytesCache
+from .streaming import encode_json
+
+logger = logging.getLogger(__name__)
+
+GENERATION_CACHE_TTL = timedelta(days=7)
+DB_MAX_ENTRIES = 10000
+# Eviction runs after every this many writes (per process)
+EVICT_EVERY = 100
+
+LRU_MAX_ENTRIES = 256
+LRU_MAX_BYTES = 16 * 1024 * 1024
+
+STAT_NAMES = ('memory_hits', 'db_hits', 'misses', 'saved_ms')
+# Counters are written to the database after this many lookups or seconds
+# (per process), whichever comes first
+STATS_FLUSH_EVERY = 100
+STATS_FLUSH_SECONDS = 30
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return ' '.join(value.split()).lower()
+    return value
+
+
+def generation_key(kind, inputs):
+    """Hash of the generation kind and its normalized inputs."""
+    normalized = {name: _normalize(value) for name, value in inputs.items()}
+    raw = json.dumps([kind, normalized], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class GenerationCache:
+    """Two-tier (in-process LRU, then database) cache of generation outputs."""
+
+    def __init__(self, ttl=GENERATION_CACHE_TTL, max_entries=DB_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lru = LRUBytesCache(max_entries=LRU_MAX_ENTRIES, max_bytes=LRU_MAX_BYTES)
+        self._writes = 0
+
+    def get(self, key):
+        """Return the stored output for key, or None."""
+        data = self._lru.get(key)
+        if data is not None:
+            entry = json.loads(data)
+            if entry['expires'] > time.time():
+                _count('memory_hits', lookup=True)
+                _count('saved_ms', entry['latency_ms'])
+                return entry['value']
+
+        from .models import GenerationCacheEntry
+
+        try:
+            row = GenerationCacheEntry.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+            if row is None:
+                return None
+            GenerationCacheEntry.objects.filter(key=key).update(hits=F('hits') + 1, last_used_at=timezone.now())
+        except Exception as e:
+            logger.error(f"Generation cache lookup failed: {str(e)}")
+            return None
+
+        _count('db_hits', lookup=True)
+        _count('saved_ms', row.latency_ms)
+        self._remember(key, row.value, row.expires_at, row.latency_ms)
+        return row.value
+
+    def set(self, key, kind, value, latency_ms=0):
+        from .models import GenerationCacheEntry
+
+        expires_at = timezone.now() + self.ttl
+        self._remember(key, value, expires_at, latency_ms)
+        try:
+            GenerationCacheEntry.objects.update_or_create(key=key, defaults={
+                'kind': kind,
+                'value': value,
+                'latency_ms': latency_ms,
+                'hits': 0,
+                'last_used_at': timezone.now(),
+                'expires_at': expires_at,
+            })
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self.evict()
+        except Exception as e:
+            logger.error(f"Generation cache write failed: {str(e)}")
+
+    def _remember(self, key, value, expires_at, latency_ms):
+        self._lru.set(key, encode_json({'value': value, 'expires': expires_at.timestamp(), 'latency_ms': latency_ms}))
+
+    def evict(self):
+        """Delete expired rows, then the least recently used past max_entries."""
+        from .models import GenerationCacheEntry
+
+        deleted, _ = GenerationCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        # The most recently used entry that doesn't fit; it and older ones go
+        cutoff = list(GenerationCacheEntry.objects.order_by('-last_used_at').values_list('last_used_at', flat=True)[
+            self.max_entries:self.max_entries + 1
+        ])
+        if cutoff:
+            evicted, _ = GenerationCacheEntry.objects.filter(last_used_at__lte=cutoff[0]).delete()
+            deleted += evicted
+        if deleted:
+            logger.info(f"Evicted {deleted} generation cache entries")
+        return deleted
+
+    def clear(self):
+        from .models import GenerationCacheEntry
+
+        self._lru.clear()
+        GenerationCacheEntry.objects.all().delete()
+
+    def cached(self, kind, inputs, generate):
+        """
+        Return generate()'s (value, error) for the inputs, from the cache
+        when possible. Only successful results (a value and no error) are
+        stored; generate() must return validated output.
+        """
+        key = generation_key(kind, inputs)
+        value = self.get(key)
+        if value is not None:
+            return value, None
+
+        _count('misses', lookup=True)
+        started = time.monotonic()
+        value, error = generate()
+        if value and error is None:
+            self.set(key, kind, value, int((time.monotonic() - started) * 1000))
+        return value, error
+
+
+_stats_lock = threading.Lock()
+_pending_stats = Counter()
+_pending_lookups = 0
+_last_flush = time.monotonic()
+
+
+def _count(name, amount=1, lookup=False):
+    global _pending_lookups
+    if not amount:
+        return
+    with _stats_lock:
+        _pending_stats[name] += amount
+        _pending_lookups += lookup
+        due = _pending_lookups >= STATS_FLUSH_EVERY or time.monotonic() - _last_flush >= STATS_FLUSH_SECONDS
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Add this process's pending counts to the GenerationCacheStat rows."""
+    from .models import GenerationCacheStat
+    global _pending_stats, _pending_lookups, _last_flush
+
+    with _stats_lock:
+        pending = _pending_stats
+        _pending_stats, _pending_lookups, _last_flush = Counter(), 0, time.monotonic()
+
+    for name, amount in pending.items():
+        try:
+            if GenerationCacheStat.objects.filter(name=name).update(value=F('value') + amount):
+                continue
+            try:
+                with transaction.atomic():
+                    GenerationCacheStat.objects.create(name=name, value=amount)
+            except IntegrityError:
+                # Created concurrently by another process
+                GenerationCacheStat.objects.filter(name=name).update(value=F('value') + amount)
+        except Exception as e:
+            # Counters are diagnostics; never fail a lookup over them
+            logger.error(f"Failed to count generation cache {name}: {str(e)}")
+
+
+def stats():
+    """Hit/miss counters since they were last reset, plus hit rate and seconds saved."""
+    from .models import GenerationCacheStat
+
+    flush_stats()
+    counts = dict.fromkeys(STAT_NAMES, 0)
+    counts.update(GenerationCacheStat.objects.filter(name__in=STAT_NAMES).values_list('name', 'value'))
+    hits = counts['memory_hits'] + counts['db_hits']
+    lookups = hits + counts['misses']
+    counts['hit_rate'] = round(hits / lookups, 3) if lookups else 0.0
+    counts['saved_seconds'] = round(counts.pop('saved_ms') / 1000, 1)
+    return counts
+
+
+def reset_stats():
+    from .models import GenerationCacheStat
+    global _pending_lookups, _last_flush
+
+    with _stats_lock:
+        _pending_stats.clear()
+        _pending_lookups, _last_flush = 0, time.monotonic()
+    GenerationCacheStat.objects.filter(name__in=STAT_NAMES).delete()
+
+
+_generation_cache = GenerationCache()
+
+
+def get_generation_cache():
+    """Return the shared per-process generation cache."""
+    return _generation_cache
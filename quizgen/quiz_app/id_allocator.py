@@ -0,0 +1,91 @@
+"""
+Quiz ID allocation without lookup queries.
+
+Each process reserves blocks of BLOCK_SIZE sequence numbers from the
+database and hands them out from memory, so creating a quiz costs no
+query at all except one per block. On PostgreSQL blocks come from a
+sequence (nextval is never rolled back, so a block is never handed out
+twice); elsewhere from a counter row in QuizIdBlock.
+
+Sequence numbers are scrambled with a fixed bijection and encoded in
+Crockford base32 behind a 'q' prefix: IDs are short, don't reveal how
+many quizzes exist, and can never collide with the numeric IDs of older
+quizzes and the dataset.
+"""
+import threading
+import logging
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 100
+SEQUENCE_NAME = 'quiz_app_quiz_id_block_seq'
+
+ID_PREFIX = 'q'
+ALPHABET = '0123456789abcdefghjkmnpqrstvwxyz'
+ID_BITS = 40
+ID_LENGTH = 8  # ID_BITS / 5 bits per character
+# Odd multiplier: n -> n * MULTIPLIER mod 2**ID_BITS is a bijection
+MULTIPLIER = 0x9E3779B97F
+
+
+def encode_quiz_id(number):
+    """Return the public quiz ID for sequence number (0 <= number < 2**40)."""
+    if not 0 <= number < (1 << ID_BITS):
+        raise ValueError(f"Quiz sequence number out of range: {number}")
+    value = (number * MULTIPLIER) & ((1 << ID_BITS) - 1)
+    chars = []
+    for _ in range(ID_LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return ID_PREFIX + ''.join(reversed(chars))
+
+
+class QuizIdAllocator:
+    """Hands out quiz IDs from per-process blocks of sequence numbers."""
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._last_block = -1
+        self._lock = threading.Lock()
+
+    def allocate(self):
+        with self._lock:
+            if self._next >= self._end:
+                block = self._reserve_block()
+                self._next, self._end = block * self.block_size, (block + 1) * self.block_size
+            number = self._next
+            self._next += 1
+        return encode_quiz_id(number)
+
+    def _reserve_block(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT nextval(%s)', [SEQUENCE_NAME])
+                block = cursor.fetchone()[0]
+        else:
+            block = self._reserve_counter_block()
+        logger.info(f"Reserved quiz ID block {block}")
+        return block
+
+    def _reserve_counter_block(self):
+        from quiz_app.models import QuizIdBlock
+
+        with transaction.atomic():
+            counter, _ = QuizIdBlock.objects.select_for_update().get_or_create(name='quiz')
+            # A rolled-back reservation can hand back a block this process
+            # already used; skip past it
+            block = max(counter.next_block, self._last_block + 1)
+            QuizIdBlock.objects.filter(pk=counter.pk).update(next_block=block + 1)
+        self._last_block = block
+        return block
+
+
+_allocator = QuizIdAllocator()
+
+
+def get_quiz_id_allocator():
+    """Return the shared per-process quiz ID allocator."""
+    return _allocator
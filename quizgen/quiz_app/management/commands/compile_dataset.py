@@ -0,0 +1,30 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from quiz_app.catalog import DatasetCatalog, DATASET_DIR, COMPILED_DATASET_NAME
+from quiz_app.compiled_dataset import write_compiled_dataset
+
+class Command(BaseCommand):
+    help = 'Compiles the dataset CSVs into a memory-mapped binary file used by the quiz catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset-dir', default=DATASET_DIR, help='Folder containing the dataset CSVs')
+        parser.add_argument('--output', default=None, help=f'Output path (default: <dataset-dir>/{COMPILED_DATASET_NAME})')
+
+    def handle(self, *args, **options):
+        dataset_dir = options['dataset_dir']
+        output = options['output'] or os.path.join(dataset_dir, COMPILED_DATASET_NAME)
+
+        if not os.path.isdir(dataset_dir):
+            raise CommandError(f"Dataset folder not found: {dataset_dir}")
+
+        self.stdout.write(f"Compiling dataset from {dataset_dir}...")
+        started = time.monotonic()
+        snapshot = DatasetCatalog(dataset_dir=dataset_dir).parse_csv()
+        counts = write_compiled_dataset(snapshot, output)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {output}: {counts['quizzes']} quizzes, {counts['questions']} questions, "
+            f"{counts['strings']} strings, {counts['topics']} topics ({os.path.getsize(output)} bytes, {elapsed:.2f}s)"
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from quiz_app.services.live_quiz_pool import LIVE_TOPICS, TARGET_SIZE, refill_topic
+
+class Command(BaseCommand):
+    help = 'Fills the warm pool of ready-made live-session quizzes for every topic'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=TARGET_SIZE, help='Pooled quizzes to keep per topic')
+
+    def handle(self, *args, **options):
+        total = 0
+        for topic in LIVE_TOPICS:
+            added = refill_topic(topic, target=options['size'])
+            total += added
+            self.stdout.write(f"{topic}: added {added}")
+        self.stdout.write(self.style.SUCCESS(f"Added {total} pooled live quizzes"))
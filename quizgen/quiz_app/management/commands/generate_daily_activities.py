@@ -1,11 +1,23 @@
+import time
 from django.core.management.base import BaseCommand
-from quiz_app.services.activity_generator import ActivityGenerator
+from quiz_app.services.activity_generator import ActivityGenerator, MAX_WORKERS
 
 class Command(BaseCommand):
     help = 'Generates daily activities for Fun & Activities section using AI'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='Activities generated at the same time')
+
     def handle(self, *args, **kwargs):
         self.stdout.write("Starting activity generation...")
+        started = time.monotonic()
         generator = ActivityGenerator()
-        generator.generate_daily_activities()
-        self.stdout.write(self.style.SUCCESS("Successfully generated activities!"))
+        results = generator.generate_daily_activities(max_workers=kwargs['workers'])
+        for result in sorted(results, key=lambda result: (result['date'], result['type'])):
+            source = 'fallback' if result['fallback'] else 'AI'
+            self.stdout.write(
+                f"  {result['date']} {result['type']:<10} {result['questions']:>3} questions ({source}) {result['seconds']:.2f}s"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully generated {len(results)} activities in {time.monotonic() - started:.2f}s!"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from quiz_app.models import GenerationCacheEntry
+from quiz_app.generation_cache import get_generation_cache, stats, reset_stats
+
+class Command(BaseCommand):
+    help = 'Shows Gemini generation cache statistics, optionally evicting stale entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true', help='Delete expired and least recently used entries')
+        parser.add_argument('--reset-stats', action='store_true', help='Reset the hit/miss counters')
+
+    def handle(self, *args, **options):
+        if options['evict']:
+            deleted = get_generation_cache().evict()
+            self.stdout.write(f"Evicted {deleted} entries")
+
+        counts = stats()
+        self.stdout.write(
+            f"Lookups: {counts['memory_hits']} memory hits, {counts['db_hits']} DB hits, {counts['misses']} misses "
+            f"(hit rate {counts['hit_rate']:.1%}), {counts['saved_seconds']}s of generation saved"
+        )
+        for row in GenerationCacheEntry.objects.values('kind').annotate(entries=Count('key'), hits=Sum('hits')).order_by('kind'):
+            self.stdout.write(f"  {row['kind']}: {row['entries']} entries, {row['hits'] or 0} DB hits")
+
+        if options['reset_stats']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
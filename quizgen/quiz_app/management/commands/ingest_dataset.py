@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from quiz_app.catalog import DATASET_DIR
+from quiz_app.services.dataset_ingest import DatasetIngestor
+
+class Command(BaseCommand):
+    help = 'Upserts dataset CSV quizzes and questions into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset-dir', default=DATASET_DIR, help='Folder containing the dataset CSVs')
+        parser.add_argument('--batch-size', type=int, default=200, help='Quizzes per bulk write')
+        parser.add_argument('--workers', type=int, default=1, help='Concurrent batch writers (1 = write inline)')
+        parser.add_argument('--checkpoint', default=None, help='Checkpoint file (default: <dataset-dir>/.ingest_checkpoint.json)')
+        parser.add_argument('--reset', action='store_true', help='Ignore the checkpoint and ingest everything again')
+
+    def handle(self, *args, **options):
+        ingestor = DatasetIngestor(
+            dataset_dir=options['dataset_dir'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            checkpoint_path=options['checkpoint'],
+            log=self.stdout.write,
+        )
+
+        started = time.monotonic()
+        totals = ingestor.run(reset=options['reset'])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {totals['quizzes']} quizzes and {totals['questions']} questions "
+            f"({totals['skipped_rows']} rows skipped) in {elapsed:.2f}s"
+        ))
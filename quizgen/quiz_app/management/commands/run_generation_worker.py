@@ -0,0 +1,47 @@
+import time
+import threading
+from django.core.management.base import BaseCommand
+from django.db import connection
+from quiz_app.services.generation_jobs import (
+    claim_job, run_job, requeue_stale_jobs, POLL_INTERVAL_SECONDS, RECOVERY_INTERVAL_SECONDS
+)
+
+class Command(BaseCommand):
+    help = 'Runs queued quiz generation jobs with a pool of worker threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Jobs run at the same time')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        self.stdout.write(f"Generation worker started with {threads} threads")
+        requeue_stale_jobs()
+
+        workers = [threading.Thread(target=self.work, args=(options['once'],), daemon=True) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        last_requeue = time.monotonic()
+        try:
+            while any(worker.is_alive() for worker in workers):
+                time.sleep(POLL_INTERVAL_SECONDS)
+                if not options['once'] and time.monotonic() - last_requeue > RECOVERY_INTERVAL_SECONDS:
+                    requeue_stale_jobs()
+                    last_requeue = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping generation worker")
+        self.stdout.write(self.style.SUCCESS("Generation worker stopped"))
+
+    def work(self, once):
+        try:
+            while True:
+                job = claim_job()
+                if job is None:
+                    if once:
+                        return
+                    time.sleep(POLL_INTERVAL_SECONDS)
+                    continue
+                run_job(job)
+                self.stdout.write(f"Job {job.pk}: {job.status}")
+        finally:
+            connection.close()
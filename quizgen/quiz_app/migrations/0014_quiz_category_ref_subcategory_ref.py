@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:36
+
+from django.db import migrations, models
+from django.utils.text import slugify
+import django.db.models.deletion
+
+
+def canonical_slug(value):
+    # Frozen copy of catalog.canonical_slug at the time of this migration
+    return slugify(value or '', allow_unicode=True)[:255] or 'general'
+
+
+def backfill_taxonomy(apps, schema_editor):
+    Quiz = apps.get_model('quiz_app', 'Quiz')
+    Category = apps.get_model('quiz_app', 'Category')
+    SubCategory = apps.get_model('quiz_app', 'SubCategory')
+
+    ids = {}
+    pairs = Quiz.objects.values_list('category', 'topic').distinct()
+    for category, topic in pairs:
+        category_name = category or topic
+        subtopic_name = topic or category_name
+        category_slug = canonical_slug(category_name)
+        subcategory_slug = canonical_slug(subtopic_name)
+
+        key = (category_slug, subcategory_slug)
+        if key not in ids:
+            name = (category_name or '').strip()[:255] or category_slug
+            # Category names are unique too: reuse a row already holding
+            # this name under another slug instead of failing the insert
+            category_obj = (
+                Category.objects.filter(slug=category_slug).first()
+                or Category.objects.filter(name=name).first()
+                or Category.objects.create(slug=category_slug, name=name, category_type='general_knowledge')
+            )
+            subcategory_obj, _ = SubCategory.objects.get_or_create(
+                parent_category=category_obj,
+                slug=subcategory_slug,
+                defaults={'name': (subtopic_name or '').strip()[:255] or subcategory_slug}
+            )
+            ids[key] = (category_obj.id, subcategory_obj.id)
+
+        Quiz.objects.filter(category=category, topic=topic).update(
+            category_ref_id=ids[key][0], subcategory_ref_id=ids[key][1]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0013_quiz_created_at_quiz_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='category_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quizzes', to='quiz_app.category'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='subcategory_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quizzes', to='quiz_app.subcategory'),
+        ),
+        migrations.RunPython(backfill_taxonomy, migrations.RunPython.noop),
+    ]
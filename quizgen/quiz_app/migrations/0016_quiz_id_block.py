@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:47
+
+from django.db import migrations, models
+
+
+SEQUENCE_NAME = 'quiz_app_quiz_id_block_seq'
+
+
+def create_sequence(apps, schema_editor):
+    # Blocks come from a sequence on PostgreSQL (see quiz_app.id_allocator)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'CREATE SEQUENCE IF NOT EXISTS {SEQUENCE_NAME}')
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP SEQUENCE IF EXISTS {SEQUENCE_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0015_quiz_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizIdBlock',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_block', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0018_quiz_generation_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveQuizPoolEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=100)),
+                ('title', models.CharField(max_length=255)),
+                ('questions', models.JSONField(help_text='List of {text, options, correct_answer}')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['topic', 'created_at'], name='quiz_app_li_topic_782667_idx')],
+            },
+        ),
+    ]
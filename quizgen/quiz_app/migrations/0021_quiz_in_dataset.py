@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:10
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 500
+
+
+def flag_dataset_quizzes(apps, schema_editor):
+    from quiz_app.catalog import get_catalog
+
+    Quiz = apps.get_model('quiz_app', 'Quiz')
+    dataset_ids = [entry['quiz_id'] for entry in get_catalog().iter_quizzes()]
+    for start in range(0, len(dataset_ids), CHUNK_SIZE):
+        Quiz.objects.filter(quiz_id__in=dataset_ids[start:start + CHUNK_SIZE]).update(in_dataset=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0020_generation_cache_stat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='in_dataset',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(flag_dataset_quizzes, migrations.RunPython.noop),
+    ]
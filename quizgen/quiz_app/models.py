@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 import json
+import uuid
 
 
 class Category(models.Model):
@@ -293,6 +294,9 @@ class Quiz(models.Model):
     category = models.CharField(max_length=255, help_text="Quiz category (e.g., Mathematics, Science)", db_index=True, blank=True, null=True)
     title = models.CharField(max_length=255)
     topic = models.CharField(max_length=255, help_text="Interest or topic of the quiz")
+    # Canonical taxonomy rows for category/topic (see quiz_app.taxonomy); used for indexed filtering
+    category_ref = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='quizzes')
+    subcategory_ref = models.ForeignKey(SubCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='quizzes')
     level = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, db_index=True, help_text="Difficulty level", blank=True, null=True)
     language = models.CharField(max_length=50, default='English', help_text="Language of the quiz content")
     # Legacy field for backwards compatibility
@@ -306,6 +310,11 @@ class Quiz(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_quizzes')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
+    # Hash of the quiz detail payload (see services.quiz_payloads); blank until computed
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    # Shares its quiz_id with a dataset quiz, which it replaces in lists and
+    # counts (set on save and by ingest_dataset; see services.quiz_listing)
+    in_dataset = models.BooleanField(default=False, db_index=True, editable=False)
 
     def __str__(self):
         return f"{self.title} ({self.quiz_id})"
@@ -319,6 +328,8 @@ class Quiz(models.Model):
             models.Index(fields=['category']),
             models.Index(fields=['level']),
             models.Index(fields=['created_at']),
+            # Keyset pagination of the quiz list
+            models.Index(fields=['created_at', 'quiz_id']),
         ]
 
 
@@ -344,6 +355,89 @@ class Question(models.Model):
         ]
 
 
+class QuizIdBlock(models.Model):
+    """Next free block of quiz ID sequence numbers (see quiz_app.id_allocator; unused on PostgreSQL)."""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_block = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_block}"
+
+
+class QuizGenerationJob(models.Model):
+    """A queued quiz generation, run by a generation worker (see quiz_app.services.generation_jobs)."""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='quiz_generation_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    params = models.JSONField(help_text="Quiz creation parameters")
+    quiz = models.ForeignKey(Quiz, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    error = models.TextField(blank=True, default='')
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest pending job
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+
+class LiveQuizPoolEntry(models.Model):
+    """Questions for one ready-made live-session quiz (see quiz_app.services.live_quiz_pool)."""
+    topic = models.CharField(max_length=100)
+    title = models.CharField(max_length=255)
+    questions = models.JSONField(help_text="List of {text, options, correct_answer}")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.topic}: {self.title}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['topic', 'created_at']),
+        ]
+
+
+class GenerationCacheEntry(models.Model):
+    """Validated Gemini output for one set of generation inputs (see quiz_app.generation_cache)."""
+    key = models.CharField(max_length=64, primary_key=True)
+    kind = models.CharField(max_length=50)
+    value = models.JSONField()
+    latency_ms = models.IntegerField(default=0, help_text="How long the original generation took")
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.key[:12]} ({self.hits} hits)"
+
+
+class GenerationCacheStat(models.Model):
+    """A generation cache counter shared by every process (see quiz_app.generation_cache.stats)."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
 
 class QuizHistory(models.Model):
     QUIZ_TYPE_CHOICES = [
@@ -0,0 +1,199 @@
+"""
+Cache of encoded quiz payloads (the final JSON bytes of per-quiz responses).
+
+Entries are keyed by payload kind, quiz_id and the quiz's content version,
+so a stale entry is never served: changing a quiz or its questions moves
+it to a new version. Lookups go through a bounded in-process LRU first,
+then the shared Django cache, and only build the payload on a miss.
+
+Content versions:
+- DB content: a per-quiz counter in the shared cache, bumped (after
+  commit) when the Quiz or any of its Question rows is saved or deleted.
+  A question change also resets its quiz's content hash and bumps the
+  catalog generation, since list pages carry that hash.
+- Dataset content: a digest of the dataset file signature, so every
+  dataset quiz moves to a new version when the files change.
+"""
+import hashlib
+import threading
+import time
+import logging
+from collections import OrderedDict
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from .catalog import get_catalog
+from .cache_utils import bump_catalog_generation
+from .streaming import encode_json
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# In-process LRU bounds
+LRU_MAX_ENTRIES = 1024
+LRU_MAX_BYTES = 64 * 1024 * 1024
+
+
+class LRUBytesCache:
+    """Thread-safe LRU of bytes values, bounded by entry count and total size."""
+
+    def __init__(self, max_entries=LRU_MAX_ENTRIES, max_bytes=LRU_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = value
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_lru = LRUBytesCache()
+
+_dataset_version = (None, None)
+
+
+def dataset_content_version():
+    """Digest of the current dataset file signature."""
+    global _dataset_version
+    signature = get_catalog().snapshot().signature
+    cached_signature, version = _dataset_version
+    if cached_signature != signature:
+        version = hashlib.sha1(repr(signature).encode('utf-8')).hexdigest()[:16]
+        _dataset_version = (signature, version)
+    return version
+
+
+def _version_key(quiz_id):
+    return f"quiz_version_{quiz_id}"
+
+
+def db_content_version(quiz_id):
+    """
+    Return the DB content version for quiz_id.
+
+    Seeded from the clock (like the catalog generation) so a version lost
+    to cache eviction never comes back with an old value.
+    """
+    key = _version_key(quiz_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_quiz_version(quiz_id):
+    key = _version_key(quiz_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Never read, so nothing cached under it yet: seed a fresh version
+        db_content_version(quiz_id)
+
+
+def _bump_all(quiz_ids, quiz_pks):
+    quiz_ids = set(quiz_ids)
+    if quiz_pks:
+        from .models import Quiz
+        quiz_ids.update(Quiz.objects.filter(pk__in=quiz_pks).values_list('quiz_id', flat=True))
+        # Their questions changed: list pages must pick up a new content hash
+        Quiz.objects.filter(pk__in=quiz_pks).update(content_hash='', updated_at=timezone.now())
+        bump_catalog_generation()
+    for quiz_id in quiz_ids:
+        bump_quiz_version(quiz_id)
+
+
+# Quiz ids / pks changed on this thread (and so on its connection) since
+# the last commit
+_pending = threading.local()
+
+
+def _flush_pending():
+    quiz_ids = getattr(_pending, 'quiz_ids', None)
+    quiz_pks = getattr(_pending, 'pks', None)
+    _pending.quiz_ids, _pending.pks = set(), set()
+    if quiz_ids or quiz_pks:
+        _bump_all(quiz_ids or (), quiz_pks or ())
+
+
+def bump_quiz_version_on_commit(quiz_id=None, quiz_pk=None):
+    """
+    Bump a quiz's content version once the current transaction commits.
+
+    Accepts the quiz_id or (cheaper from Question signals) the Quiz pk.
+    Changes are collected per thread and the first commit callback bumps
+    them all at once; every change registers its own callback, so
+    changes left over from a rolled-back transaction are bumped (harmlessly)
+    at the next commit instead of being lost.
+    """
+    if not connection.in_atomic_block:
+        _bump_all([str(quiz_id)] if quiz_id is not None else [], [quiz_pk] if quiz_pk is not None else [])
+        return
+    if not hasattr(_pending, 'quiz_ids'):
+        _pending.quiz_ids, _pending.pks = set(), set()
+    if quiz_id is not None:
+        _pending.quiz_ids.add(str(quiz_id))
+    if quiz_pk is not None:
+        _pending.pks.add(quiz_pk)
+    transaction.on_commit(_flush_pending)
+
+
+def get_payload_bytes(kind, quiz_id, builder, source='db'):
+    """
+    Return the encoded JSON for a per-quiz payload, or None if builder()
+    returns None (quiz not found; not cached).
+
+    Args:
+        kind: Payload name (one per response shape)
+        quiz_id: Quiz id
+        builder: Zero-argument callable returning the payload dict or None
+        source: 'db', 'dataset' or 'any' - which content versions apply
+    """
+    parts = []
+    if source in ('dataset', 'any'):
+        parts.append(dataset_content_version())
+    if source in ('db', 'any'):
+        parts.append(str(db_content_version(quiz_id)))
+    key = f"quiz_payload_{kind}_{quiz_id}_v{'.'.join(parts)}"
+
+    data = _lru.get(key)
+    if data is not None:
+        return data
+
+    data = cache.get(key)
+    if data is None:
+        payload = builder()
+        if payload is None:
+            return None
+        data = encode_json(payload)
+        cache.set(key, data, timeout=PAYLOAD_CACHE_TIMEOUT)
+
+    _lru.set(key, data)
+    return data
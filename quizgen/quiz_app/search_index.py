@@ -0,0 +1,309 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+import logging
+from collections import Counter
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Quiz, Question
+from .cache_utils import get_catalog_generation
+from .catalog import get_catalog
+from .services.quiz_listing import serialize_db_quiz, serialize_dataset_quiz
+
+logger = logging.getLogger(__name__)
+
+# How often (seconds) the database is checked for quizzes added or
+# updated by other processes. Quizzes created in this process are
+# indexed immediately.
+CHECK_INTERVAL_SECONDS = 2.0
+
+FIELD_WEIGHTS = {
+    'title': 5.0,
+    'subtopic': 3.0,
+    'category': 2.0,
+    'question': 1.0,
+}
+
+# Prefixes shorter than this only match whole terms
+MIN_PREFIX_LENGTH = 2
+# A prefix expands to at most this many terms (the most common ones)
+MAX_PREFIX_TERMS = 50
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'was', 'what', 'which', 'who', 'with',
+])
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Split text into lowercase index terms, dropping stop words."""
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def document_terms(title, category, subtopic, question_texts):
+    """Return {term: weight} for one quiz, with log-scaled term frequencies."""
+    weights = Counter()
+    for field, text in (('title', title), ('category', category), ('subtopic', subtopic)):
+        for term in tokenize(text):
+            weights[term] += FIELD_WEIGHTS[field]
+
+    question_counts = Counter()
+    for text in question_texts:
+        question_counts.update(tokenize(text))
+    for term, count in question_counts.items():
+        weights[term] += FIELD_WEIGHTS['question'] * (1.0 + math.log(count))
+    return weights
+
+
+class SearchIndex:
+    """
+    In-process inverted index over DB and dataset quizzes.
+
+    Every quiz is one document made of its title, category, subtopic and
+    question text, with field weights favouring title matches. Postings
+    map term -> {quiz_id: weight}; a sorted term list serves prefix
+    queries. Results are ranked by the sum of weight * idf over the query
+    terms (all terms must match) and only the requested page is sorted.
+
+    The index is built on first use and rebuilt when the dataset files
+    change. Database quizzes created or updated since the last check are
+    indexed incrementally; a quiz present in both the DB and the dataset
+    is indexed once, with its DB values. Deletions made by other
+    processes are picked up when the catalog generation moves, by
+    checking the indexed DB quizzes against the table.
+    """
+
+    def __init__(self, check_interval=CHECK_INTERVAL_SECONDS):
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._next_check = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.postings = {}
+        self.terms = []
+        self.documents = {}
+        self._db_quiz_ids = set()
+        self._max_db_pk = 0
+        self._db_checked_at = None
+        self._generation = None
+
+    # Building
+
+    def _add_document(self, quiz_id, summary, weights):
+        self._remove_document(quiz_id)
+        for term, weight in weights.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                bisect.insort(self.terms, term)
+            posting[quiz_id] = weight
+        self.documents[quiz_id] = (summary, tuple(weights))
+
+    def _remove_document(self, quiz_id):
+        document = self.documents.pop(quiz_id, None)
+        if document is None:
+            return
+        for term in document[1]:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(quiz_id, None)
+            if not posting:
+                del self.postings[term]
+                idx = bisect.bisect_left(self.terms, term)
+                if idx < len(self.terms) and self.terms[idx] == term:
+                    del self.terms[idx]
+
+    def _build(self, snapshot):
+        started = time.monotonic()
+        self._reset()
+        self._snapshot = snapshot
+
+        # Bulk load: build postings first, sort the term list once at the end
+        postings = self.postings
+        for summary in snapshot.summaries():
+            quiz = summary if 'questions' in summary else snapshot.get(summary['quiz_id'])
+            weights = document_terms(
+                quiz['title'], quiz['category'], quiz['subtopic'],
+                (question['text'] for question in quiz['questions'])
+            )
+            for term, weight in weights.items():
+                postings.setdefault(term, {})[quiz['quiz_id']] = weight
+            self.documents[quiz['quiz_id']] = (serialize_dataset_quiz(quiz), tuple(weights))
+        self.terms = sorted(postings)
+
+        self._generation = get_catalog_generation()
+        self._index_db_quizzes(Quiz.objects.all())
+        logger.info(
+            f"Built search index: {len(self.documents)} quizzes, {len(self.terms)} terms "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+    def _index_db_quizzes(self, queryset):
+        checked_at = timezone.now()
+        quizzes = {quiz.id: quiz for quiz in queryset.order_by('id').iterator(chunk_size=2000)}
+        if not quizzes:
+            self._db_checked_at = checked_at
+            return
+
+        question_texts = {}
+        rows = Question.objects.filter(quiz_id__in=list(quizzes)) if len(quizzes) < 2000 else Question.objects.all()
+        for quiz_pk, question_text, text in rows.values_list('quiz_id', 'question_text', 'text').iterator(chunk_size=5000):
+            if quiz_pk in quizzes:
+                question_texts.setdefault(quiz_pk, []).append(question_text or text)
+
+        for pk, quiz in quizzes.items():
+            weights = document_terms(quiz.title, quiz.category or quiz.topic, quiz.topic, question_texts.get(pk, ()))
+            self._add_document(str(quiz.quiz_id), serialize_db_quiz(quiz), weights)
+            self._db_quiz_ids.add(str(quiz.quiz_id))
+        self._max_db_pk = max(self._max_db_pk, max(quizzes))
+        self._db_checked_at = checked_at
+
+    def index_quiz(self, quiz, question_texts):
+        """Add or replace a DB quiz in the index (no-op until the index is built)."""
+        with self._lock:
+            if self._snapshot is None:
+                return
+            weights = document_terms(quiz.title, quiz.category or quiz.topic, quiz.topic, question_texts)
+            self._add_document(str(quiz.quiz_id), serialize_db_quiz(quiz), weights)
+            self._db_quiz_ids.add(str(quiz.quiz_id))
+            self._max_db_pk = max(self._max_db_pk, quiz.id or 0)
+
+    def remove_quiz(self, quiz_id):
+        with self._lock:
+            self._remove_db_quiz(str(quiz_id))
+
+    def _remove_db_quiz(self, quiz_id):
+        # A deleted DB quiz that is also in the dataset falls back to its
+        # dataset values
+        self._db_quiz_ids.discard(quiz_id)
+        self._remove_document(quiz_id)
+        quiz = self._snapshot.get(quiz_id) if self._snapshot is not None else None
+        if quiz is not None:
+            weights = document_terms(
+                quiz['title'], quiz['category'], quiz['subtopic'],
+                (question['text'] for question in quiz['questions'])
+            )
+            self._add_document(quiz_id, serialize_dataset_quiz(quiz), weights)
+
+    def _remove_deleted_db_quizzes(self):
+        existing = {str(quiz_id) for quiz_id in Quiz.objects.values_list('quiz_id', flat=True).iterator(chunk_size=5000)}
+        deleted = self._db_quiz_ids - existing
+        for quiz_id in deleted:
+            self._remove_db_quiz(quiz_id)
+        if deleted:
+            logger.info(f"Removed {len(deleted)} deleted quizzes from the search index")
+
+    def refresh(self):
+        """
+        Rebuild if the dataset changed, pick up new or updated DB quizzes,
+        and drop deleted ones once the catalog generation has moved.
+        """
+        now = time.monotonic()
+        if self._snapshot is not None and now < self._next_check:
+            return
+
+        with self._lock:
+            if self._snapshot is not None and now < self._next_check:
+                return
+
+            snapshot = get_catalog().snapshot()
+            if snapshot is not self._snapshot:
+                self._build(snapshot)
+            else:
+                # Deletes bump the generation; read it before the table so
+                # a delete racing this check is caught next time
+                generation = get_catalog_generation()
+                if generation != self._generation:
+                    self._generation = generation
+                    self._remove_deleted_db_quizzes()
+                self._index_db_quizzes(Quiz.objects.filter(
+                    Q(id__gt=self._max_db_pk) | Q(updated_at__gte=self._db_checked_at)
+                ))
+            self._next_check = time.monotonic() + self.check_interval
+
+    # Querying
+
+    def _expand(self, token, prefix):
+        """Return the index terms a query token matches."""
+        if not prefix or len(token) < MIN_PREFIX_LENGTH:
+            return [token] if token in self.postings else []
+
+        start = bisect.bisect_left(self.terms, token)
+        end = bisect.bisect_left(self.terms, token + '\uffff', lo=start)
+        if end - start <= MAX_PREFIX_TERMS:
+            return self.terms[start:end]
+        return heapq.nlargest(MAX_PREFIX_TERMS, self.terms[start:end], key=lambda term: len(self.postings[term]))
+
+    def search(self, query, offset=0, limit=20):
+        """
+        Return (total_matches, [(score, summary), ...]) for one page.
+
+        Every query token must match. The last token also matches as a
+        prefix (search-as-you-type), as does any token ending in '*'.
+        """
+        raw_tokens = [token for token in (query or '').lower().split() if token.strip('*')]
+        if not raw_tokens:
+            return 0, []
+
+        self.refresh()
+        with self._lock:
+            groups = []
+            for position, raw in enumerate(raw_tokens):
+                prefix = raw.endswith('*') or position == len(raw_tokens) - 1
+                tokens = tokenize(raw)
+                for token in tokens:
+                    expanded = self._expand(token, prefix and token == tokens[-1])
+                    if not expanded:
+                        return 0, []
+                    groups.append([(self.postings[term], self._idf(term)) for term in expanded])
+            if not groups:
+                return 0, []
+
+            # Score the rarest query term in full, then only look up its
+            # candidates in the other terms' postings
+            groups.sort(key=lambda group: sum(len(posting) for posting, _ in group))
+            totals = {}
+            for posting, idf in groups[0]:
+                for quiz_id, weight in posting.items():
+                    score = weight * idf
+                    if score > totals.get(quiz_id, 0.0):
+                        totals[quiz_id] = score
+
+            for group in groups[1:]:
+                matched = {}
+                for quiz_id, total in totals.items():
+                    best = max((posting.get(quiz_id, 0.0) * idf for posting, idf in group), default=0.0)
+                    if best:
+                        matched[quiz_id] = total + best
+                totals = matched
+                if not totals:
+                    return 0, []
+
+            top = heapq.nlargest(offset + limit, totals.items(), key=lambda item: (item[1], item[0]))[offset:]
+            return len(totals), [(round(score, 3), self.documents[quiz_id][0]) for quiz_id, score in top]
+
+    def _idf(self, term):
+        return math.log(1.0 + max(len(self.documents), 1) / len(self.postings[term]))
+
+
+_index = SearchIndex()
+
+
+def get_search_index():
+    """Return the shared per-process search index."""
+    return _index
+
+
+def index_quiz_on_commit(quiz, question_texts):
+    """Index a newly created quiz in this process once the transaction commits."""
+    question_texts = list(question_texts)
+    transaction.on_commit(lambda: _index.index_quiz(quiz, question_texts))
@@ -1,67 +1,120 @@
 import json
 import random
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Q
 from django.utils import timezone
 from quiz_app.models import Activity, ActivityQuestion
-from quiz_app.gemini_utils import generate_content_with_gemini
+from quiz_app.gemini_client import get_gemini_client, strip_code_fences
+
+logger = logging.getLogger(__name__)
+
+# Buzzer removed as per request
+ACTIVITY_TYPES = ('lightning', 'scramble', 'two_truths')
+DAYS_AHEAD = 7
+# Gemini calls in flight at once
+MAX_WORKERS = 6
+
 
 class ActivityGenerator:
-    def generate_daily_activities(self):
-        """Generates activities for the next 7 days if they don't exist."""
+    def generate_daily_activities(self, max_workers=MAX_WORKERS):
+        """
+        Generates activities for the next 7 days if they don't exist.
+
+        Existing activities for the window are loaded in one query. The
+        missing ones are generated concurrently (Gemini calls only; all
+        database writes stay on the calling thread), and each is saved
+        with its questions in one transaction as soon as it is ready.
+
+        Returns a list of {date, type, questions, fallback, seconds} for
+        the activities created.
+        """
         today = timezone.now().date()
-        for i in range(8):  # Today + 7 days
-            target_date = today + timedelta(days=i)
-            print(f"Checking activities for {target_date}...")
-            # Buzzer removed as per request
-            self._ensure_activity(target_date, 'lightning', self._generate_lightning_content)
-            self._ensure_activity(target_date, 'scramble', self._generate_scramble_content)
-            self._ensure_activity(target_date, 'two_truths', self._generate_two_truths_content)
-
-    def _ensure_activity(self, date, type, generator_func):
-        # Check if activity exists
-        existing = Activity.objects.filter(date=date, type=type).first()
-        
-        if existing:
-            if existing.questions.count() == 0:
-                print(f"  Found empty {type} for {date}, regenerating...")
-                existing.delete()
-            else:
-                return # Already exists and has questions
-
-        print(f"  Generating {type} for {date}...")
-        
-        # Create activity first
-        activity = Activity.objects.create(
-            date=date,
-            type=type,
-            title=f"Daily {type.title().replace('_', ' ')}",
-            difficulty='medium'
-        )
+        dates = [today + timedelta(days=i) for i in range(DAYS_AHEAD + 1)]  # Today + 7 days
+
+        existing = {
+            (activity.date, activity.type): activity.question_count
+            for activity in Activity.objects.filter(date__in=dates, type__in=ACTIVITY_TYPES).annotate(
+                question_count=Count('questions')
+            )
+        }
+        empty = [key for key, count in existing.items() if count == 0]
+        if empty:
+            logger.info(f"Found {len(empty)} empty activities, regenerating...")
+            query = Q()
+            for date, type in empty:
+                query |= Q(date=date, type=type)
+            Activity.objects.filter(query).delete()
+
+        missing = [(date, type) for date in dates for type in ACTIVITY_TYPES if existing.get((date, type)) in (None, 0)]
+        logger.info(f"Generating {len(missing)} activities...")
 
+        results = []
+        if not missing:
+            return results
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as pool:
+            futures = {pool.submit(self._generate, type): (date, type) for date, type in missing}
+            for future in as_completed(futures):
+                date, type = futures[future]
+                questions_data, fallback, seconds = future.result()
+                if self._save_activity(date, type, questions_data):
+                    results.append({
+                        'date': date,
+                        'type': type,
+                        'questions': len(questions_data),
+                        'fallback': fallback,
+                        'seconds': seconds,
+                    })
+        return results
+
+    def _generate(self, type):
+        """Return (questions, used fallback, seconds taken); runs on a pool thread."""
+        generators = {
+            'lightning': self._generate_lightning_content,
+            'scramble': self._generate_scramble_content,
+            'two_truths': self._generate_two_truths_content,
+        }
+        started = time.monotonic()
         questions_data = None
         try:
-            questions_data = generator_func()
+            questions_data = generators[type]()
         except Exception as e:
-            print(f"  !! AI Generation failed for {type}: {e}")
-        
+            logger.error(f"AI generation failed for {type}: {e}")
+
         # Use fallback if AI failed or returned empty
-        if not questions_data:
-            print(f"  -> Using fallback content for {type}")
+        fallback = not questions_data
+        if fallback:
+            logger.warning(f"Using fallback content for {type}")
             questions_data = self._get_fallback_content(type)
+        return questions_data, fallback, time.monotonic() - started
 
+    def _save_activity(self, date, type, questions_data):
         try:
-            for idx, q_data in enumerate(questions_data):
-                ActivityQuestion.objects.create(
-                    activity=activity,
-                    content=q_data,
-                    correct_answer=q_data.get('answer', str(q_data.get('a', ''))),
-                    points=10,
-                    order=idx
+            with transaction.atomic():
+                activity = Activity.objects.create(
+                    date=date,
+                    type=type,
+                    title=f"Daily {type.title().replace('_', ' ')}",
+                    difficulty='medium'
                 )
-            print(f"  -> Created {activity} with {len(questions_data)} questions")
+                ActivityQuestion.objects.bulk_create([
+                    ActivityQuestion(
+                        activity=activity,
+                        content=q_data,
+                        correct_answer=q_data.get('answer', str(q_data.get('a', ''))),
+                        points=10,
+                        order=idx
+                    )
+                    for idx, q_data in enumerate(questions_data)
+                ])
+            logger.info(f"Created {activity} with {len(questions_data)} questions")
+            return True
         except Exception as e:
-            print(f"  !! Error saving questions for {type}: {str(e)}")
-            activity.delete()
+            logger.error(f"Error saving questions for {type} on {date}: {str(e)}")
+            return False
 
     def _get_fallback_content(self, type):
         """Returns hardcoded fallback content when AI fails."""
@@ -93,14 +146,17 @@ class ActivityGenerator:
             ]
         return []
 
+    def _ask_gemini(self, prompt):
+        # Raises GeminiError (caught by _generate) instead of returning error text
+        return strip_code_fences(get_gemini_client().generate(prompt))
+
     def _generate_lightning_content(self):
         prompt = """
         Generate 15 rapid-fire trivia questions for a 'Lightning Round'.
         Format: JSON array of objects with keys: "q" (question), "o" (array of 2 short options), "a" (index of correct option 0 or 1).
         Questions should be very short reading time.
         """
-        response = generate_content_with_gemini(prompt)
-        print(f"DEBUG: Lightning Raw Response: {response[:100]}...")
+        response = self._ask_gemini(prompt)
         # Transform for DB consistency if needed, but model stores flexible JSON
         return json.loads(response)
 
@@ -110,7 +166,7 @@ class ActivityGenerator:
         Format: JSON array of objects with keys: "word" (uppercase string), "hint" (short clue).
         Words should be 5-10 letters long.
         """
-        response = generate_content_with_gemini(prompt)
+        response = self._ask_gemini(prompt)
         return json.loads(response)
 
     def _generate_two_truths_content(self):
@@ -121,5 +177,5 @@ class ActivityGenerator:
         "options" (array of 3 objects: { "id": 1, "text": "...", "isLie": boolean, "explanation": "..." }).
         Ensure exactly one option is the lie (isLie: true).
         """
-        response = generate_content_with_gemini(prompt)
+        response = self._ask_gemini(prompt)
         return json.loads(response)
@@ -0,0 +1,231 @@
+import csv
+import json
+import os
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from django.db import transaction, connection
+from quiz_app.models import Quiz, Question
+from quiz_app.catalog import DatasetCatalog, DATASET_DIR, parse_duration
+from quiz_app.cache_utils import bump_catalog_generation
+from quiz_app.taxonomy import ensure_taxonomy
+from quiz_app.payload_cache import bump_quiz_version_on_commit
+from quiz_app.services.quiz_listing import bump_dataset_overlap_version
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = '.ingest_checkpoint.json'
+
+
+class DatasetIngestor:
+    """
+    Streams the dataset CSVs into the Quiz and Question tables.
+
+    Rows are grouped by QuizID (rows of one quiz are expected to be
+    contiguous, as in the dataset) and written in batches: quizzes are
+    upserted on quiz_id and their questions replaced, so re-running the
+    ingestion is idempotent. Progress is checkpointed per file after every
+    committed batch, and an interrupted run resumes from the last checkpoint
+    as long as the file has not changed since.
+    """
+
+    QUIZ_UPDATE_FIELDS = [
+        'category', 'title', 'topic', 'level', 'difficulty_level',
+        'num_questions', 'duration_seconds', 'category_ref', 'subcategory_ref', 'content_hash', 'in_dataset',
+    ]
+
+    def __init__(self, dataset_dir=DATASET_DIR, batch_size=200, workers=1, checkpoint_path=None, log=None):
+        self.dataset_dir = dataset_dir
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.checkpoint_path = checkpoint_path or os.path.join(dataset_dir, CHECKPOINT_NAME)
+        self.log = log or logger.info
+        self.totals = {'quizzes': 0, 'questions': 0, 'skipped_rows': 0}
+        self._totals_lock = threading.Lock()
+        # (category, subtopic) -> taxonomy ids, resolved once per run
+        self._taxonomy = {}
+
+    def run(self, reset=False):
+        checkpoint = {} if reset else self._load_checkpoint()
+
+        for filename, mtime_ns, size in DatasetCatalog(dataset_dir=self.dataset_dir).file_signature():
+            signature = [mtime_ns, size]
+            state = checkpoint.get(filename)
+            if not state or state.get('signature') != signature:
+                state = {'signature': signature, 'rows_done': 0, 'complete': False}
+            if state['complete']:
+                self.log(f"Skipping {filename}: already ingested")
+                continue
+
+            if state['rows_done']:
+                self.log(f"Resuming {filename} after row {state['rows_done']}")
+            else:
+                self.log(f"Ingesting {filename}...")
+
+            checkpoint[filename] = state
+            self._ingest_file(filename, state, checkpoint)
+            state['complete'] = True
+            self._save_checkpoint(checkpoint)
+
+        if self.totals['quizzes']:
+            bump_catalog_generation()
+            bump_dataset_overlap_version()
+        return self.totals
+
+    def _ingest_file(self, filename, state, checkpoint):
+        groups = self._iter_groups(os.path.join(self.dataset_dir, filename), state['rows_done'])
+
+        def committed(end_row):
+            state['rows_done'] = end_row
+            self._save_checkpoint(checkpoint)
+
+        if self.workers == 1:
+            for end_row, batch in self._iter_batches(groups):
+                self._write_batch(batch)
+                committed(end_row)
+            return
+
+        # Batches are written concurrently, but the checkpoint only advances
+        # past batches whose predecessors have all committed.
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for end_row, batch in self._iter_batches(groups):
+                pending.append((executor.submit(self._write_batch_in_thread, batch), end_row))
+                while pending and (pending[0][0].done() or len(pending) > self.workers * 2):
+                    future, done_row = pending.popleft()
+                    future.result()
+                    committed(done_row)
+            while pending:
+                future, done_row = pending.popleft()
+                future.result()
+                committed(done_row)
+
+    def _iter_groups(self, csv_path, start_row):
+        """Yield (last_row_number, quiz_id, rows) for each quiz after start_row."""
+        with open(csv_path, 'r', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            if not reader.fieldnames or 'QuizID' not in reader.fieldnames:
+                return
+
+            closed = set()
+            current_id, rows = None, []
+            row_number = 0
+            for row_number, row in enumerate(reader, start=1):
+                if row_number <= start_row:
+                    continue
+                quiz_id = (row.get('QuizID') or '').strip()
+                if not quiz_id:
+                    self.totals['skipped_rows'] += 1
+                    continue
+                if quiz_id != current_id:
+                    if quiz_id in closed:
+                        logger.warning(f"Skipping non-contiguous row {row_number} for quiz {quiz_id} in {csv_path}")
+                        self.totals['skipped_rows'] += 1
+                        continue
+                    if rows:
+                        yield row_number - 1, current_id, rows
+                        closed.add(current_id)
+                    current_id, rows = quiz_id, []
+                rows.append(row)
+
+            if rows:
+                yield row_number, current_id, rows
+
+    def _iter_batches(self, groups):
+        batch = []
+        end_row = 0
+        for end_row, quiz_id, rows in groups:
+            batch.append((quiz_id, rows))
+            if len(batch) >= self.batch_size:
+                yield end_row, batch
+                batch = []
+        if batch:
+            yield end_row, batch
+
+    def _write_batch_in_thread(self, batch):
+        try:
+            self._write_batch(batch)
+        finally:
+            # Each pool thread gets its own connection; don't leak it
+            connection.close()
+
+    def _write_batch(self, batch):
+        quizzes = []
+        for quiz_id, rows in batch:
+            first = rows[0]
+            level = first.get('Level', 'Medium')
+            category = first.get('Category', 'General')
+            topic = first.get('Subtopic', category)
+            category_ref_id, subcategory_ref_id = self._taxonomy_ids(category, topic)
+            quizzes.append(Quiz(
+                quiz_id=quiz_id,
+                category=category,
+                title=first.get('Title', 'Untitled Quiz'),
+                topic=topic,
+                category_ref_id=category_ref_id,
+                subcategory_ref_id=subcategory_ref_id,
+                level=level,
+                difficulty_level=level,
+                num_questions=len(rows),
+                duration_seconds=parse_duration(first.get('DurationSeconds')),
+                content_hash='',
+                in_dataset=True,
+            ))
+
+        with transaction.atomic():
+            Quiz.objects.bulk_create(
+                quizzes,
+                update_conflicts=True,
+                unique_fields=['quiz_id'],
+                update_fields=self.QUIZ_UPDATE_FIELDS,
+            )
+            pk_by_quiz_id = dict(
+                Quiz.objects.filter(quiz_id__in=[quiz_id for quiz_id, _ in batch]).values_list('quiz_id', 'id')
+            )
+
+            questions = []
+            for quiz_id, rows in batch:
+                for idx, row in enumerate(rows, start=1):
+                    text = row.get('QuestionText', '')
+                    questions.append(Question(
+                        quiz_id=pk_by_quiz_id[quiz_id],
+                        order=idx,
+                        text=text,
+                        question_text=text,
+                        options=[row.get('OptionA', ''), row.get('OptionB', ''), row.get('OptionC', ''), row.get('OptionD', '')],
+                        correct_answer=row.get('CorrectAnswer', ''),
+                        metadata={}
+                    ))
+
+            Question.objects.filter(quiz_id__in=pk_by_quiz_id.values()).delete()
+            Question.objects.bulk_create(questions, batch_size=1000)
+            for quiz_id in pk_by_quiz_id:
+                bump_quiz_version_on_commit(quiz_id=quiz_id)
+
+        with self._totals_lock:
+            self.totals['quizzes'] += len(quizzes)
+            self.totals['questions'] += len(questions)
+
+    def _taxonomy_ids(self, category, topic):
+        key = (category, topic)
+        ids = self._taxonomy.get(key)
+        if ids is None:
+            ids = self._taxonomy[key] = ensure_taxonomy(category, topic)
+        return ids
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingest checkpoint {self.checkpoint_path}: {str(e)}")
+            return {}
+
+    def _save_checkpoint(self, checkpoint):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(checkpoint, file)
+        os.replace(tmp_path, self.checkpoint_path)
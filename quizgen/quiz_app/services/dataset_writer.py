@@ -0,0 +1,167 @@
+import atexit
+import csv
+import io
+import json
+import os
+import queue
+import re
+import threading
+import logging
+from quiz_app.catalog import DATASET_DIR, GENERATED_DATASET_NAME
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: single-process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FIELDNAMES = [
+    'quiz_id', 'category', 'title', 'level', 'num_questions',
+    'duration_seconds', 'question_order', 'question_text',
+    'options_json', 'correct_answer', 'created_at'
+]
+
+# The active shard is rotated to <name>-<n>.csv once it grows past this
+MAX_SHARD_BYTES = 50 * 1024 * 1024
+# How long (seconds) the flusher waits for more rows before writing a batch
+FLUSH_INTERVAL_SECONDS = 0.5
+MAX_BATCH_ROWS = 5000
+
+
+def quiz_rows(quiz, questions):
+    """Build the dataset CSV rows for a quiz and its questions."""
+    return [{
+        'quiz_id': quiz.quiz_id,
+        'category': quiz.category,
+        'title': quiz.title,
+        'level': quiz.level,
+        'num_questions': quiz.num_questions,
+        'duration_seconds': quiz.duration_seconds,
+        'question_order': question.order,
+        'question_text': question.text,
+        'options_json': json.dumps(question.options),
+        'correct_answer': question.correct_answer,
+        'created_at': quiz.created_at.isoformat(),
+    } for question in questions]
+
+
+class DatasetWriter:
+    """
+    Appends generated quizzes to the dataset CSV off the request path.
+
+    Requests only enqueue rows. A background thread drains the queue and
+    writes each batch with a single append while holding an exclusive
+    advisory lock (flock) on <name>.csv.lock, then fsyncs, so rows from
+    concurrent worker processes never interleave. Once the active shard
+    passes max_shard_bytes it is renamed to the next <name>-<n>.csv under
+    the same lock and a fresh shard is started.
+
+    The catalog leaves these files out of its signature, so a flush
+    doesn't invalidate it: the quizzes written here are database quizzes,
+    already listed (and their catalog caches bumped) once they committed.
+    """
+
+    def __init__(self, dataset_dir=DATASET_DIR, name=GENERATED_DATASET_NAME, max_shard_bytes=MAX_SHARD_BYTES,
+                 flush_interval=FLUSH_INTERVAL_SECONDS, max_batch_rows=MAX_BATCH_ROWS):
+        self.dataset_dir = dataset_dir
+        self.name = name
+        self.max_shard_bytes = max_shard_bytes
+        self.flush_interval = flush_interval
+        self.max_batch_rows = max_batch_rows
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def active_path(self):
+        return os.path.join(self.dataset_dir, f"{self.name}.csv")
+
+    def submit(self, rows):
+        """Queue rows for the next batch; returns without touching the file."""
+        if not rows:
+            return
+        self._queue.put(list(rows))
+        self._ensure_flusher()
+
+    def flush(self):
+        """Block until every row queued so far has been written."""
+        self._queue.join()
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='dataset-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            rows = list(items[0])
+            # Gather whatever else arrives shortly into the same batch
+            while len(rows) < self.max_batch_rows:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                items.append(item)
+                rows.extend(item)
+
+            try:
+                self.write_batch(rows)
+            except Exception as e:
+                logger.error(f"Failed to append {len(rows)} rows to the dataset: {str(e)}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def write_batch(self, rows):
+        """Append rows to the active shard under the cross-process file lock."""
+        os.makedirs(self.dataset_dir, exist_ok=True)
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES)
+        for row in rows:
+            writer.writerow(row)
+
+        with open(f"{self.active_path}.lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._rotate_if_full()
+                with open(self.active_path, 'a', newline='', encoding='utf-8') as csvfile:
+                    if csvfile.tell() == 0:
+                        csv.DictWriter(csvfile, fieldnames=FIELDNAMES).writeheader()
+                    csvfile.write(buffer.getvalue())
+                    csvfile.flush()
+                    os.fsync(csvfile.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+        logger.info(f"Appended {len(rows)} rows to {self.active_path}")
+
+    def _rotate_if_full(self):
+        try:
+            size = os.path.getsize(self.active_path)
+        except OSError:
+            return
+        if size < self.max_shard_bytes:
+            return
+
+        pattern = re.compile(rf"^{re.escape(self.name)}-(\d+)\.csv$")
+        numbers = [int(match.group(1)) for match in map(pattern.match, os.listdir(self.dataset_dir)) if match]
+        shard_path = os.path.join(self.dataset_dir, f"{self.name}-{max(numbers, default=0) + 1:05d}.csv")
+        os.replace(self.active_path, shard_path)
+        logger.info(f"Rotated {self.active_path} to {shard_path} ({size} bytes)")
+
+
+_writer = DatasetWriter()
+atexit.register(_writer.flush)
+
+
+def get_dataset_writer():
+    """Return the shared per-process dataset writer."""
+    return _writer
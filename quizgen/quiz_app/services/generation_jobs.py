@@ -0,0 +1,258 @@
+"""
+Quiz generation jobs: Gemini round trips off the request path.
+
+Create endpoints save a QuizGenerationJob and answer 202 with its id;
+clients poll QuizGenerationJobView until it has succeeded or failed. Jobs
+are run by generation workers: the run_generation_worker management
+command (a pool of threads polling the job table), and - unless
+GENERATION_INPROCESS_WORKERS is 0 - a small thread pool in each web
+process that picks up jobs enqueued there.
+
+A job is claimed with a conditional UPDATE on its status, so however
+many workers race for it, it runs once. Jobs whose worker died are put
+back in the queue after STALE_JOB_SECONDS, up to MAX_JOB_ATTEMPTS runs.
+Both kinds of worker do this: the in-process pool sweeps (at most every
+RECOVERY_INTERVAL_SECONDS) after each job it runs and then runs whatever
+is pending, so the worker command is optional.
+"""
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decouple import config
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from quiz_app.models import Quiz, Question, QuizGenerationJob
+from quiz_app.utils import generate_unique_quiz_id, append_quiz_to_csv
+from quiz_app.services.question_bank import assemble_quiz_questions
+
+logger = logging.getLogger(__name__)
+
+STALE_JOB_SECONDS = 5 * 60
+MAX_JOB_ATTEMPTS = 2
+POLL_INTERVAL_SECONDS = 1
+RECOVERY_INTERVAL_SECONDS = STALE_JOB_SECONDS / 10
+INPROCESS_WORKERS = config('GENERATION_INPROCESS_WORKERS', default=2, cast=int)
+
+
+class InvalidQuizParams(ValueError):
+    pass
+
+
+def quiz_params(data, language_default='English', record_in_profile=False):
+    """
+    Validated quiz creation parameters from request data.
+
+    Raises:
+        InvalidQuizParams: If category/title are missing or a number isn't one
+    """
+    category = (data.get('category') or '').strip()
+    title = (data.get('title') or '').strip()
+    if not category or not title:
+        raise InvalidQuizParams("Category and title are required")
+    try:
+        num_questions = int(data.get('num_questions', 10))
+        duration_seconds = int(data.get('duration_seconds', 600))
+    except (TypeError, ValueError):
+        raise InvalidQuizParams("num_questions and duration_seconds must be integers")
+    if num_questions < 1 or duration_seconds < 1:
+        raise InvalidQuizParams("num_questions and duration_seconds must be positive")
+    return {
+        'category': category,
+        'title': title,
+        'level': data.get('level', 'easy'),
+        'num_questions': num_questions,
+        'duration_seconds': duration_seconds,
+        'additional_instructions': data.get('additional_instructions', '') or '',
+        'language': data.get('language') or language_default,
+        'record_in_profile': record_in_profile,
+    }
+
+
+def save_quiz(params, questions_data, user=None):
+    """Create the Quiz and its Questions, and queue them for the dataset CSV."""
+    quiz_id = generate_unique_quiz_id()
+    with transaction.atomic():
+        quiz = Quiz.objects.create(
+            quiz_id=quiz_id,
+            category=params['category'],
+            title=params['title'],
+            topic=params['category'],
+            level=params['level'],
+            difficulty_level=params['level'],
+            num_questions=len(questions_data),
+            duration_seconds=params['duration_seconds'],
+            duration_minutes=params['duration_seconds'] // 60,
+            created_by=user,
+            is_mock=False,
+            language=params['language']
+        )
+
+        question_objects = [
+            Question(
+                quiz=quiz,
+                order=idx,
+                text=q_data['text'],
+                question_text=q_data['text'],
+                options=q_data['options'],
+                correct_answer=q_data['correct_answer'],
+                metadata={}
+            )
+            for idx, q_data in enumerate(questions_data, start=1)
+        ]
+        Question.objects.bulk_create(question_objects)
+
+        if params.get('record_in_profile') and user is not None:
+            profile = user.profile
+            created_quizzes = profile.created_quiz_ids or []
+            if quiz_id not in created_quizzes:
+                created_quizzes.append(quiz_id)
+                profile.created_quiz_ids = created_quizzes
+                profile.save()
+
+        if not append_quiz_to_csv(quiz, question_objects):
+            logger.warning(f"CSV append failed for quiz {quiz_id}")
+    return quiz
+
+
+def enqueue_generation(params, user=None):
+    """Save a pending job; it is handed to the in-process pool once committed."""
+    job = QuizGenerationJob.objects.create(
+        user=user if user is not None and user.is_authenticated else None, params=params
+    )
+    if INPROCESS_WORKERS > 0:
+        transaction.on_commit(lambda: _get_executor().submit(_run_inprocess, job.pk))
+    logger.info(f"Queued quiz generation job {job.pk}: {params['title']} - {params['category']}")
+    return job
+
+
+def claim_job(job_id=None):
+    """
+    Mark a pending job (job_id, or the oldest) as running and return it,
+    or None if there is nothing to claim.
+    """
+    candidates = QuizGenerationJob.objects.filter(status=QuizGenerationJob.STATUS_PENDING)
+    if job_id is not None:
+        candidates = candidates.filter(pk=job_id)
+    for pk in candidates.order_by('created_at').values_list('pk', flat=True)[:5]:
+        claimed = QuizGenerationJob.objects.filter(pk=pk, status=QuizGenerationJob.STATUS_PENDING).update(
+            status=QuizGenerationJob.STATUS_RUNNING, started_at=timezone.now(), attempts=F('attempts') + 1
+        )
+        if claimed:
+            return QuizGenerationJob.objects.select_related('user').get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Generate and save the quiz of a claimed job, recording the outcome."""
+    params = job.params
+    started = time.monotonic()
+    try:
+        questions_data, error_msg = assemble_quiz_questions(
+            category=params['category'],
+            title=params['title'],
+            level=params['level'],
+            num_questions=params['num_questions'],
+            additional_instructions=params['additional_instructions'],
+            language=params['language'],
+            user=job.user
+        )
+        if not questions_data:
+            logger.error(f"Generation job {job.pk} failed: {error_msg}")
+            _finish(job, QuizGenerationJob.STATUS_FAILED, error=f"Failed to generate questions: {error_msg}")
+            return job
+
+        quiz = save_quiz(params, questions_data, job.user)
+        _finish(job, QuizGenerationJob.STATUS_SUCCEEDED, quiz=quiz)
+        logger.info(f"Generation job {job.pk} created quiz {quiz.quiz_id} in {time.monotonic() - started:.1f}s")
+    except Exception as e:
+        logger.error(f"Generation job {job.pk} crashed: {str(e)}")
+        _finish(job, QuizGenerationJob.STATUS_FAILED, error=f"Failed to create quiz: {str(e)}")
+    return job
+
+
+def _finish(job, status, quiz=None, error=''):
+    job.status, job.quiz, job.error, job.finished_at = status, quiz, error, timezone.now()
+    job.save(update_fields=['status', 'quiz', 'error', 'finished_at'])
+
+
+def requeue_stale_jobs():
+    """Put running jobs whose worker has gone quiet back in the queue (or fail them)."""
+    cutoff = timezone.now() - timedelta(seconds=STALE_JOB_SECONDS)
+    stale = QuizGenerationJob.objects.filter(status=QuizGenerationJob.STATUS_RUNNING, started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=MAX_JOB_ATTEMPTS).update(
+        status=QuizGenerationJob.STATUS_FAILED, error="Generation timed out", finished_at=timezone.now()
+    )
+    requeued = stale.update(status=QuizGenerationJob.STATUS_PENDING)
+    if failed or requeued:
+        logger.warning(f"Requeued {requeued} and failed {failed} stale generation jobs")
+    return requeued
+
+
+def job_payload(job):
+    """Status response data for a job."""
+    payload = {
+        'job_id': str(job.pk),
+        'status': job.status,
+        'category': job.params.get('category'),
+        'title': job.params.get('title'),
+        'level': job.params.get('level'),
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == QuizGenerationJob.STATUS_SUCCEEDED and job.quiz is not None:
+        payload['quiz_id'] = job.quiz.quiz_id
+        payload['num_questions'] = job.quiz.num_questions
+    if job.status == QuizGenerationJob.STATUS_FAILED:
+        payload['error'] = job.error
+    return payload
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_next_recovery = 0.0
+_recovery_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=INPROCESS_WORKERS, thread_name_prefix='quiz-generation')
+    return _executor
+
+
+def recover_jobs():
+    """
+    Requeue stale jobs and run the pending ones, unless this process did
+    so less than RECOVERY_INTERVAL_SECONDS ago. Returns how many jobs ran.
+    """
+    global _next_recovery
+    with _recovery_lock:
+        if time.monotonic() < _next_recovery:
+            return 0
+        _next_recovery = time.monotonic() + RECOVERY_INTERVAL_SECONDS
+
+    requeue_stale_jobs()
+    ran = 0
+    # Pending jobs here were requeued, or queued by a process that died
+    # before its pool picked them up
+    while True:
+        job = claim_job()
+        if job is None:
+            return ran
+        run_job(job)
+        ran += 1
+
+
+def _run_inprocess(job_id):
+    try:
+        job = claim_job(job_id)
+        if job is not None:
+            run_job(job)
+        recover_jobs()
+    finally:
+        connection.close()
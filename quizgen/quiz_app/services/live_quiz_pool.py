@@ -0,0 +1,132 @@
+"""
+Warm pool of ready-made quizzes for live sessions.
+
+Each live topic keeps up to TARGET_SIZE sets of questions generated ahead
+of time in LiveQuizPoolEntry. Opening a lobby pops one the host hasn't
+seen any question of and saves it as the session's quiz (two inserts, no
+generation); with none left, the view generates for the host. When a topic drops
+below LOW_WATER, a background thread generates more; the fill_live_quiz_pool
+management command fills every topic up front.
+"""
+import random
+import threading
+import logging
+from django.db import connection, transaction
+from django.db.models import Count
+from quiz_app.models import Quiz, Question, LiveQuizPoolEntry
+from quiz_app.utils import generate_unique_quiz_id
+from quiz_app.services.question_bank import assemble_quiz_questions, seen_question_keys, question_key
+
+logger = logging.getLogger(__name__)
+
+LIVE_TOPICS = [
+    "General Knowledge", "Science", "History", "Technology", "Movies",
+    "Geography", "Literature", "Sports", "Pop Culture", "Animals"
+]
+LIVE_LEVEL = "easy"
+LIVE_QUESTIONS = 5
+
+LOW_WATER = 2
+TARGET_SIZE = 5
+# Oldest entries looked at per pop (per topic, then across topics)
+POP_CANDIDATES = 10
+
+
+def live_quiz_title(topic):
+    return f"{topic} Challenge {random.randint(100, 999)}"
+
+
+def create_live_quiz(topic, title, questions_data, host):
+    """Save a live-session quiz for host from its questions."""
+    with transaction.atomic():
+        quiz = Quiz.objects.create(
+            quiz_id=generate_unique_quiz_id(),
+            title=title,
+            topic=topic,
+            difficulty_level=LIVE_LEVEL,
+            num_questions=len(questions_data),
+            created_by=host
+        )
+        Question.objects.bulk_create([
+            Question(
+                quiz=quiz,
+                order=idx,
+                text=q['text'],
+                options=q['options'],
+                correct_answer=q['correct_answer']
+            )
+            for idx, q in enumerate(questions_data, start=1)
+        ])
+    return quiz
+
+
+def pop_pooled_quiz(host, topic=None):
+    """
+    Take the oldest pooled quiz of topic (or, when it has none, of any
+    topic) that has no question host has already seen, and save it for
+    host. Returns the Quiz, or None if there is no such entry.
+    """
+    seen = seen_question_keys(host)
+    for candidates in ([LiveQuizPoolEntry.objects.filter(topic=topic)] if topic else []) + [LiveQuizPoolEntry.objects.all()]:
+        for entry in candidates.order_by('created_at')[:POP_CANDIDATES]:
+            if any(question_key(question['text']) in seen for question in entry.questions):
+                # Left for other hosts
+                continue
+            with transaction.atomic():
+                # Whoever deletes the row owns the entry; it stays pooled if the save fails
+                if not LiveQuizPoolEntry.objects.filter(pk=entry.pk).delete()[0]:
+                    continue
+                quiz = create_live_quiz(entry.topic, entry.title, entry.questions, host)
+            schedule_refill([entry.topic])
+            return quiz
+    return None
+
+
+def refill_topic(topic, target=TARGET_SIZE):
+    """Generate pooled quizzes until topic has target of them; returns how many were added."""
+    added = 0
+    while LiveQuizPoolEntry.objects.filter(topic=topic).count() < target:
+        title = live_quiz_title(topic)
+        questions_data, error_msg = assemble_quiz_questions(
+            category=topic,
+            title=title,
+            level=LIVE_LEVEL,
+            num_questions=LIVE_QUESTIONS
+        )
+        if not questions_data:
+            logger.error(f"Failed to generate a pooled live quiz for {topic}: {error_msg}")
+            break
+        LiveQuizPoolEntry.objects.create(topic=topic, title=title, questions=questions_data)
+        added += 1
+    return added
+
+
+_refilling = set()
+_refilling_lock = threading.Lock()
+
+
+def schedule_refill(topics):
+    """Refill (in a background thread) those of topics below LOW_WATER."""
+    counts = dict(
+        LiveQuizPoolEntry.objects.filter(topic__in=topics).order_by().values_list('topic').annotate(Count('id'))
+    )
+    with _refilling_lock:
+        low = [topic for topic in topics if counts.get(topic, 0) < LOW_WATER and topic not in _refilling]
+        _refilling.update(low)
+    if low:
+        threading.Thread(target=_refill, args=(low,), daemon=True).start()
+
+
+def _refill(topics):
+    try:
+        for topic in topics:
+            try:
+                added = refill_topic(topic)
+                logger.info(f"Added {added} pooled live quizzes for {topic}")
+            except Exception as e:
+                logger.error(f"Failed to refill live quiz pool for {topic}: {str(e)}")
+            finally:
+                with _refilling_lock:
+                    _refilling.discard(topic)
+    finally:
+        connection.close()
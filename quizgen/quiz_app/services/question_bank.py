@@ -0,0 +1,232 @@
+"""
+Question bank: new quizzes assembled from questions already stored.
+
+For a (category, level, language) the bank holds every distinct question
+of the matching DB quizzes and dataset quizzes. A quiz request takes as
+many questions as it needs from the bank, skipping those the user has
+already seen, and only asks Gemini for the rest - so popular
+combinations are served in milliseconds instead of a live generation.
+
+Questions are kept in a fixed hash order and each user starts reading
+at their own offset, so a user gets the same picks until they see them,
+and different users get different quizzes from the same bank.
+"""
+import random
+import threading
+import time
+import zlib
+import logging
+from django.db import connection
+from django.db.models import Q
+from quiz_app.models import Question, QuizHistory
+from quiz_app.catalog import get_catalog
+from quiz_app.cache_utils import get_catalog_generation
+from quiz_app.gemini_utils import generate_quiz_questions
+from quiz_app.services.quiz_listing import QuizListing, sorted_dataset_entries
+
+logger = logging.getLogger(__name__)
+
+# A bank is rebuilt (in the background) once it is this old and the
+# catalog has changed since it was built
+BANK_REFRESH_SECONDS = 60
+MAX_BANKS = 64
+# Most DB questions loaded into one bank (newest first)
+MAX_BANK_QUESTIONS = 5000
+# Most recent quizzes per user whose questions count as seen
+MAX_SEEN_QUIZZES = 200
+
+
+def question_key(text):
+    """Normalized question text, used to tell questions apart."""
+    return ' '.join((text or '').lower().split())
+
+
+class QuestionBank:
+    """Distinct stored questions of one (category, level, language)."""
+
+    def __init__(self, category, level, language):
+        self.generation = get_catalog_generation()
+        self.snapshot = get_catalog().snapshot()
+        self.built_at = time.monotonic()
+
+        listing = QuizListing({'category': category, 'level': level, 'language': language})
+        rows = Question.objects.filter(
+            quiz__in=listing.database_queryset().filter(is_mock=False)
+        ).order_by('-id').values_list('text', 'question_text', 'options', 'correct_answer')[:MAX_BANK_QUESTIONS]
+
+        questions = {}
+        for text, legacy_text, options, correct_answer in rows:
+            text = text or legacy_text
+            key = question_key(text)
+            if key and key not in questions and isinstance(options, list) and correct_answer in options:
+                questions[key] = {'text': text, 'options': options, 'correct_answer': correct_answer}
+
+        if listing.includes_dataset():
+            catalog = get_catalog()
+            ids, entries, keys = sorted_dataset_entries()
+            checks = [(idx, value) for idx, value in enumerate(listing.dataset_key()) if value is not None]
+            for quiz_id, key in zip(ids, keys):
+                if any(key[idx] != value for idx, value in checks):
+                    continue
+                entry = catalog.get_quiz(quiz_id)
+                for question in entry['questions'] if entry else ():
+                    text_key = question_key(question['text'])
+                    options = list(question['options'].values())
+                    if text_key and text_key not in questions and question['correct_answer'] in options:
+                        questions[text_key] = {
+                            'text': question['text'],
+                            'options': options,
+                            'correct_answer': question['correct_answer']
+                        }
+
+        # Hash order stays put as questions come and go, so users keep
+        # their place in the bank across rebuilds
+        self.keys = sorted(questions, key=lambda key: (zlib.crc32(key.encode('utf-8')), key))
+        self.questions = questions
+
+    def __len__(self):
+        return len(self.keys)
+
+    def is_stale(self):
+        if time.monotonic() - self.built_at < BANK_REFRESH_SECONDS:
+            return False
+        return self.generation != get_catalog_generation() or self.snapshot is not get_catalog().snapshot()
+
+    def pick(self, count, seen=frozenset(), user_key=None):
+        """
+        Return up to count questions not in seen, reading from user_key's
+        offset in the bank (a random offset without one).
+        """
+        if not self.keys:
+            return []
+        if user_key is None:
+            start = random.randrange(len(self.keys))
+        else:
+            start = zlib.crc32(str(user_key).encode('utf-8')) % len(self.keys)
+
+        picks = []
+        for position in range(len(self.keys)):
+            key = self.keys[(start + position) % len(self.keys)]
+            if key not in seen:
+                question = self.questions[key]
+                picks.append({
+                    'text': question['text'],
+                    'options': list(question['options']),
+                    'correct_answer': question['correct_answer']
+                })
+                if len(picks) >= count:
+                    break
+        return picks
+
+
+_banks = {}
+_banks_lock = threading.Lock()
+_refreshing = set()
+
+
+def _bank_key(category, level, language):
+    return tuple(question_key(value) for value in (category, level, language))
+
+
+def get_bank(category, level, language='English'):
+    """
+    Return the QuestionBank for the combination.
+
+    A missing bank is built on the spot; a stale one keeps being served
+    while a background thread rebuilds it.
+    """
+    key = _bank_key(category, level, language)
+    bank = _banks.get(key)
+    if bank is None:
+        bank = QuestionBank(category, level, language)
+        with _banks_lock:
+            if len(_banks) >= MAX_BANKS:
+                _banks.pop(next(iter(_banks)))
+            _banks[key] = bank
+    elif bank.is_stale():
+        with _banks_lock:
+            start = key not in _refreshing
+            _refreshing.add(key)
+        if start:
+            threading.Thread(target=_refresh_bank, args=(key, category, level, language), daemon=True).start()
+    return bank
+
+
+def _refresh_bank(key, category, level, language):
+    try:
+        _banks[key] = QuestionBank(category, level, language)
+    except Exception as e:
+        logger.error(f"Failed to refresh question bank {key}: {str(e)}")
+    finally:
+        with _banks_lock:
+            _refreshing.discard(key)
+        connection.close()
+
+
+def seen_question_keys(user):
+    """Keys of the questions in quizzes the user attempted or created recently."""
+    if user is None or not user.is_authenticated:
+        return set()
+    attempted = QuizHistory.objects.filter(user=user).order_by('-started_at').values('quiz_id')[:MAX_SEEN_QUIZZES]
+    rows = Question.objects.filter(
+        Q(quiz_id__in=attempted) | Q(quiz__created_by=user)
+    ).values_list('text', 'question_text')
+    return {question_key(text or legacy_text) for text, legacy_text in rows}
+
+
+def take_from_bank(category, level, num_questions, additional_instructions="", language="English", user=None):
+    """
+    Return (questions, seen): up to num_questions bank questions the user
+    hasn't seen, and the keys of those they have. Requests with additional
+    instructions ask for specific content and skip the bank.
+    """
+    if (additional_instructions or '').strip():
+        return [], set()
+    try:
+        seen = seen_question_keys(user)
+        user_key = user.pk if user is not None and user.is_authenticated else None
+        return get_bank(category, level, language).pick(num_questions, seen, user_key), seen
+    except Exception as e:
+        # The bank is an optimization; fall back to generating everything
+        logger.error(f"Question bank lookup failed for {category}/{level}: {str(e)}")
+        return [], set()
+
+
+def assemble_quiz_questions(category, title, level, num_questions, additional_instructions="",
+                            language="English", user=None):
+    """
+    Questions for a new quiz, taken from the question bank where possible.
+
+    Takes the same arguments and returns the same (questions, error) as
+    gemini_utils.generate_quiz_questions(), which is only called for the
+    questions the bank can't supply.
+    """
+    try:
+        num_questions = int(num_questions)
+    except (TypeError, ValueError):
+        return None, "num_questions must be an integer"
+
+    picks, seen = take_from_bank(category, level, num_questions, additional_instructions, language, user)
+    missing = num_questions - len(picks)
+    logger.info(f"Question bank supplied {len(picks)}/{num_questions} questions for {category}/{level} ({language})")
+    if missing <= 0:
+        return picks, None
+
+    generated, error_msg = generate_quiz_questions(
+        category=category,
+        title=title,
+        level=level,
+        num_questions=missing,
+        additional_instructions=additional_instructions,
+        language=language
+    )
+    if not generated:
+        return None, error_msg
+
+    used = seen.union(question_key(question['text']) for question in picks)
+    for question in generated:
+        key = question_key(question['text'])
+        if key not in used:
+            used.add(key)
+            picks.append(question)
+    return picks, None
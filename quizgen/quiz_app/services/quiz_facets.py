@@ -0,0 +1,151 @@
+import threading
+import logging
+from django.db.models import Count
+from quiz_app.models import Quiz
+from quiz_app.catalog import get_catalog, canonical_slug, normalize_key
+from quiz_app.services.quiz_listing import dataset_ids_in_database
+
+logger = logging.getLogger(__name__)
+
+DATASET_LANGUAGE = 'English'
+
+
+class FacetCounter:
+    """Counts keyed on normalized values, remembering the first display name seen."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, key, name, count=1):
+        entry = self.counts.get(key)
+        if entry is None:
+            self.counts[key] = [name, count]
+        else:
+            entry[1] += count
+
+    def merge(self, other):
+        for key, (name, count) in other.counts.items():
+            self.add(key, name, count)
+
+    def copy(self):
+        counter = FacetCounter()
+        counter.merge(self)
+        return counter
+
+
+class DatasetFacets:
+    """
+    Facet counts for one catalog snapshot.
+
+    Attributes:
+        categories, subtopics, levels, languages: FacetCounter per facet
+        quiz_keys: Dict of quiz_id -> (category, subtopic, level) display
+            names, used to discount dataset quizzes also saved to the DB
+    """
+
+    def __init__(self, entries):
+        self.categories = FacetCounter()
+        self.subtopics = FacetCounter()
+        self.levels = FacetCounter()
+        self.languages = FacetCounter()
+        self.quiz_keys = {}
+
+        for entry in entries:
+            keys = (entry['category'], entry['subtopic'], entry['level'])
+            self.quiz_keys[entry['quiz_id']] = keys
+            add_quiz(self, *keys, DATASET_LANGUAGE, 1)
+
+    def copy(self):
+        facets = DatasetFacets([])
+        facets.categories = self.categories.copy()
+        facets.subtopics = self.subtopics.copy()
+        facets.levels = self.levels.copy()
+        facets.languages = self.languages.copy()
+        return facets
+
+
+def add_quiz(facets, category, subtopic, level, language, count):
+    """Add count quizzes with the given facet values (count may be negative)."""
+    facets.categories.add(canonical_slug(category), category, count)
+    facets.subtopics.add((canonical_slug(category), canonical_slug(subtopic)), (category, subtopic), count)
+    if level:
+        facets.levels.add(normalize_key(level), level, count)
+    facets.languages.add(normalize_key(language), language, count)
+
+
+_dataset_lock = threading.Lock()
+_dataset_facets = (None, None)
+
+
+def dataset_facets():
+    """Return DatasetFacets for the current catalog snapshot, computed once per snapshot."""
+    global _dataset_facets
+    snapshot = get_catalog().snapshot()
+    cached_snapshot, facets = _dataset_facets
+    if cached_snapshot is snapshot:
+        return facets
+
+    with _dataset_lock:
+        cached_snapshot, facets = _dataset_facets
+        if cached_snapshot is not snapshot:
+            facets = DatasetFacets(snapshot.summaries())
+            _dataset_facets = (snapshot, facets)
+    return facets
+
+
+def _as_list(counter):
+    return sorted(
+        ({'name': name, 'count': count} for name, count in counter.counts.values() if count > 0),
+        key=lambda item: (-item['count'], item['name'].lower())
+    )
+
+
+def build_facets():
+    """
+    Return facet counts over all DB and dataset quizzes.
+
+    DB quizzes are counted with one grouped aggregate and merged into the
+    precomputed dataset counts. Dataset quizzes that were also saved to the
+    DB (e.g. by ingest_dataset) are counted once, with their DB values, as
+    in the quiz list.
+    """
+    base = dataset_facets()
+    facets = base.copy()
+
+    if base.quiz_keys:
+        overlap = 0
+        for quiz_id in dataset_ids_in_database():
+            keys = base.quiz_keys.get(quiz_id)
+            if keys is not None:
+                add_quiz(facets, *keys, DATASET_LANGUAGE, -1)
+                overlap += 1
+        logger.info(f"Facets: {overlap} dataset quizzes also in the database")
+
+    rows = Quiz.objects.values('category', 'topic', 'level', 'difficulty_level', 'language').annotate(count=Count('id'))
+    total = sum(count for _, count in facets.categories.counts.values())
+    for row in rows:
+        add_quiz(
+            facets,
+            row['category'] or row['topic'],
+            row['topic'],
+            row['level'] or row['difficulty_level'],
+            row['language'] or 'English',
+            row['count']
+        )
+        total += row['count']
+
+    subtopics = sorted(
+        (
+            {'category': category, 'name': subtopic, 'count': count}
+            for (category, subtopic), count in facets.subtopics.counts.values() if count > 0
+        ),
+        key=lambda item: (item['category'].lower(), -item['count'], item['name'].lower())
+    )
+
+    return {
+        'total': total,
+        'categories': _as_list(facets.categories),
+        'subtopics': subtopics,
+        'levels': _as_list(facets.levels),
+        'languages': _as_list(facets.languages),
+    }
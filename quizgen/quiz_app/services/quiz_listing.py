@@ -0,0 +1,351 @@
+import base64
+import bisect
+import json
+import threading
+import logging
+from datetime import datetime
+from django.db.models import Q
+from quiz_app.models import Quiz
+from quiz_app.catalog import get_catalog, canonical_slug, normalize_key, parse_duration
+from quiz_app.cache_utils import get_version, bump_version
+from quiz_app.taxonomy import lookup_taxonomy
+from quiz_app.fieldsets import Fieldset, InvalidFields, parse_fields, project
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+SORT_NEWEST = 'newest'
+SORT_OLDEST = 'oldest'
+SORT_OPTIONS = (SORT_NEWEST, SORT_OLDEST)
+
+FILTER_FIELDS = ('category', 'topic', 'level', 'language')
+
+# Cursor phases: database quizzes come first, dataset-only quizzes (which
+# have no created_at) follow them, ordered by quiz_id.
+PHASE_DATABASE = 'db'
+PHASE_DATASET = 'ds'
+
+DATASET_LANGUAGE = 'English'
+
+DATASET_OVERLAP_VERSION_KEY = 'dataset_overlap_version'
+
+
+class InvalidListingParams(ValueError):
+    pass
+
+
+DB_QUIZ_FIELDS = Fieldset({
+    'quiz_id': (('quiz_id',), lambda quiz: str(quiz.quiz_id)),
+    'title': (('title',), lambda quiz: quiz.title),
+    'category': (('category', 'topic'), lambda quiz: quiz.category or quiz.topic),
+    'topic': (('topic',), lambda quiz: quiz.topic),
+    'level': (('level', 'difficulty_level'), lambda quiz: quiz.level or quiz.difficulty_level),
+    'num_questions': (('num_questions',), lambda quiz: quiz.num_questions),
+    'duration_seconds': (
+        ('duration_seconds', 'duration_minutes'),
+        lambda quiz: quiz.duration_seconds or (quiz.duration_minutes * 60 if quiz.duration_minutes else 600)
+    ),
+    'created_at': (('created_at',), lambda quiz: quiz.created_at.isoformat() if quiz.created_at else None),
+    'language': (('language',), lambda quiz: quiz.language or 'English'),
+    'source': ((), lambda quiz: 'database'),
+}, always=('pk', 'quiz_id', 'created_at'))
+
+# ?fields= choices for quiz list entries; content_hash is added by QuizListView
+QUIZ_LIST_FIELDS = DB_QUIZ_FIELDS.names + ('content_hash',)
+
+
+def parse_list_fields(value):
+    """Parse a quiz list ?fields= value (quiz_id is always included)."""
+    try:
+        return parse_fields(value, QUIZ_LIST_FIELDS, required=('quiz_id',))
+    except InvalidFields as e:
+        raise InvalidListingParams(str(e))
+
+
+def _db_fields(fields):
+    # content_hash isn't a DB quiz field
+    if fields is None:
+        return None
+    return tuple(name for name in fields if name in DB_QUIZ_FIELDS.specs)
+
+
+def db_quiz_queryset(queryset, fields=None):
+    """Restrict a Quiz queryset to the columns serialize_db_quiz() needs for fields."""
+    return DB_QUIZ_FIELDS.apply(queryset, _db_fields(fields))
+
+
+def serialize_db_quiz(quiz, fields=None):
+    return DB_QUIZ_FIELDS.serialize(quiz, _db_fields(fields))
+
+
+def serialize_dataset_quiz(entry, fields=None):
+    return project({
+        'quiz_id': entry['quiz_id'],
+        'title': entry['title'],
+        'category': entry['category'],
+        'topic': entry['subtopic'],
+        'level': entry['level'],
+        'num_questions': entry['num_questions'],
+        'duration_seconds': parse_duration(entry['duration_raw']),
+        'created_at': None,
+        'language': DATASET_LANGUAGE,
+        'source': 'dataset'
+    }, fields)
+
+
+def encode_cursor(sort, phase, created_at, quiz_id):
+    payload = [sort, phase, created_at.isoformat() if created_at else None, quiz_id]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort):
+    """Return (phase, created_at, quiz_id) for a cursor issued for the same sort."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, phase, created_at, quiz_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if created_at is not None:
+            created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidListingParams('Invalid cursor')
+
+    if cursor_sort != sort:
+        raise InvalidListingParams('Cursor was issued for a different sort order')
+    if phase not in (PHASE_DATABASE, PHASE_DATASET) or not isinstance(quiz_id, (str, type(None))):
+        raise InvalidListingParams('Invalid cursor')
+    # Dataset cursors may omit quiz_id (start of the dataset); database cursors may not
+    if phase == PHASE_DATABASE and (created_at is None or quiz_id is None):
+        raise InvalidListingParams('Invalid cursor')
+    return phase, created_at, quiz_id
+
+
+class QuizListing:
+    """
+    One page of the merged DB + dataset quiz list.
+
+    Database quizzes are paged with a keyset on (created_at, quiz_id), so
+    each page is a single index range scan no matter how deep the cursor
+    is. Dataset quizzes have no created_at; they follow the database
+    quizzes in either sort order, keyed on quiz_id, and are skipped when
+    a database quiz with the same quiz_id exists (as in the full list).
+
+    Category and topic filters match on the canonical taxonomy slug (via
+    the Category/SubCategory ids for DB quizzes); level and language are
+    case-insensitive exact matches.
+    """
+
+    def __init__(self, params):
+        self.sort = (params.get('sort') or SORT_NEWEST).lower()
+        if self.sort not in SORT_OPTIONS:
+            raise InvalidListingParams(f"sort must be one of: {', '.join(SORT_OPTIONS)}")
+
+        try:
+            page_size = int(params.get('page_size') or DEFAULT_PAGE_SIZE)
+        except (TypeError, ValueError):
+            raise InvalidListingParams('page_size must be an integer')
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+        self.filters = {}
+        for field in FILTER_FIELDS:
+            value = (params.get(field) or '').strip()
+            if value:
+                self.filters[field] = value
+
+        self.fields = parse_list_fields(params.get('fields'))
+
+        self.cursor = params.get('cursor') or None
+        if self.cursor:
+            self.phase, self.after_created_at, self.after_quiz_id = decode_cursor(self.cursor, self.sort)
+        else:
+            self.phase, self.after_created_at, self.after_quiz_id = PHASE_DATABASE, None, None
+
+    def cache_parts(self):
+        """Parts identifying this page, for catalog_cache_key()."""
+        filters = ','.join(f"{field}={normalize_key(value)}" for field, value in sorted(self.filters.items()))
+        return (self.sort, self.page_size, filters, ','.join(self.fields or ()), self.cursor or '')
+
+    def fetch(self):
+        """Return {'quizzes', 'count', 'next_cursor', 'has_more'} for this page."""
+        quizzes = []
+        next_cursor = None
+
+        if self.phase == PHASE_DATABASE:
+            quizzes, next_cursor = self._fetch_database(self.page_size)
+            if next_cursor is None:
+                dataset_quizzes, next_cursor = self._fetch_dataset(None, self.page_size - len(quizzes))
+                quizzes.extend(dataset_quizzes)
+        else:
+            quizzes, next_cursor = self._fetch_dataset(self.after_quiz_id, self.page_size)
+
+        return {
+            'quizzes': quizzes,
+            'count': len(quizzes),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+        }
+
+    def database_queryset(self):
+        """Database quizzes matching the filters (unordered, not paged)."""
+        queryset = Quiz.objects.all()
+        if 'category' in self.filters:
+            category_id, subcategory_id = lookup_taxonomy(self.filters['category'], self.filters.get('topic'))
+            if category_id is None or ('topic' in self.filters and subcategory_id is None):
+                return queryset.none()
+            queryset = queryset.filter(category_ref_id=category_id)
+            if subcategory_id is not None:
+                queryset = queryset.filter(subcategory_ref_id=subcategory_id)
+        elif 'topic' in self.filters:
+            queryset = queryset.filter(subcategory_ref__slug=canonical_slug(self.filters['topic']))
+        if 'level' in self.filters:
+            level = self.filters['level']
+            queryset = queryset.filter(
+                Q(level__iexact=level) | ((Q(level__isnull=True) | Q(level='')) & Q(difficulty_level__iexact=level))
+            )
+        if 'language' in self.filters:
+            queryset = queryset.filter(language__iexact=self.filters['language'])
+        return queryset
+
+    def _fetch_database(self, limit):
+        queryset = db_quiz_queryset(self.database_queryset(), self.fields)
+        if self.sort == SORT_NEWEST:
+            queryset = queryset.order_by('-created_at', '-quiz_id')
+            if self.after_created_at is not None:
+                queryset = queryset.filter(
+                    Q(created_at__lt=self.after_created_at)
+                    | Q(created_at=self.after_created_at, quiz_id__lt=self.after_quiz_id)
+                )
+        else:
+            queryset = queryset.order_by('created_at', 'quiz_id')
+            if self.after_created_at is not None:
+                queryset = queryset.filter(
+                    Q(created_at__gt=self.after_created_at)
+                    | Q(created_at=self.after_created_at, quiz_id__gt=self.after_quiz_id)
+                )
+
+        # One extra row tells us whether there is another database page
+        rows = list(queryset[:limit + 1])
+        if len(rows) <= limit:
+            return [serialize_db_quiz(quiz, self.fields) for quiz in rows], None
+
+        rows = rows[:limit]
+        last = rows[-1]
+        cursor = encode_cursor(self.sort, PHASE_DATABASE, last.created_at, str(last.quiz_id))
+        return [serialize_db_quiz(quiz, self.fields) for quiz in rows], cursor
+
+    def includes_dataset(self):
+        """False when the language filter excludes every dataset quiz."""
+        return 'language' not in self.filters or normalize_key(self.filters['language']) == normalize_key(DATASET_LANGUAGE)
+
+    def dataset_key(self):
+        """Filter values in the form of sorted_dataset_entries() keys (None = any)."""
+        filters = self.filters
+        return (
+            canonical_slug(filters['category']) if 'category' in filters else None,
+            canonical_slug(filters['topic']) if 'topic' in filters else None,
+            normalize_key(filters['level']) if 'level' in filters else None,
+        )
+
+    def _fetch_dataset(self, after_quiz_id, limit):
+        if not self.includes_dataset():
+            return [], None
+
+        ids, entries, keys = sorted_dataset_entries()
+        wanted = self.dataset_key()
+        checks = [(idx, value) for idx, value in enumerate(wanted) if value is not None]
+        if self.sort == SORT_NEWEST:
+            start = len(ids) - 1 if after_quiz_id is None else bisect.bisect_left(ids, after_quiz_id) - 1
+            positions = range(start, -1, -1)
+        else:
+            start = 0 if after_quiz_id is None else bisect.bisect_right(ids, after_quiz_id)
+            positions = range(start, len(ids))
+
+        # Dataset quizzes that were also saved to the database were
+        # already listed in the database phase
+        in_database = dataset_ids_in_database()
+        page = []
+        for position in positions:
+            key = keys[position]
+            if any(key[idx] != value for idx, value in checks):
+                continue
+            entry = entries[position]
+            if entry['quiz_id'] in in_database:
+                continue
+            page.append(entry)
+            if len(page) > limit:
+                break
+
+        if len(page) <= limit:
+            return [serialize_dataset_quiz(entry, self.fields) for entry in page], None
+
+        page = page[:limit]
+        # An empty page (limit 0) continues from the start of the dataset
+        last_id = page[-1]['quiz_id'] if page else None
+        return [serialize_dataset_quiz(entry, self.fields) for entry in page], encode_cursor(self.sort, PHASE_DATASET, None, last_id)
+
+
+_sorted_lock = threading.Lock()
+_sorted_index = (None, ([], [], []))
+
+
+def sorted_dataset_entries():
+    """
+    Return (quiz_ids, entries, keys) for the dataset, sorted by quiz_id,
+    where keys holds each entry's (category slug, subtopic slug, level) for
+    filtering.
+
+    Built once per catalog snapshot, so paging through the dataset is a
+    bisect on the cursor followed by a scan of at most one page (plus
+    whatever the filters skip).
+    """
+    global _sorted_index
+    snapshot = get_catalog().snapshot()
+    cached_snapshot, index = _sorted_index
+    if cached_snapshot is snapshot:
+        return index
+
+    with _sorted_lock:
+        cached_snapshot, index = _sorted_index
+        if cached_snapshot is not snapshot:
+            entries = sorted(snapshot.summaries(), key=lambda entry: entry['quiz_id'])
+            index = (
+                [entry['quiz_id'] for entry in entries],
+                entries,
+                [(canonical_slug(entry['category']), canonical_slug(entry['subtopic']), normalize_key(entry['level']))
+                 for entry in entries],
+            )
+            _sorted_index = (snapshot, index)
+    return index
+
+
+_in_database_lock = threading.Lock()
+_in_database = (None, None, frozenset())
+
+
+def bump_dataset_overlap_version():
+    """Record that the set of database quizzes with dataset ids changed."""
+    bump_version(DATASET_OVERLAP_VERSION_KEY)
+
+
+def dataset_ids_in_database():
+    """
+    Return the dataset quiz_ids that also exist as database quizzes (e.g.
+    after ingest_dataset); those are listed and counted from the database.
+
+    Read from the indexed Quiz.in_dataset flag, and only again once a
+    flagged quiz is created or deleted (which bumps a shared version) or
+    the catalog snapshot changes - not on every catalog generation.
+    """
+    global _in_database
+    snapshot = get_catalog().snapshot()
+    version = get_version(DATASET_OVERLAP_VERSION_KEY)
+    cached_snapshot, cached_version, quiz_ids = _in_database
+    if cached_snapshot is snapshot and cached_version == version:
+        return quiz_ids
+
+    with _in_database_lock:
+        cached_snapshot, cached_version, quiz_ids = _in_database
+        if cached_snapshot is not snapshot or cached_version != version:
+            quiz_ids = frozenset(Quiz.objects.filter(in_dataset=True).values_list('quiz_id', flat=True))
+            _in_database = (snapshot, version, quiz_ids)
+    return quiz_ids
@@ -0,0 +1,278 @@
+"""
+Per-quiz response payloads, built once and served as cached JSON bytes.
+
+Each builder returns the response dict for one quiz, or None when the
+quiz doesn't exist. The *_bytes() wrappers go through payload_cache, so
+views only encode a quiz again after its content version changes.
+"""
+import hashlib
+import threading
+import logging
+from django.db.models import Prefetch
+from quiz_app.models import Quiz, Question
+from quiz_app.catalog import get_catalog, parse_duration
+from quiz_app.payload_cache import get_payload_bytes
+from quiz_app.streaming import encode_json
+
+logger = logging.getLogger(__name__)
+
+# Most quizzes one batch request may ask for
+MAX_BATCH_QUIZZES = 100
+
+
+def _db_duration(quiz):
+    return quiz.duration_seconds or (quiz.duration_minutes * 60 if quiz.duration_minutes else 600)
+
+
+def build_quiz_questions(quiz_id):
+    """Payload of QuizQuestionsView (DB quizzes only)."""
+    quiz = Quiz.objects.filter(quiz_id=quiz_id).first()
+    if not quiz:
+        return None
+
+    questions_list = [
+        {
+            'id': q.id,
+            'order': q.order,
+            'text': q.text or q.question_text,
+            'options': q.options,
+            'correct_answer': q.correct_answer
+        }
+        for q in Question.objects.filter(quiz=quiz).order_by('order')
+    ]
+    return {
+        'success': True,
+        'quiz_id': quiz.quiz_id,
+        'title': quiz.title,
+        'category': quiz.category or quiz.topic,
+        'level': quiz.level or quiz.difficulty_level,
+        'duration_seconds': _db_duration(quiz),
+        'language': quiz.language or 'English',
+        'questions': questions_list,
+        'total_questions': len(questions_list)
+    }
+
+
+def build_dataset_questions(quiz_id):
+    """Payload of GetQuizQuestionsByIdView (dataset quizzes only)."""
+    entry = get_catalog().get_quiz(quiz_id)
+    if not entry:
+        return None
+
+    questions = [
+        {
+            'question_text': q['text'],
+            'options': dict(q['options']),
+            'correct_answer': q['correct_answer']
+        }
+        for q in entry['questions']
+    ]
+    return {
+        'success': True,
+        'quiz_info': {
+            'quiz_id': entry['quiz_id'],
+            'category': entry['category'],
+            'subtopic': entry['subtopic'],
+            'title': entry['title'],
+            'level': entry['level'],
+            'duration_seconds': entry['duration_raw']
+        },
+        'questions': questions,
+        'total_questions': len(questions)
+    }
+
+
+def _dataset_detail(entry):
+    questions = [
+        {
+            'text': q['text'],
+            'options': dict(q['options']),
+            'correct_answer': q['correct_answer']
+        }
+        for q in entry['questions']
+    ]
+    return {
+        'quiz_id': entry['quiz_id'],
+        'title': entry['title'],
+        'category': entry['category'],
+        'subtopic': entry['subtopic'],
+        'level': entry['level'],
+        'duration_seconds': parse_duration(entry['duration_raw']),
+        'language': 'English', # Default for CSV
+        'source': 'dataset',
+        'questions': questions,
+        'total_questions': len(questions)
+    }
+
+
+def _db_detail(quiz, questions=None):
+    if questions is None:
+        questions = Question.objects.filter(quiz=quiz).order_by('order')
+    questions_list = [
+        {
+            'id': q.id,
+            'text': q.text or q.question_text,
+            'options': q.options,
+            'correct_answer': q.correct_answer
+        }
+        for q in questions
+    ]
+    return {
+        'quiz_id': quiz.quiz_id,
+        'title': quiz.title,
+        'category': quiz.category or quiz.topic,
+        'subtopic': quiz.topic, # topic is often used as subtopic equivalent for DB quizzes
+        'level': quiz.level or quiz.difficulty_level,
+        'num_questions': quiz.num_questions,
+        'duration_seconds': _db_duration(quiz),
+        'created_at': quiz.created_at.isoformat() if quiz.created_at else None,
+        'language': quiz.language or 'English',
+        'source': 'database',
+        'questions': questions_list,
+        'total_questions': len(questions_list)
+    }
+
+
+def build_quiz_detail(quiz_id):
+    """
+    Payload of GetQuizDetailView: the dataset entry if there is one,
+    otherwise the DB quiz.
+    """
+    try:
+        entry = get_catalog().get_quiz(quiz_id)
+        if entry:
+            logger.info(f"Quiz {quiz_id} found in dataset catalog")
+            return {'success': True, 'data': _dataset_detail(entry)}
+    except Exception as e:
+        logger.error(f"Error searching dataset catalog for quiz {quiz_id}: {str(e)}")
+        # Continue to DB search if the catalog fails
+
+    quiz = Quiz.objects.filter(quiz_id=quiz_id).first()
+    if quiz:
+        logger.info(f"Quiz {quiz_id} found in Database.")
+        return {'success': True, 'data': _db_detail(quiz)}
+    return None
+
+
+def build_quiz_batch(quiz_ids):
+    """
+    Detail data (as in GetQuizDetailView) for many quizzes at once.
+
+    Dataset quizzes come from the catalog; the rest are loaded with one
+    query for the quizzes plus one for all of their questions.
+
+    Returns:
+        (quizzes, missing): detail dicts in request order, and the
+        requested quiz_ids that don't exist
+    """
+    catalog = get_catalog()
+    found = {}
+    for quiz_id in quiz_ids:
+        entry = catalog.get_quiz(quiz_id)
+        if entry:
+            found[quiz_id] = _dataset_detail(entry)
+
+    db_ids = [quiz_id for quiz_id in quiz_ids if quiz_id not in found]
+    if db_ids:
+        quizzes = Quiz.objects.filter(quiz_id__in=db_ids).prefetch_related(
+            Prefetch('questions', queryset=Question.objects.order_by('order'))
+        )
+        for quiz in quizzes:
+            found[str(quiz.quiz_id)] = _db_detail(quiz, quiz.questions.all())
+
+    return (
+        [found[quiz_id] for quiz_id in quiz_ids if quiz_id in found],
+        [quiz_id for quiz_id in quiz_ids if quiz_id not in found]
+    )
+
+
+def quiz_questions_bytes(quiz_id):
+    return get_payload_bytes('questions', quiz_id, lambda: build_quiz_questions(quiz_id), source='db')
+
+
+def dataset_questions_bytes(quiz_id):
+    return get_payload_bytes('csv_questions', quiz_id, lambda: build_dataset_questions(quiz_id), source='dataset')
+
+
+def quiz_detail_bytes(quiz_id):
+    return get_payload_bytes('detail', quiz_id, lambda: build_quiz_detail(quiz_id), source='any')
+
+
+def content_hash(data):
+    """Hash of encoded payload bytes, as used in immutable bundle URLs."""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def _detail_hash(data):
+    return content_hash(encode_json({'success': True, 'data': data}))
+
+
+_dataset_hash_lock = threading.Lock()
+_dataset_hashes = (None, {})
+
+
+def _dataset_hashes_for(snapshot):
+    global _dataset_hashes
+    cached_snapshot, hashes = _dataset_hashes
+    if cached_snapshot is not snapshot:
+        with _dataset_hash_lock:
+            cached_snapshot, hashes = _dataset_hashes
+            if cached_snapshot is not snapshot:
+                hashes = {}
+                _dataset_hashes = (snapshot, hashes)
+    return hashes
+
+
+def quiz_content_hashes(quiz_ids):
+    """
+    Return {quiz_id: content hash} of the detail payload (as served by
+    GetQuizDetailView) for the given quizzes that exist.
+
+    Dataset hashes are memoized per catalog snapshot. DB hashes are stored
+    in Quiz.content_hash; blank ones (new or changed quizzes) are computed
+    in one batch and saved.
+    """
+    catalog = get_catalog()
+    dataset_hashes = _dataset_hashes_for(catalog.snapshot())
+    hashes = {}
+    db_ids = []
+    for quiz_id in quiz_ids:
+        quiz_id = str(quiz_id)
+        digest = dataset_hashes.get(quiz_id)
+        if digest is None:
+            entry = catalog.get_quiz(quiz_id)
+            if entry:
+                digest = dataset_hashes[quiz_id] = _detail_hash(_dataset_detail(entry))
+        if digest is None:
+            db_ids.append(quiz_id)
+        else:
+            hashes[quiz_id] = digest
+
+    if db_ids:
+        stale = []
+        for quiz_id, digest in Quiz.objects.filter(quiz_id__in=db_ids).values_list('quiz_id', 'content_hash'):
+            if digest:
+                hashes[quiz_id] = digest
+            else:
+                stale.append(quiz_id)
+
+        if stale:
+            quizzes = list(Quiz.objects.filter(quiz_id__in=stale).prefetch_related(
+                Prefetch('questions', queryset=Question.objects.order_by('order'))
+            ))
+            for quiz in quizzes:
+                quiz.content_hash = hashes[quiz.quiz_id] = _detail_hash(_db_detail(quiz, quiz.questions.all()))
+            Quiz.objects.bulk_update(quizzes, ['content_hash'], batch_size=500)
+
+    return hashes
+
+
+def quiz_bundle_bytes(quiz_id, digest):
+    """
+    Return the detail payload of quiz_id if its content hash is digest,
+    otherwise None (unknown quiz, or its content has changed since).
+    """
+    data = quiz_detail_bytes(quiz_id)
+    if data is None or content_hash(data) != digest:
+        return None
+    return data
@@ -0,0 +1,267 @@
+import bisect
+import random
+import threading
+import time
+import logging
+from itertools import accumulate
+from django.db import connection
+from quiz_app.models import Quiz, Question
+from quiz_app.catalog import get_catalog, canonical_slug, normalize_key
+from quiz_app.cache_utils import get_catalog_generation
+from quiz_app.taxonomy import lookup_taxonomy
+from quiz_app.services.quiz_listing import (
+    serialize_db_quiz, serialize_dataset_quiz, sorted_dataset_entries, dataset_ids_in_database
+)
+
+logger = logging.getLogger(__name__)
+
+# The index is rebuilt (in the background) once it is this old and the
+# catalog has changed since it was built
+POOL_REFRESH_SECONDS = 60
+MAX_POOLS = 64
+MAX_SAMPLE_SIZE = 20
+
+
+class SamplingPool:
+    """
+    Quiz ids (DB quizzes, then dataset-only quizzes) matching one set of
+    filters, with cumulative question counts for question sampling.
+    """
+
+    def __init__(self, db_rows, dataset_rows):
+        self.db_count = len(db_rows)
+        rows = db_rows + dataset_rows
+        self.quiz_ids = [str(quiz_id) for quiz_id, _ in rows]
+        self.question_offsets = list(accumulate(max(num_questions or 0, 0) for _, num_questions in rows))
+
+    def is_db(self, position):
+        return position < self.db_count
+
+    def sample_positions(self, count):
+        return random.sample(range(len(self.quiz_ids)), min(count, len(self.quiz_ids)))
+
+    def sample_questions(self, count):
+        """Return [(position, question_index)] drawn uniformly over all questions."""
+        total = self.question_offsets[-1] if self.question_offsets else 0
+        picks = []
+        for number in random.sample(range(total), min(count, total)):
+            position = bisect.bisect_right(self.question_offsets, number)
+            start = self.question_offsets[position - 1] if position else 0
+            picks.append((position, number - start))
+        return picks
+
+
+EMPTY_POOL = SamplingPool([], [])
+
+
+def _level_key(level, difficulty_level=None):
+    # Same rule as QuizListing: level, else difficulty_level when level is blank
+    return normalize_key(level) or normalize_key(difficulty_level)
+
+
+class SamplingIndex:
+    """
+    Every quiz's (quiz_id, num_questions), grouped by source, category and
+    level, read with one scan of the Quiz table per catalog change.
+
+    Pools for a category/level pair are assembled in memory from the
+    matching groups, so filter values that match no quiz cost nothing and
+    the number of distinct pools is bounded by the known values.
+    """
+
+    def __init__(self):
+        self.generation = get_catalog_generation()
+        self.snapshot = get_catalog().snapshot()
+        self.built_at = time.monotonic()
+        self._pools = {}
+
+        # DB groups are keyed by Category id (as QuizListing filters them),
+        # dataset groups by canonical category slug
+        self.groups = {}
+        rows = Quiz.objects.order_by().values_list(
+            'quiz_id', 'num_questions', 'category_ref_id', 'level', 'difficulty_level'
+        )
+        for quiz_id, num_questions, category_id, level, difficulty_level in rows.iterator(chunk_size=5000):
+            key = ('db', category_id, _level_key(level, difficulty_level))
+            self.groups.setdefault(key, []).append((quiz_id, num_questions))
+
+        # Dataset quizzes also saved to the DB count once, as DB quizzes
+        in_database = dataset_ids_in_database()
+        _, entries, keys = sorted_dataset_entries()
+        for entry, (category_slug, _, level) in zip(entries, keys):
+            if entry['quiz_id'] not in in_database:
+                self.groups.setdefault(('dataset', category_slug, level), []).append(
+                    (entry['quiz_id'], entry['num_questions'])
+                )
+
+    def is_stale(self):
+        if time.monotonic() - self.built_at < POOL_REFRESH_SECONDS:
+            return False
+        return self.generation != get_catalog_generation() or self.snapshot is not get_catalog().snapshot()
+
+    def pool(self, category=None, level=None):
+        """Return the SamplingPool for the filters (EMPTY_POOL if nothing matches)."""
+        category_keys = None
+        if category:
+            category_keys = {('dataset', canonical_slug(category))}
+            category_id = lookup_taxonomy(category)[0]
+            if category_id is not None:
+                category_keys.add(('db', category_id))
+        level_key = _level_key(level) if level else None
+
+        matched = tuple(sorted(
+            (key for key in self.groups
+             if (category_keys is None or key[:2] in category_keys) and (level_key is None or key[2] == level_key)),
+            key=lambda key: (key[0], str(key[1]), key[2])
+        ))
+        if not matched:
+            return EMPTY_POOL
+
+        pool = self._pools.get(matched)
+        if pool is None:
+            pool = SamplingPool(
+                [row for key in matched if key[0] == 'db' for row in self.groups[key]],
+                [row for key in matched if key[0] == 'dataset' for row in self.groups[key]],
+            )
+            with _index_lock:
+                if len(self._pools) >= MAX_POOLS:
+                    self._pools.pop(next(iter(self._pools)))
+                self._pools[matched] = pool
+        return pool
+
+
+_index = None
+_index_lock = threading.Lock()
+_refreshing = False
+
+
+def get_index():
+    """
+    Return the shared SamplingIndex.
+
+    Built on the spot the first time; a stale one keeps being served while
+    a background thread rebuilds it.
+    """
+    global _index, _refreshing
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SamplingIndex()
+            index = _index
+    elif index.is_stale():
+        with _index_lock:
+            start = not _refreshing
+            _refreshing = True
+        if start:
+            threading.Thread(target=_refresh_index, daemon=True).start()
+    return index
+
+
+def _refresh_index():
+    global _index, _refreshing
+    try:
+        _index = SamplingIndex()
+    except Exception as e:
+        logger.error(f"Failed to refresh sampling index: {str(e)}")
+    finally:
+        with _index_lock:
+            _refreshing = False
+        connection.close()
+
+
+def reset_index():
+    """Drop the shared index (it is rebuilt on next use)."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def get_pool(category=None, level=None):
+    """Return the SamplingPool for the filters."""
+    return get_index().pool((category or '').strip(), (level or '').strip())
+
+
+def sample_quizzes(count=1, category=None, level=None):
+    """
+    Return up to count distinct random quizzes (list entry format),
+    uniform over DB and dataset quizzes matching the filters.
+
+    Costs one query for the DB quizzes picked, none for dataset quizzes.
+    """
+    pool = get_pool(category, level)
+    positions = pool.sample_positions(count)
+    db_ids = [pool.quiz_ids[position] for position in positions if pool.is_db(position)]
+    db_quizzes = {quiz.quiz_id: quiz for quiz in Quiz.objects.filter(quiz_id__in=db_ids)} if db_ids else {}
+
+    catalog = get_catalog()
+    quizzes = []
+    for position in positions:
+        quiz_id = pool.quiz_ids[position]
+        if pool.is_db(position):
+            quiz = db_quizzes.get(quiz_id)
+            if quiz is not None:
+                quizzes.append(serialize_db_quiz(quiz))
+        else:
+            entry = catalog.get_quiz(quiz_id)
+            if entry is not None:
+                quizzes.append(serialize_dataset_quiz(entry))
+    return quizzes
+
+
+def sample_questions(count=1, category=None, level=None):
+    """
+    Return up to count random questions, uniform over all questions of the
+    quizzes matching the filters. Each carries its quiz_id and title.
+    """
+    pool = get_pool(category, level)
+    picks = pool.sample_questions(count)
+
+    db_positions = {position for position, _ in picks if pool.is_db(position)}
+    db_questions = {}
+    if db_positions:
+        quiz_ids = [pool.quiz_ids[position] for position in db_positions]
+        for question in Question.objects.filter(quiz__quiz_id__in=quiz_ids).select_related('quiz').order_by('quiz_id', 'order'):
+            db_questions.setdefault(question.quiz.quiz_id, []).append(question)
+
+    catalog = get_catalog()
+    questions = []
+    for position, index in picks:
+        quiz_id = pool.quiz_ids[position]
+        if pool.is_db(position):
+            quiz_questions = db_questions.get(quiz_id)
+            if not quiz_questions:
+                continue
+            # num_questions may disagree with the stored questions
+            question = quiz_questions[index % len(quiz_questions)]
+            questions.append({
+                'quiz_id': quiz_id,
+                'quiz_title': question.quiz.title,
+                'text': question.text or question.question_text,
+                'options': question.options,
+                'correct_answer': question.correct_answer
+            })
+        else:
+            entry = catalog.get_quiz(quiz_id)
+            if not entry or not entry['questions']:
+                continue
+            question = entry['questions'][index % len(entry['questions'])]
+            questions.append({
+                'quiz_id': quiz_id,
+                'quiz_title': entry['title'],
+                'text': question['text'],
+                'options': dict(question['options']),
+                'correct_answer': question['correct_answer']
+            })
+    return questions
+
+
+def random_db_quiz(category=None, level=None):
+    """Return a random Quiz row matching the filters, or None if there is none."""
+    pool = get_pool(category, level)
+    # The pool may still list a quiz deleted since it was built
+    for _ in range(min(pool.db_count, 3)):
+        quiz = Quiz.objects.filter(quiz_id=pool.quiz_ids[random.randrange(pool.db_count)]).first()
+        if quiz is not None:
+            return quiz
+    return None
@@ -1,13 +1,22 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.utils import timezone
 from quiz_app.models import (
     QuizSession,
     QuizQuestion,
     UserScoreHistory,
     CategoryStatistics,
+    Quiz,
+    Question,
 )
+from quiz_app.cache_utils import bump_catalog_generation_on_commit
+from quiz_app.payload_cache import bump_quiz_version_on_commit
+from quiz_app.search_index import get_search_index
+from quiz_app.taxonomy import assign_taxonomy
+from quiz_app.catalog import get_catalog
+from quiz_app.services.quiz_listing import bump_dataset_overlap_version
 
 
 @receiver(post_save, sender=User)
@@ -150,3 +159,62 @@ def update_stats_on_session_delete(sender, instance, **kwargs):
     # Update category statistics if applicable
     if instance.category:
         update_category_statistics(instance.category, instance.subcategory)
+
+
+@receiver(pre_save, sender=Quiz)
+def link_quiz_taxonomy(sender, instance, raw=False, **kwargs):
+    # Keep category_ref/subcategory_ref in step with the category/topic names
+    if not raw:
+        assign_taxonomy(instance)
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def invalidate_catalog_on_quiz_change(sender, instance, **kwargs):
+    # Catalog list/category caches are keyed by generation; bumping it
+    # makes the change visible without waiting for TTL expiry.
+    bump_catalog_generation_on_commit()
+
+
+@receiver(pre_save, sender=Quiz)
+def flag_dataset_quiz(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.in_dataset = get_catalog().has_quiz(instance.quiz_id)
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def track_dataset_overlap(sender, instance, created=None, **kwargs):
+    # Lists and facets skip dataset quizzes that are also in the database;
+    # the set changes when one is created or deleted (no created argument)
+    if instance.in_dataset and created is not False:
+        transaction.on_commit(bump_dataset_overlap_version)
+
+
+@receiver(post_delete, sender=Quiz)
+def remove_quiz_from_search_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: get_search_index().remove_quiz(instance.quiz_id))
+
+
+@receiver(pre_save, sender=Quiz)
+def reset_quiz_content_hash(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Recomputed on demand (services.quiz_payloads.quiz_content_hashes)
+    if not raw and update_fields is None:
+        instance.content_hash = ''
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def invalidate_quiz_payloads(sender, instance, update_fields=None, **kwargs):
+    # Cached per-quiz payloads are keyed by content version
+    bump_quiz_version_on_commit(quiz_id=instance.quiz_id)
+    if update_fields is not None and 'content_hash' not in update_fields and instance.content_hash:
+        instance.content_hash = ''
+        Quiz.objects.filter(pk=instance.pk).update(content_hash='')
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_quiz_payloads_on_question_change(sender, instance, **kwargs):
+    # Also resets the quiz's content hash, which changed with it
+    bump_quiz_version_on_commit(quiz_pk=instance.quiz_id)
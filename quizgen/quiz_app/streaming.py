@@ -0,0 +1,108 @@
+import itertools
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Placeholders for streaming_json_response() templates
+STREAMED_ITEMS = '\x00streamed-items\x00'
+STREAMED_COUNT = '\x00streamed-count\x00'
+
+# Approximate size (characters) of each chunk written to the client
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Written after the partial body when producing items fails mid-stream, so
+# the truncation is explicit rather than looking like a dropped connection
+STREAM_ERROR_MARKER = '\n{"error":"stream interrupted"}\n'
+
+_EXHAUSTED = object()
+
+
+def wants_stream(request):
+    """True when the client asked for a streamed response (?stream=true)."""
+    return request.query_params.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def _dumps(value):
+    # Same output as DRF's JSONRenderer defaults (compact, UTF-8)
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_json(value):
+    """Encode value to JSON bytes exactly as DRF's JSONRenderer would."""
+    return _dumps(value).encode('utf-8')
+
+
+def iter_json(template, items, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield the JSON encoding of template, with the STREAMED_ITEMS placeholder
+    replaced by an array built from items and STREAMED_COUNT (if present,
+    after STREAMED_ITEMS) replaced by the number of items.
+
+    Output is buffered into chunks of about chunk_size characters.
+    """
+    encoded = _dumps(template)
+    head, rest = encoded.split(_dumps(STREAMED_ITEMS), 1)
+    middle, count_marker, tail = rest.partition(_dumps(STREAMED_COUNT))
+
+    buffer = [head, '[']
+    buffered = len(head) + 1
+    count = 0
+    try:
+        for item in items:
+            encoded_item = (',' if count else '') + _dumps(item)
+            buffer.append(encoded_item)
+            buffered += len(encoded_item)
+            count += 1
+            if buffered >= chunk_size:
+                yield ''.join(buffer)
+                buffer, buffered = [], 0
+    except Exception as e:
+        # Headers are already sent; end the body with the error marker so
+        # the client sees invalid JSON
+        logger.error(f"Error while streaming response after {count} items: {str(e)}")
+        buffer.append(STREAM_ERROR_MARKER)
+        yield ''.join(buffer)
+        return
+
+    buffer.append(']' + middle + (str(count) + tail if count_marker else ''))
+    yield ''.join(buffer)
+
+
+async def _aiter_chunks(chunks):
+    # Produce each chunk in the request's sync thread (the one holding the
+    # DB connection and any open cursor) and hand it to the ASGI server
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def streaming_json_response(request, template, items, status=200):
+    """
+    Return a StreamingHttpResponse that writes template as JSON, encoding
+    items as they are produced so the full list is never held in memory.
+
+    The first item is produced before the response is returned, so errors
+    running the underlying query surface as a normal error response. Under
+    ASGI the body is an async iterator; Django would otherwise collect a
+    sync iterator into a list before sending anything.
+
+    Example:
+        streaming_json_response(request, {'quizzes': STREAMED_ITEMS, 'count': STREAMED_COUNT}, rows)
+    """
+    items = iter(items)
+    first = next(items, _EXHAUSTED)
+    if first is not _EXHAUSTED:
+        items = itertools.chain([first], items)
+
+    chunks = (chunk.encode('utf-8') for chunk in iter_json(template, items))
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = _aiter_chunks(chunks)
+    return StreamingHttpResponse(chunks, content_type='application/json', status=status)
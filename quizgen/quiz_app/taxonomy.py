@@ -0,0 +1,75 @@
+import logging
+from django.db import IntegrityError, transaction
+from .models import Category, SubCategory
+from .catalog import canonical_slug
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY_TYPE = 'general_knowledge'
+
+
+def _get_or_create(model, lookup, defaults, unique_fields=()):
+    try:
+        with transaction.atomic():
+            return model.objects.get_or_create(**lookup, defaults=defaults)[0]
+    except IntegrityError:
+        # Created concurrently by another worker, or another row already
+        # holds one of unique_fields (e.g. a Category of the same name
+        # filed under a different slug)
+        row = model.objects.filter(**lookup).first()
+        for field in unique_fields:
+            if row is None:
+                row = model.objects.filter(**{field: defaults[field]}).first()
+        if row is None:
+            raise
+        return row
+
+
+def ensure_taxonomy(category, subtopic):
+    """
+    Return (category_id, subcategory_id) for a category/subtopic name pair,
+    creating the Category and SubCategory rows on first use.
+    """
+    category_slug, subcategory_slug = canonical_slug(category), canonical_slug(subtopic)
+
+    category_obj = _get_or_create(
+        Category,
+        {'slug': category_slug},
+        {'name': (category or '').strip()[:255] or category_slug, 'category_type': DEFAULT_CATEGORY_TYPE},
+        unique_fields=('name',)
+    )
+    subcategory_obj = _get_or_create(
+        SubCategory,
+        {'parent_category': category_obj, 'slug': subcategory_slug},
+        {'name': (subtopic or '').strip()[:255] or subcategory_slug}
+    )
+    return category_obj.id, subcategory_obj.id
+
+
+def lookup_taxonomy(category, subtopic=None):
+    """
+    Return (category_id, subcategory_id) for existing taxonomy rows without
+    creating anything. Either id is None when no such row exists.
+    """
+    category_id = Category.objects.filter(slug=canonical_slug(category)).values_list('id', flat=True).first()
+    if category_id is None and (category or '').strip():
+        # Rows named like the category but created with another slug
+        category_id = Category.objects.filter(name__iexact=category.strip()).values_list('id', flat=True).first()
+    if category_id is None or subtopic is None:
+        return category_id, None
+
+    subcategory_id = SubCategory.objects.filter(
+        parent_category_id=category_id, slug=canonical_slug(subtopic)
+    ).values_list('id', flat=True).first()
+    return category_id, subcategory_id
+
+
+def taxonomy_names(quiz):
+    """Return the (category, subtopic) names a quiz is filed under."""
+    category = quiz.category or quiz.topic
+    return category, quiz.topic or category
+
+
+def assign_taxonomy(quiz):
+    """Point quiz.category_ref/subcategory_ref at the rows for its category and topic."""
+    quiz.category_ref_id, quiz.subcategory_ref_id = ensure_taxonomy(*taxonomy_names(quiz))
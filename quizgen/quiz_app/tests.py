@@ -1,3 +1,1278 @@
-from django.test import TestCase
+from django.test import TestCase, AsyncClient
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.db import transaction
+from django.core.management import call_command
+from quiz_app.catalog import DatasetCatalog
+from quiz_app import catalog as catalog_module
+from quiz_app.compiled_dataset import write_compiled_dataset, load_compiled_dataset
+from quiz_app.models import (
+    Quiz, Question, Category, QuizHistory, GameSession, PlayerSession, GenerationCacheEntry, GenerationCacheStat, QuizGenerationJob,
+    LiveQuizPoolEntry, Activity, ActivityQuestion
+)
+from quiz_app.streaming import iter_json, STREAMED_ITEMS, STREAMED_COUNT, STREAM_ERROR_MARKER
+from quiz_app.services.dataset_ingest import DatasetIngestor
+from quiz_app.services.quiz_listing import QuizListing
+from quiz_app.search_index import SearchIndex, index_quiz_on_commit
+from quiz_app import search_index as search_index_module
+from quiz_app.services.dataset_writer import DatasetWriter
+from quiz_app.services import dataset_writer as dataset_writer_module
+from quiz_app.utils import append_quiz_to_csv
+from quiz_app.payload_cache import LRUBytesCache
+from quiz_app import payload_cache as payload_cache_module
+from quiz_app.services import quiz_sampling
+from quiz_app.services import question_bank
+from quiz_app.services import generation_jobs
+from quiz_app.services import live_quiz_pool
+from quiz_app.services.activity_generator import ActivityGenerator, ACTIVITY_TYPES, DAYS_AHEAD
+from quiz_app.gemini_client import GeminiClient, CircuitBreaker, GeminiError, GeminiUnavailable
+from quiz_app.generation_cache import GenerationCache, generation_key
+from quiz_app import generation_cache as generation_cache_module
+from quiz_app import gemini_utils
+from quiz_app.id_allocator import QuizIdAllocator, encode_quiz_id
+from quiz_app.cache_utils import catalog_cache_key, get_catalog_generation, get_or_build
+from unittest import mock
+from datetime import timedelta
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+
+DATASET_HEADER = 'QuizID,Category,Subtopic,Title,Level,DurationSeconds,QuestionText,OptionA,OptionB,OptionC,OptionD,CorrectAnswer\n'
+
+
+def write_dataset(directory, filename, rows):
+    with open(os.path.join(directory, filename), 'w', encoding='utf-8') as file:
+        file.write(DATASET_HEADER)
+        for row in rows:
+            file.write(row + '\n')
+
+
+class DatasetCatalogTest(TestCase):
+
+    def setUp(self):
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '100001,Science, Physics ,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+            '100001,Science, Physics ,Physics Basics,Easy,300,Unit of energy?,Newton,Joule,Watt,Pascal,Joule',
+            '100002,Science,Chemistry,Chemistry Basics,Medium,,Symbol for water?,H2O,CO2,O2,NaCl,H2O',
+        ])
+        self.catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+
+    def test_lookup_by_quiz_id(self):
+        quiz = self.catalog.get_quiz('100001')
+        self.assertEqual(quiz['title'], 'Physics Basics')
+        self.assertEqual(len(quiz['questions']), 2)
+        self.assertEqual(quiz['questions'][1]['correct_answer'], 'Joule')
+        self.assertIsNone(self.catalog.get_quiz('999999'))
+
+    def test_lookup_by_normalized_topic(self):
+        quiz_ids = self.catalog.quiz_ids_for_topic('science', 'PHYSICS')
+        self.assertEqual(quiz_ids, ['100001'])
+        self.assertEqual(self.catalog.quizzes_for_topic('Science', 'Biology'), [])
+
+    def test_ignores_files_without_dataset_schema(self):
+        with open(os.path.join(self.dataset_dir, 'quiz.csv'), 'w', encoding='utf-8') as file:
+            file.write('quiz_id,category,title\n55555,Science,Other\n')
+        self.assertIsNone(self.catalog.get_quiz('55555'))
+        self.assertEqual(len(self.catalog.all_quizzes()), 2)
+
+    def test_reloads_when_file_changes(self):
+        self.assertIsNone(self.catalog.get_quiz('100003'))
+        with open(os.path.join(self.dataset_dir, 'categoryQuizzes.csv'), 'a', encoding='utf-8') as file:
+            file.write('100003,History,Ancient,Ancient India,Hard,600,First Mauryan emperor?,Ashoka,Chandragupta,Bindusara,Harsha,Chandragupta\n')
+        self.assertEqual(self.catalog.get_quiz('100003')['title'], 'Ancient India')
+
+
+class CompiledDatasetTest(TestCase):
+
+    def setUp(self):
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '200001,Sports,Cricket,Cricket Trivia,Easy,300,Players per side?,11,9,7,15,11',
+            '200002,Sports,Cricket,Cricket Legends,Hard,600,"Who scored 100 centuries, in total?",Sachin,Virat,Dhoni,Kapil,Sachin',
+            '200003,Arts,Music,Ragas,Medium,450,Number of swaras?,7,5,12,8,7',
+        ])
+        self.output = os.path.join(self.dataset_dir, 'catalog.bin')
+        self.csv_snapshot = DatasetCatalog(dataset_dir=self.dataset_dir).parse_csv()
+        write_compiled_dataset(self.csv_snapshot, self.output)
+
+    def test_compiled_lookups_match_csv(self):
+        compiled = load_compiled_dataset(self.output, self.csv_snapshot.signature)
+        self.assertIsNotNone(compiled)
+        for quiz_id in self.csv_snapshot.order:
+            self.assertEqual(compiled.get(quiz_id), self.csv_snapshot.get(quiz_id))
+        self.assertEqual(compiled.topic_quiz_ids(('sports', 'cricket')), ['200001', '200002'])
+        self.assertIsNone(compiled.get('999999'))
+
+    def test_catalog_prefers_fresh_compiled_file(self):
+        catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.assertEqual(type(catalog.snapshot()).__name__, 'CompiledSnapshot')
+        self.assertEqual(catalog.get_quiz('200003')['title'], 'Ragas')
+
+    def test_stale_compiled_file_is_ignored(self):
+        with open(os.path.join(self.dataset_dir, 'categoryQuizzes.csv'), 'a', encoding='utf-8') as file:
+            file.write('200004,Arts,Dance,Kathak,Easy,300,Kathak origin state?,Uttar Pradesh,Kerala,Punjab,Assam,Uttar Pradesh\n')
+        catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.assertEqual(type(catalog.snapshot()).__name__, 'CatalogSnapshot')
+        self.assertEqual(catalog.get_quiz('200004')['title'], 'Kathak')
+
+    def test_writer_appends_keep_compiled_file_fresh(self):
+        catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        writer = DatasetWriter(dataset_dir=self.dataset_dir, max_shard_bytes=200)
+        for quiz_id in ('200005', '200006'):
+            writer.write_batch([{
+                'quiz_id': quiz_id, 'category': 'Arts', 'title': 'Generated', 'level': 'easy',
+                'num_questions': 1, 'duration_seconds': 300, 'question_order': 1,
+                'question_text': 'Generated question?', 'options_json': '["a", "b", "c", "d"]',
+                'correct_answer': 'a', 'created_at': '2025-01-01T00:00:00+00:00',
+            }])
+        self.assertTrue(os.path.exists(os.path.join(self.dataset_dir, 'quiz-00001.csv')))
+        self.assertEqual(type(catalog.snapshot()).__name__, 'CompiledSnapshot')
+        self.assertEqual(catalog.get_quiz('200003')['title'], 'Ragas')
+
+
+class DatasetIngestorTest(TestCase):
+
+    def setUp(self):
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '300001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+            '300001,Science,Physics,Physics Basics,Easy,300,Unit of energy?,Newton,Joule,Watt,Pascal,Joule',
+            '300002,Science,Chemistry,Chemistry Basics,Medium,450,Symbol for water?,H2O,CO2,O2,NaCl,H2O',
+            '300003,History,Ancient,Ancient India,Hard,600,First Mauryan emperor?,Ashoka,Chandragupta,Bindusara,Harsha,Chandragupta',
+        ])
+
+    def test_ingest_is_idempotent(self):
+        Quiz.objects.create(quiz_id='300001', title='Stale', topic='Physics', num_questions=1)
+
+        DatasetIngestor(dataset_dir=self.dataset_dir, batch_size=2).run()
+        DatasetIngestor(dataset_dir=self.dataset_dir, batch_size=2).run(reset=True)
+
+        self.assertEqual(Quiz.objects.count(), 3)
+        quiz = Quiz.objects.get(quiz_id='300001')
+        self.assertEqual(quiz.title, 'Physics Basics')
+        self.assertTrue(quiz.in_dataset)
+        self.assertEqual(quiz.num_questions, 2)
+        questions = list(Question.objects.filter(quiz=quiz).order_by('order'))
+        self.assertEqual([q.correct_answer for q in questions], ['Newton', 'Joule'])
+        self.assertEqual(questions[0].options, ['Newton', 'Joule', 'Watt', 'Pascal'])
+
+    def test_resumes_from_checkpoint(self):
+        ingestor = DatasetIngestor(dataset_dir=self.dataset_dir, batch_size=1)
+        original_write = ingestor._write_batch
+        calls = []
+
+        def failing_write(batch):
+            if len(calls) == 2:
+                raise RuntimeError('interrupted')
+            calls.append(batch)
+            original_write(batch)
+
+        ingestor._write_batch = failing_write
+        with self.assertRaises(RuntimeError):
+            ingestor.run()
+        self.assertEqual(Quiz.objects.count(), 2)
+
+        totals = DatasetIngestor(dataset_dir=self.dataset_dir, batch_size=1).run()
+        self.assertEqual(totals['quizzes'], 1)
+        self.assertEqual(Question.objects.count(), 4)
+
+
+class CatalogCacheInvalidationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_quiz_save_bumps_generation(self):
+        key = catalog_cache_key('explore_quiz_list')
+        generation = get_catalog_generation()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Quiz.objects.create(quiz_id='40001', title='New Quiz', topic='Science', num_questions=5)
+
+        self.assertGreater(get_catalog_generation(), generation)
+        self.assertNotEqual(catalog_cache_key('explore_quiz_list'), key)
+
+    def test_keys_hash_request_values(self):
+        key = catalog_cache_key('cat_quizzes', 'x' * 1000, 'Physics')
+        self.assertTrue(key.startswith(f'cat_quizzes_v{get_catalog_generation()}_'))
+        self.assertLess(len(key), 100)
+        self.assertNotEqual(key, catalog_cache_key('cat_quizzes', 'x' * 1000, 'Chemistry'))
+        self.assertEqual(key, catalog_cache_key('cat_quizzes', 'x' * 1000, 'Physics'))
+
+    def test_quiz_list_reflects_new_quiz(self):
+        response = self.client.get('/api/quiz/list/?legacy=true')
+        self.assertEqual(response.status_code, 200)
+        before = response.json()['count']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Quiz.objects.create(quiz_id='40002', title='Fresh Quiz', topic='Science', num_questions=5)
+
+        response = self.client.get('/api/quiz/list/?legacy=true')
+        self.assertEqual(response.json()['count'], before + 1)
+
+
+class GetOrBuildTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = []
+
+    def builder(self):
+        self.calls.append(1)
+        return len(self.calls)
+
+    def test_builds_once_while_fresh(self):
+        self.assertEqual(get_or_build('expensive', self.builder, timeout=60), 1)
+        self.assertEqual(get_or_build('expensive', self.builder, timeout=60), 1)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_serves_stale_while_another_worker_rebuilds(self):
+        get_or_build('expensive', self.builder, timeout=60)
+        entry = cache.get('expensive')
+        entry['expires_at'] = 0
+        cache.set('expensive', entry)
+        cache.add('expensive_rebuild_lock', 1)
+
+        self.assertEqual(get_or_build('expensive', self.builder, timeout=60), 1)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_rebuilds_expired_value_when_lock_is_free(self):
+        get_or_build('expensive', self.builder, timeout=60)
+        entry = cache.get('expensive')
+        entry['expires_at'] = 0
+        cache.set('expensive', entry)
+
+        self.assertEqual(get_or_build('expensive', self.builder, timeout=60), 2)
+        self.assertIsNone(cache.get('expensive_rebuild_lock'))
+
+
+class QuizListPaginationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '500001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+            '500002,Science,Chemistry,Chemistry Basics,Medium,450,Symbol for water?,H2O,CO2,O2,NaCl,H2O',
+            '500003,History,Ancient,Ancient India,Hard,600,First Mauryan emperor?,Ashoka,Chandragupta,Bindusara,Harsha,Chandragupta',
+            '50001,Science,Physics,Duplicate Of DB Quiz,Easy,300,Unit of power?,Newton,Joule,Watt,Pascal,Watt',
+        ])
+        original = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original)
+
+        for idx in range(1, 4):
+            Quiz.objects.create(quiz_id=f'5000{idx}', title=f'DB Quiz {idx}', category='Science',
+                                topic='Physics', level='easy', num_questions=5)
+
+    def collect(self, query, page_size=2):
+        quiz_ids, cursor = [], None
+        while True:
+            url = f'/api/quiz/list/?page_size={page_size}&{query}' + (f'&cursor={cursor}' if cursor else '')
+            data = self.client.get(url).json()
+            self.assertLessEqual(data['count'], page_size)
+            quiz_ids += [quiz['quiz_id'] for quiz in data['quizzes']]
+            cursor = data['next_cursor']
+            if not data['has_more']:
+                return quiz_ids
+
+    def test_pages_cover_db_then_dataset_without_duplicates(self):
+        self.assertEqual(
+            self.collect(''),
+            ['50003', '50002', '50001', '500003', '500002', '500001'],
+        )
+        self.assertEqual(
+            self.collect('sort=oldest'),
+            ['50001', '50002', '50003', '500001', '500002', '500003'],
+        )
+        # Database quizzes end exactly on a page boundary
+        self.assertEqual(
+            self.collect('', page_size=3),
+            ['50003', '50002', '50001', '500003', '500002', '500001'],
+        )
+
+    def test_filters_apply_to_db_and_dataset(self):
+        self.assertEqual(self.collect('category=science&level=EASY'), ['50003', '50002', '50001', '500001'])
+        self.assertEqual(self.collect('topic=ancient'), ['500003'])
+        self.assertEqual(self.collect('language=hindi'), [])
+
+    def test_dataset_quizzes_in_database_are_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for quiz_id in ('500001', '500002'):
+                Quiz.objects.create(quiz_id=quiz_id, title='Ingested', category='Science',
+                                    topic='Physics', level='easy', num_questions=1)
+
+        self.assertEqual(
+            self.collect('sort=oldest'),
+            ['50001', '50002', '50003', '500001', '500002', '500003'],
+        )
+        # The ids already in the database are looked up once, not per page
+        with self.assertNumQueries(1):
+            quizzes, _ = QuizListing({'sort': 'oldest'})._fetch_dataset(None, 10)
+        self.assertEqual([quiz['quiz_id'] for quiz in quizzes], ['500003'])
+
+        # ...and not again after writes that don't touch dataset ids
+        with self.captureOnCommitCallbacks(execute=True):
+            Quiz.objects.create(quiz_id='50004', title='Unrelated', topic='Physics', num_questions=1)
+        with self.assertNumQueries(1):
+            QuizListing({'sort': 'oldest'})._fetch_dataset(None, 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            Quiz.objects.filter(quiz_id='500002').delete()
+        quizzes, _ = QuizListing({'sort': 'oldest'})._fetch_dataset(None, 10)
+        self.assertEqual([quiz['quiz_id'] for quiz in quizzes], ['500002', '500003'])
+
+    def test_rejects_bad_params(self):
+        self.assertEqual(self.client.get('/api/quiz/list/?cursor=garbage').status_code, 400)
+        self.assertEqual(self.client.get('/api/quiz/list/?sort=title').status_code, 400)
+        cursor = self.client.get('/api/quiz/list/?page_size=1').json()['next_cursor']
+        self.assertEqual(self.client.get(f'/api/quiz/list/?sort=oldest&cursor={cursor}').status_code, 400)
+
+
+class QuizFacetsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '600001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+            '600001,Science,Physics,Physics Basics,Easy,300,Unit of energy?,Newton,Joule,Watt,Pascal,Joule',
+            '600002,Science,Chemistry,Chemistry Basics,Medium,450,Symbol for water?,H2O,CO2,O2,NaCl,H2O',
+            '600003,History,Ancient,Ancient India,Hard,600,First Mauryan emperor?,Ashoka,Chandragupta,Bindusara,Harsha,Chandragupta',
+        ])
+        original = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original)
+
+    def test_merges_db_and_dataset_counts(self):
+        Quiz.objects.create(quiz_id='60001', title='DB Physics', category='science', topic='physics',
+                            level='hard', language='Hindi', num_questions=5)
+        # Also in the dataset: counted once, with its DB values
+        Quiz.objects.create(quiz_id='600002', title='Chemistry Basics', category='Science', topic='Chemistry',
+                            level='medium', num_questions=1)
+
+        data = self.client.get('/api/quiz/facets/').json()
+
+        self.assertEqual(data['total'], 4)
+        self.assertEqual(data['categories'], [{'name': 'Science', 'count': 3}, {'name': 'History', 'count': 1}])
+        self.assertIn({'category': 'Science', 'name': 'Physics', 'count': 2}, data['subtopics'])
+        self.assertIn({'category': 'Science', 'name': 'Chemistry', 'count': 1}, data['subtopics'])
+        self.assertEqual({item['name'].lower(): item['count'] for item in data['levels']},
+                         {'easy': 1, 'medium': 1, 'hard': 2})
+        self.assertEqual(data['languages'], [{'name': 'English', 'count': 3}, {'name': 'Hindi', 'count': 1}])
+
+
+class SearchIndexTest(TestCase):
+
+    def setUp(self):
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '700001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+            '700002,Science,Chemistry,Chemistry Basics,Medium,450,Who proposed the physics of atoms?,Dalton,Newton,Bohr,Curie,Dalton',
+            '700003,History,Ancient,Ancient India,Hard,600,First Mauryan emperor?,Ashoka,Chandragupta,Bindusara,Harsha,Chandragupta',
+        ])
+        original_catalog = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original_catalog)
+
+        original_index = search_index_module._index
+        self.index = search_index_module._index = SearchIndex(check_interval=60)
+        self.addCleanup(setattr, search_index_module, '_index', original_index)
+
+    def search_ids(self, query, **kwargs):
+        return [summary['quiz_id'] for _, summary in self.index.search(query, **kwargs)[1]]
+
+    def test_ranks_title_matches_first(self):
+        self.assertEqual(self.search_ids('physics'), ['700001', '700002'])
+        self.assertEqual(self.search_ids('physics', offset=1, limit=1), ['700002'])
+        self.assertEqual(self.search_ids('mauryan emperor'), ['700003'])
+        self.assertEqual(self.search_ids('physics mauryan'), [])
+
+    def test_last_term_matches_as_prefix(self):
+        self.assertEqual(self.search_ids('anc'), ['700003'])
+        self.assertEqual(self.search_ids('chem*'), ['700002'])
+        self.assertEqual(self.search_ids('chem basics'), [])
+
+    def test_new_quizzes_are_indexed_incrementally(self):
+        self.search_ids('physics')
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz = Quiz.objects.create(quiz_id='70001', title='Quantum Physics', category='Science',
+                                       topic='Physics', num_questions=1)
+            index_quiz_on_commit(quiz, ['What is a photon?'])
+        self.assertEqual(self.search_ids('photon'), ['70001'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz.delete()
+        self.assertEqual(self.search_ids('photon'), [])
+
+    def test_deletes_from_other_processes_are_dropped(self):
+        Quiz.objects.create(quiz_id='70002', title='Photon Physics', category='Science', topic='Physics', num_questions=1)
+        Quiz.objects.create(quiz_id='700001', title='Forces Revisited', category='Science', topic='Physics', num_questions=1)
+        self.assertEqual(self.search_ids('photon'), ['70002'])
+        self.assertEqual(self.search_ids('revisited'), ['700001'])
+
+        # Deleted elsewhere: this index only sees the generation move
+        with mock.patch('quiz_app.signals.get_search_index'):
+            with self.captureOnCommitCallbacks(execute=True):
+                Quiz.objects.filter(quiz_id__in=['70002', '700001']).delete()
+        self.index._next_check = 0.0
+        self.assertEqual(self.search_ids('photon'), [])
+        self.assertEqual(self.search_ids('revisited'), [])
+        self.assertEqual(self.search_ids('force'), ['700001'])
+
+    def test_search_endpoint_paginates(self):
+        response = self.client.get('/api/quiz/search/?q=physics&page_size=1')
+        data = response.json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual([quiz['quiz_id'] for quiz in data['results']], ['700001'])
+        self.assertTrue(data['has_more'])
+        self.assertEqual(self.client.get('/api/quiz/search/').status_code, 400)
+
+
+class TaxonomyTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_quizzes_share_canonical_taxonomy_rows(self):
+        first = Quiz.objects.create(quiz_id='80001', title='One', category='Science ', topic='Physics', num_questions=1)
+        second = Quiz.objects.create(quiz_id='80002', title='Two', category='SCIENCE', topic='physics', num_questions=1)
+
+        self.assertEqual(first.category_ref.slug, 'science')
+        self.assertEqual(first.subcategory_ref.slug, 'physics')
+        self.assertEqual((first.category_ref_id, first.subcategory_ref_id),
+                         (second.category_ref_id, second.subcategory_ref_id))
+
+        second.topic = 'Chemistry'
+        second.save()
+        self.assertEqual(second.subcategory_ref.slug, 'chemistry')
+        self.assertEqual(second.subcategory_ref.parent_category_id, first.category_ref_id)
+
+    def test_category_views_filter_by_taxonomy(self):
+        Quiz.objects.create(quiz_id='80003', title='Ragas', category='Arts & Music', topic='Classical Music', num_questions=1)
+
+        response = self.client.get('/api/quiz/by-category/', {'category': 'arts & music', 'subtopic': 'classical  music'})
+        self.assertEqual([quiz['quiz_id'] for quiz in response.json()['quizzes']], ['80003'])
+        response = self.client.get('/api/quiz/count-by-category/', {'category': 'Arts & Music', 'subtopic': 'Pop'})
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_unicode_names_and_existing_names_with_other_slugs(self):
+        history = Quiz.objects.create(quiz_id='80004', title='Itihas', category='इतिहास', topic='प्राचीन भारत', num_questions=1)
+        science = Quiz.objects.create(quiz_id='80006', title='Vigyan', category='विज्ञान', topic='भौतिकी', num_questions=1)
+        self.assertNotEqual(history.category_ref.slug, 'general')
+        self.assertNotEqual(history.category_ref_id, science.category_ref_id)
+        self.assertEqual(history.category_ref.name, 'इतिहास')
+
+        existing = Category.objects.create(name='Geography', slug='world-geography', category_type='academic')
+        quiz = Quiz.objects.create(quiz_id='80005', title='Rivers', category='Geography', topic='Rivers', num_questions=1)
+        self.assertEqual(quiz.category_ref_id, existing.id)
+        response = self.client.get('/api/quiz/count-by-category/', {'category': 'Geography', 'subtopic': 'Rivers'})
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_ingested_quizzes_are_linked(self):
+        dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dataset_dir)
+        write_dataset(dataset_dir, 'categoryQuizzes.csv', [
+            '800001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+        ])
+        DatasetIngestor(dataset_dir=dataset_dir).run()
+
+        quiz = Quiz.objects.get(quiz_id='800001')
+        self.assertEqual((quiz.category_ref.name, quiz.subcategory_ref.name), ('Science', 'Physics'))
+
+
+class DatasetWriterTest(TestCase):
+
+    def setUp(self):
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        self.writer = DatasetWriter(dataset_dir=self.dataset_dir, max_shard_bytes=400, flush_interval=0.01)
+
+    def rows(self, quiz_id, count):
+        return [{
+            'quiz_id': quiz_id, 'category': 'Science', 'title': 'Physics', 'level': 'easy',
+            'num_questions': count, 'duration_seconds': 300, 'question_order': order,
+            'question_text': f'Question {order}?', 'options_json': '["a", "b", "c", "d"]',
+            'correct_answer': 'a', 'created_at': '2025-01-01T00:00:00+00:00',
+        } for order in range(1, count + 1)]
+
+    def read_rows(self, filename):
+        with open(os.path.join(self.dataset_dir, filename), encoding='utf-8') as file:
+            return list(csv.DictReader(file))
+
+    def test_batches_are_written_in_order(self):
+        for quiz_id in ('90001', '90002', '90003'):
+            self.writer.submit(self.rows(quiz_id, 2))
+        self.writer.flush()
+
+        rows = self.read_rows('quiz.csv')
+        self.assertEqual([row['quiz_id'] for row in rows], ['90001', '90001', '90002', '90002', '90003', '90003'])
+
+    def test_flush_leaves_catalog_caches_alone(self):
+        generation = get_catalog_generation()
+        self.writer.submit(self.rows('90007', 2))
+        self.writer.flush()
+        self.assertEqual(get_catalog_generation(), generation)
+
+    def test_rotates_full_shard(self):
+        self.writer.write_batch(self.rows('90004', 3))
+        self.writer.write_batch(self.rows('90005', 1))
+
+        self.assertEqual([row['quiz_id'] for row in self.read_rows('quiz-00001.csv')], ['90004'] * 3)
+        self.assertEqual([row['quiz_id'] for row in self.read_rows('quiz.csv')], ['90005'])
+
+    def test_append_quiz_to_csv_waits_for_commit(self):
+        quiz = Quiz.objects.create(quiz_id='90006', title='Queued', topic='Science', num_questions=1)
+        question = Question.objects.create(quiz=quiz, order=1, text='Q?', options=['a', 'b', 'c', 'd'], correct_answer='a')
+        submitted = []
+        with mock.patch.object(dataset_writer_module._writer, 'submit', side_effect=submitted.append):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                self.assertTrue(append_quiz_to_csv(quiz, [question]))
+            self.assertEqual(submitted, [])
+            for callback in callbacks:
+                callback()
+        self.assertEqual([row['question_text'] for row in submitted[0]], ['Q?'])
+
+
+class StreamingResponseTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='streamer', password='pass12345')
+        quiz = Quiz.objects.create(quiz_id='91001', title='Streamed', category='Science', topic='Physics', num_questions=4)
+        for score in (1, 3):
+            QuizHistory.objects.create(user=self.user, quiz=quiz, score=score, total_questions=4,
+                                       completed_at=timezone.now())
+        for code in ('AAA111', 'BBB222'):
+            game = GameSession.objects.create(host=self.user, quiz_source=quiz, status='finished', join_code=code,
+                                              completed_at=timezone.now())
+            PlayerSession.objects.create(game_session=game, user=self.user, score=10)
+
+    def assertStreamMatches(self, path):
+        buffered = self.client.get(path)
+        streamed = self.client.get(path + ('&' if '?' in path else '?') + 'stream=true')
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(json.loads(b''.join(streamed.streaming_content)), buffered.json())
+
+    def test_iter_json_fills_placeholders(self):
+        chunks = list(iter_json({'a': STREAMED_ITEMS, 'n': STREAMED_COUNT, 'z': 'ü'}, iter(range(5)), chunk_size=4))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(''.join(chunks)), {'a': [0, 1, 2, 3, 4], 'n': 5, 'z': 'ü'})
+        self.assertEqual(''.join(iter_json(STREAMED_ITEMS, [])), '[]')
+
+    def test_errors_mid_stream_end_with_marker(self):
+        def items():
+            yield 1
+            raise ValueError('boom')
+
+        body = ''.join(iter_json({'a': STREAMED_ITEMS}, items()))
+        self.assertTrue(body.endswith(STREAM_ERROR_MARKER))
+        with self.assertRaises(ValueError):
+            json.loads(body)
+
+    async def test_asgi_responses_stream_asynchronously(self):
+        response = await AsyncClient().get('/api/quiz/list/?legacy=true&stream=true')
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([quiz['quiz_id'] for quiz in json.loads(body)['quizzes']][:1], ['91001'])
+
+    def test_streamed_responses_match_buffered_ones(self):
+        self.assertStreamMatches('/api/quiz/list/?legacy=true')
+        self.client.force_login(self.user)
+        self.assertStreamMatches('/api/auth/quiz/history/')
+        self.assertStreamMatches('/api/quiz/live/history/')
+
+
+class ConditionalGetTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '920001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+        ])
+        original = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original)
+
+    def test_list_revalidates_until_catalog_changes(self):
+        response = self.client.get('/api/quiz/list/')
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        with mock.patch('quiz_app.views.QuizListing.fetch') as fetch:
+            self.assertEqual(self.client.get('/api/quiz/list/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            fetch.assert_not_called()
+        self.assertNotEqual(self.client.get('/api/quiz/list/?page_size=5')['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Quiz.objects.create(quiz_id='92001', title='New', topic='Science', num_questions=1)
+        self.assertEqual(self.client.get('/api/quiz/list/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_etag_follows_quiz_content(self):
+        dataset_etag = self.client.get('/api/quiz/detail/920001/')['ETag']
+        self.assertEqual(self.client.get('/api/quiz/detail/920001/', HTTP_IF_NONE_MATCH=dataset_etag).status_code, 304)
+
+        quiz = Quiz.objects.create(quiz_id='92002', title='DB Quiz', topic='Science', num_questions=1)
+        etag = self.client.get('/api/quiz/detail/92002/')['ETag']
+        self.assertEqual(self.client.get('/api/quiz/detail/92002/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Revalidating reads the cached payload, not the Quiz/Question tables
+        with self.assertNumQueries(1):
+            self.client.get('/api/quiz/detail/92002/', HTTP_IF_NONE_MATCH=etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(quiz=quiz, order=1, text='Q?', options=['a', 'b', 'c', 'd'], correct_answer='a')
+        response = self.client.get('/api/quiz/detail/92002/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['questions'][0]['text'], 'Q?')
+        self.assertEqual(self.client.get('/api/quiz/detail/99999/').status_code, 404)
+
+
+class PayloadCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        payload_cache_module._lru.clear()
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '930001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+        ])
+        original = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original)
+
+    def test_questions_cached_until_question_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz = Quiz.objects.create(quiz_id='93001', title='DB Quiz', topic='Science', num_questions=1)
+            question = Question.objects.create(quiz=quiz, order=1, text='Q1?', options=['a', 'b', 'c', 'd'], correct_answer='a')
+
+        first = self.client.get('/api/quiz/93001/questions/')
+        self.assertEqual(first.json()['questions'][0]['text'], 'Q1?')
+        with mock.patch('quiz_app.services.quiz_payloads.build_quiz_questions') as build:
+            self.assertEqual(self.client.get('/api/quiz/93001/questions/').content, first.content)
+            build.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.text = 'Q2?'
+            question.save()
+        self.assertEqual(self.client.get('/api/quiz/93001/questions/').json()['questions'][0]['text'], 'Q2?')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.delete()
+        self.assertEqual(self.client.get('/api/quiz/93001/questions/').json()['total_questions'], 0)
+
+    def test_detail_and_dataset_payloads(self):
+        detail = self.client.get('/api/quiz/detail/930001/')
+        self.assertEqual(detail['Content-Type'], 'application/json')
+        self.assertEqual(detail.json()['data']['source'], 'dataset')
+        by_id = self.client.get('/api/quiz/csv/930001/questions/').json()
+        self.assertEqual(by_id['questions'][0]['correct_answer'], 'Newton')
+
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '930001,Science,Physics,Physics Basics,Easy,300,Unit of energy?,Joule,Newton,Watt,Pascal,Joule',
+        ])
+        os.utime(os.path.join(self.dataset_dir, 'categoryQuizzes.csv'), ns=(1, 1))
+        self.assertEqual(self.client.get('/api/quiz/detail/930001/').json()['data']['questions'][0]['correct_answer'], 'Joule')
+
+        # Misses are not cached
+        self.assertEqual(self.client.get('/api/quiz/detail/93002/').status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            Quiz.objects.create(quiz_id='93002', title='Late Quiz', topic='Science', num_questions=0)
+        self.assertEqual(self.client.get('/api/quiz/detail/93002/').json()['data']['title'], 'Late Quiz')
+
+    def test_version_bumped_after_rolled_back_change(self):
+        version = payload_cache_module.db_content_version('93003')
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    payload_cache_module.bump_quiz_version_on_commit(quiz_id='93003')
+                    raise RuntimeError('rolled back')
+        self.assertEqual(payload_cache_module.db_content_version('93003'), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payload_cache_module.bump_quiz_version_on_commit(quiz_id='93003')
+        self.assertGreater(payload_cache_module.db_content_version('93003'), version)
+
+    def test_lru_bounds(self):
+        lru = LRUBytesCache(max_entries=2, max_bytes=10)
+        lru.set('a', b'1234')
+        lru.set('b', b'1234')
+        lru.get('a')
+        lru.set('c', b'1234')
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), b'1234')
+        lru.set('d', b'123456789')
+        self.assertEqual(len(lru), 1)
+        lru.set('e', b'12345678901')
+        self.assertIsNone(lru.get('e'))
+
+
+class QuizBatchTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '940001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+            '940002,History,Rome,Roman Empire,Easy,300,First emperor?,Augustus,Nero,Caesar,Titus,Augustus',
+        ])
+        original = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original)
+        quiz = Quiz.objects.create(quiz_id='94001', title='DB Quiz', category='Science', topic='Physics', num_questions=2)
+        Question.objects.create(quiz=quiz, order=2, text='Q2?', options=['a', 'b', 'c', 'd'], correct_answer='b')
+        Question.objects.create(quiz=quiz, order=1, text='Q1?', options=['a', 'b', 'c', 'd'], correct_answer='a')
+
+    def test_batch_by_ids_keeps_order(self):
+        with self.assertNumQueries(2):
+            body = self.client.post(
+                '/api/quiz/batch/', {'quiz_ids': ['94001', '940002', '99999', '94001']}, content_type='application/json'
+            ).json()
+        self.assertEqual([quiz['quiz_id'] for quiz in body['quizzes']], ['94001', '940002'])
+        self.assertEqual([q['text'] for q in body['quizzes'][0]['questions']], ['Q1?', 'Q2?'])
+        self.assertEqual(body['missing'], ['99999'])
+        self.assertEqual(self.client.get('/api/quiz/batch/?ids=940001').json()['quizzes'][0]['source'], 'dataset')
+
+    def test_bundle_by_category(self):
+        response = self.client.get('/api/quiz/batch/?category=science&bundle=true')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(sorted(quiz['quiz_id'] for quiz in body['quizzes']), ['940001', '94001'])
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.client.get('/api/quiz/batch/').status_code, 400)
+        ids = ','.join(str(n) for n in range(101))
+        self.assertEqual(self.client.get(f'/api/quiz/batch/?ids={ids}').status_code, 400)
+
+
+class QuizBundleTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        payload_cache_module._lru.clear()
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '950001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+        ])
+        original = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original)
+
+    def hashes(self):
+        return {quiz['quiz_id']: quiz['content_hash'] for quiz in self.client.get('/api/quiz/list/').json()['quizzes']}
+
+    def test_list_hash_addresses_immutable_bundle(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz = Quiz.objects.create(quiz_id='95001', title='DB Quiz', topic='Science', num_questions=1)
+            question = Question.objects.create(quiz=quiz, order=1, text='Q1?', options=['a', 'b', 'c', 'd'], correct_answer='a')
+
+        hashes = self.hashes()
+        self.assertEqual(set(hashes), {'95001', '950001'})
+        for quiz_id, digest in hashes.items():
+            response = self.client.get(f'/api/quiz/bundle/{quiz_id}/{digest}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn('max-age=31536000', response['Cache-Control'])
+            self.assertEqual(response.content, self.client.get(f'/api/quiz/detail/{quiz_id}/').content)
+        self.assertEqual(Quiz.objects.get(quiz_id='95001').content_hash, hashes['95001'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.correct_answer = 'b'
+            question.save()
+        new_hash = self.hashes()['95001']
+        self.assertNotEqual(new_hash, hashes['95001'])
+        self.assertEqual(self.client.get(f"/api/quiz/bundle/95001/{hashes['95001']}/").status_code, 404)
+        self.assertEqual(self.client.get(f'/api/quiz/bundle/95001/{new_hash}/').json()['data']['questions'][0]['correct_answer'], 'b')
+
+
+class QuizIdAllocatorTest(TestCase):
+
+    def test_encoded_ids_are_short_and_unique(self):
+        ids = {encode_quiz_id(number) for number in range(20000)}
+        self.assertEqual(len(ids), 20000)
+        for quiz_id in list(ids)[:100]:
+            self.assertEqual(len(quiz_id), 9)
+            self.assertTrue(quiz_id.startswith('q'))
+        with self.assertRaises(ValueError):
+            encode_quiz_id(1 << 40)
+
+    def test_allocates_from_blocks_without_lookups(self):
+        allocator = QuizIdAllocator(block_size=10)
+        ids = [allocator.allocate()]
+        with self.assertNumQueries(0):
+            ids += [allocator.allocate() for _ in range(9)]
+        ids += [allocator.allocate() for _ in range(10)]
+        self.assertEqual(len(set(ids)), 20)
+
+    def test_rolled_back_reservation_is_not_reused(self):
+        allocator = QuizIdAllocator(block_size=2)
+        try:
+            with transaction.atomic():
+                ids = [allocator.allocate(), allocator.allocate()]
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        ids += [allocator.allocate(), allocator.allocate()]
+        self.assertEqual(len(set(ids)), 4)
+
+
+class QuizSamplingTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        quiz_sampling.reset_index()
+        self.addCleanup(quiz_sampling.reset_index)
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '960001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+            '960002,History,Rome,Roman Empire,Hard,300,First emperor?,Augustus,Nero,Caesar,Titus,Augustus',
+        ])
+        original = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original)
+        quiz = Quiz.objects.create(quiz_id='96001', title='DB Quiz', category='Science', topic='Physics', level='easy', num_questions=1)
+        Question.objects.create(quiz=quiz, order=1, text='Q1?', options=['a', 'b', 'c', 'd'], correct_answer='a')
+        # Also in the dataset: sampled once, as a DB quiz
+        Quiz.objects.create(quiz_id='960002', title='Roman Empire', category='History', topic='Rome', level='hard', num_questions=1)
+
+    def test_samples_distinct_quizzes_with_filters(self):
+        quizzes = quiz_sampling.sample_quizzes(10)
+        self.assertEqual(sorted(quiz['quiz_id'] for quiz in quizzes), ['960001', '960002', '96001'])
+        self.assertEqual(
+            {quiz['source'] for quiz in quizzes if quiz['quiz_id'] == '960002'}, {'database'}
+        )
+        science = quiz_sampling.sample_quizzes(10, category='science', level='EASY')
+        self.assertEqual(sorted(quiz['quiz_id'] for quiz in science), ['960001', '96001'])
+
+        # Built pools are reused: one query for the picked DB quizzes
+        with self.assertNumQueries(1):
+            quiz_sampling.sample_quizzes(3)
+
+        # Unknown filter values only look up the category, never scan
+        with self.assertNumQueries(2):
+            self.assertEqual(quiz_sampling.sample_quizzes(3, category='No Such Thing', level='easy'), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(quiz_sampling.sample_quizzes(3, level='impossible'), [])
+
+    def test_surprise_endpoint(self):
+        body = self.client.get('/api/quiz/surprise/?kind=question&count=5&category=Science').json()
+        self.assertEqual(sorted(question['text'] for question in body['questions']), ['Q1?', 'Unit of force?'])
+        self.assertEqual(self.client.get('/api/quiz/surprise/?level=hard').json()['quizzes'][0]['quiz_id'], '960002')
+        self.assertEqual(self.client.get('/api/quiz/surprise/?kind=other').status_code, 400)
+        self.assertEqual(quiz_sampling.random_db_quiz(category='Science').quiz_id, '96001')
+
+
+class SparseFieldsetTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sparse', password='pass12345')
+        self.quiz = Quiz.objects.create(quiz_id='97001', title='Sparse', category='Science', topic='Physics', num_questions=4)
+        QuizHistory.objects.create(user=self.user, quiz=self.quiz, score=3, total_questions=4, completed_at=timezone.now())
+        game = GameSession.objects.create(host=self.user, quiz_source=self.quiz, status='finished', join_code='SPR111',
+                                          completed_at=timezone.now())
+        PlayerSession.objects.create(game_session=game, user=self.user, score=10)
+        self.client.force_login(self.user)
+
+    def test_quiz_list_fields(self):
+        quizzes = self.client.get('/api/quiz/list/?fields=title,level').json()['quizzes']
+        self.assertEqual(quizzes[0], {'quiz_id': '97001', 'title': 'Sparse', 'level': None})
+        legacy = self.client.get('/api/quiz/list/?legacy=true&fields=title').json()['quizzes']
+        self.assertEqual(set(legacy[0]), {'quiz_id', 'title'})
+        self.assertEqual(self.client.get('/api/quiz/list/?fields=title,bogus').status_code, 400)
+        self.assertIn('content_hash', self.client.get('/api/quiz/list/?fields=content_hash').json()['quizzes'][0])
+
+    def test_history_fields(self):
+        attempts = self.client.get('/api/auth/quiz/history/?fields=title,percentage').json()['data']['attempts']
+        self.assertEqual(attempts, [{'title': 'Sparse', 'percentage': 75}])
+        live = self.client.get('/api/quiz/live/history/?fields=join_code,score').json()
+        self.assertEqual(live, [{'join_code': 'SPR111', 'score': 10}])
+        self.assertEqual(set(self.client.get('/api/quiz/live/history/?fields=host,quiz_title').json()[0]), {'host', 'quiz_title'})
+        self.assertEqual(self.client.get('/api/quiz/live/history/?fields=nope').status_code, 400)
+
+    def test_leaderboard_fields(self):
+        data = self.client.get('/api/quiz/leaderboard/global/?fields=username,rank').json()['data']
+        self.assertEqual(data['overall_top_100'], [{'username': 'sparse', 'rank': 1}])
+        self.assertEqual(self.client.get('/api/quiz/leaderboard/global/?fields=email').status_code, 400)
+
+
+class QuestionBankTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        question_bank._banks.clear()
+        self.addCleanup(question_bank._banks.clear)
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [
+            '980001,Science,Physics,Physics Basics,Easy,300,Unit of force?,Newton,Joule,Watt,Pascal,Newton',
+            '980001,Science,Physics,Physics Basics,Easy,300,Unit of energy?,Newton,Joule,Watt,Pascal,Joule',
+            '980002,History,Rome,Roman Empire,Easy,300,First emperor?,Augustus,Nero,Caesar,Titus,Augustus',
+        ])
+        original = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original)
+        self.user = User.objects.create_user(username='banker', password='pass12345')
+        seen = Quiz.objects.create(quiz_id='98001', title='Seen', category='Science', topic='Physics', level='easy', num_questions=2)
+        Question.objects.create(quiz=seen, order=1, text='Unit of power?', options=['Newton', 'Joule', 'Watt', 'Pascal'],
+                                correct_answer='Watt')
+        # Same question as the dataset one, stored once in the bank
+        Question.objects.create(quiz=seen, order=2, text='unit of  force?', options=['Newton', 'Joule', 'Watt', 'Pascal'],
+                                correct_answer='Newton')
+        QuizHistory.objects.create(user=self.user, quiz=seen, score=1, total_questions=2, completed_at=timezone.now())
+
+    def test_bank_served_without_gemini(self):
+        self.assertEqual(len(question_bank.get_bank('science', 'EASY')), 3)
+        with mock.patch('quiz_app.services.question_bank.generate_quiz_questions') as generate:
+            questions, error = question_bank.assemble_quiz_questions('Science', 'Any', 'easy', 3)
+            generate.assert_not_called()
+        self.assertIsNone(error)
+        self.assertEqual(len({question_bank.question_key(q['text']) for q in questions}), 3)
+
+        # A user keeps getting the same picks until they see them
+        other = User.objects.create_user(username='newcomer', password='pass12345')
+        with mock.patch('quiz_app.services.question_bank.generate_quiz_questions') as generate:
+            first, error = question_bank.assemble_quiz_questions('Science', 'Any', 'easy', 2, user=other)
+            self.assertEqual(question_bank.assemble_quiz_questions('Science', 'Any', 'easy', 2, user=other), (first, None))
+            generate.assert_not_called()
+        self.assertIsNone(error)
+        self.assertEqual(len(first), 2)
+
+    def test_seen_questions_excluded_and_gap_generated(self):
+        generated = [
+            {'text': 'Unit of energy?', 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a'},
+            {'text': 'Unit of charge?', 'options': ['Coulomb', 'Volt', 'Ohm', 'Tesla'], 'correct_answer': 'Coulomb'},
+        ]
+        with mock.patch('quiz_app.services.question_bank.generate_quiz_questions', return_value=(generated, None)) as generate:
+            questions, error = question_bank.assemble_quiz_questions('Science', 'Any', 'easy', 3, user=self.user)
+        self.assertEqual(generate.call_args.kwargs['num_questions'], 2)
+        # Seen questions (and duplicates of them) are skipped
+        self.assertEqual([q['text'] for q in questions], ['Unit of energy?', 'Unit of charge?'])
+
+        with mock.patch('quiz_app.services.question_bank.generate_quiz_questions', return_value=(None, 'down')):
+            self.assertEqual(question_bank.assemble_quiz_questions('Science', 'Any', 'easy', 3, user=self.user), (None, 'down'))
+        with mock.patch('quiz_app.services.question_bank.generate_quiz_questions', return_value=(generated, None)) as generate:
+            question_bank.assemble_quiz_questions('Science', 'Any', 'easy', 2, additional_instructions='Only SI units')
+        self.assertEqual(generate.call_args.kwargs['num_questions'], 2)
+
+    def test_create_quiz_uses_bank(self):
+        self.client.force_login(self.user)
+        with mock.patch('quiz_app.services.question_bank.generate_quiz_questions') as generate:
+            response = self.client.post('/api/quiz/create/', {'category': 'History', 'title': 'Rome', 'level': 'easy',
+                                                               'num_questions': 1}, content_type='application/json')
+            generate.assert_not_called()
+        self.assertEqual(response.status_code, 201)
+        quiz = Quiz.objects.get(quiz_id=response.json()['quiz_id'])
+        self.assertEqual([question.text for question in quiz.questions.all()], ['First emperor?'])
+
+
+class GeminiClientTest(TestCase):
+
+    def response(self, status, text='[]'):
+        response = mock.Mock(status_code=status, text='', headers={})
+        response.json.return_value = {'candidates': [{'content': {'parts': [{'text': text}]}}]}
+        return response
+
+    def setUp(self):
+        self.client_ = GeminiClient(api_key='key', max_retries=2, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        sleep = mock.patch('quiz_app.gemini_client.time.sleep')
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_retries_transient_errors(self):
+        with mock.patch.object(self.client_.session, 'post', side_effect=[self.response(503), self.response(200, 'ok')]) as post:
+            self.assertEqual(self.client_.generate('prompt'), 'ok')
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(post.call_args.kwargs['headers'], {'x-goog-api-key': 'key'})
+
+        # Client errors are not retried and don't count against the circuit
+        with mock.patch.object(self.client_.session, 'post', return_value=self.response(400)) as post:
+            with self.assertRaises(GeminiError):
+                self.client_.generate('prompt')
+        self.assertEqual(post.call_count, 1)
+        self.assertFalse(self.client_.breaker.is_open)
+
+    def test_circuit_opens_and_recovers(self):
+        with mock.patch.object(self.client_.session, 'post', return_value=self.response(500)) as post:
+            for _ in range(2):
+                with self.assertRaises(GeminiError):
+                    self.client_.generate('prompt')
+            self.assertEqual(post.call_count, 6)
+            with self.assertRaises(GeminiUnavailable):
+                self.client_.generate('prompt')
+            self.assertEqual(post.call_count, 6)
+
+        self.client_.breaker._opened_at -= 60
+        with mock.patch.object(self.client_.session, 'post', return_value=self.response(200, 'back')):
+            self.assertEqual(self.client_.generate('prompt'), 'back')
+        self.assertFalse(self.client_.breaker.is_open)
+
+
+class GenerationCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.cache = GenerationCache(max_entries=2)
+        generation_cache_module.reset_stats()
+        patcher = mock.patch.object(generation_cache_module, '_generation_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_requests_hit_cache(self):
+        questions = [{'text': 'Q?', 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a'}]
+        with mock.patch('quiz_app.gemini_utils._generate_quiz_questions', return_value=(questions, None)) as generate:
+            first = gemini_utils.generate_quiz_questions('Science', 'Space', 'easy', 1)
+            # Normalized inputs share the entry
+            second = gemini_utils.generate_quiz_questions(' science', 'SPACE ', 'Easy', 1)
+        self.assertEqual(first, (questions, None))
+        self.assertEqual(second, (questions, None))
+        self.assertEqual(generate.call_count, 1)
+        # Counted in memory, not written per lookup
+        self.assertFalse(GenerationCacheStat.objects.exists())
+
+        # The DB tier answers once the in-process LRU is gone
+        self.cache._lru.clear()
+        with mock.patch('quiz_app.gemini_utils._generate_quiz_questions') as generate:
+            self.assertEqual(gemini_utils.generate_quiz_questions('Science', 'Space', 'easy', 1), (questions, None))
+            generate.assert_not_called()
+        self.assertEqual(generation_cache_module.stats()['memory_hits'], 1)
+        self.assertEqual(generation_cache_module.stats()['db_hits'], 1)
+        self.assertEqual(generation_cache_module.stats()['misses'], 1)
+
+        # Counters live in the database, so the management command sees them
+        output = io.StringIO()
+        call_command('generation_cache', '--reset-stats', stdout=output)
+        self.assertIn('1 memory hits, 1 DB hits, 1 misses', output.getvalue())
+        self.assertEqual(generation_cache_module.stats()['misses'], 0)
+
+    def test_failures_not_cached(self):
+        with mock.patch('quiz_app.gemini_utils._generate_quiz_questions', return_value=(None, 'Error: down')) as generate:
+            self.assertEqual(gemini_utils.generate_quiz_questions('Science', 'Space', 'easy', 1), (None, 'Error: down'))
+            self.assertEqual(gemini_utils.generate_quiz_questions('Science', 'Space', 'easy', 1), (None, 'Error: down'))
+        self.assertEqual(generate.call_count, 2)
+        self.assertFalse(GenerationCacheEntry.objects.exists())
+
+    def test_eviction(self):
+        for name in ('a', 'b', 'c'):
+            self.cache.set(generation_key('content', {'prompt': name}), 'content', name)
+        GenerationCacheEntry.objects.filter(key=generation_key('content', {'prompt': 'c'})).update(
+            expires_at=timezone.now()
+        )
+        GenerationCacheEntry.objects.filter(key=generation_key('content', {'prompt': 'a'})).update(
+            last_used_at=timezone.now() - timedelta(days=1)
+        )
+        self.cache.set(generation_key('content', {'prompt': 'd'}), 'content', 'd')
+        self.assertEqual(self.cache.evict(), 2)
+        self.assertEqual(sorted(GenerationCacheEntry.objects.values_list('value', flat=True)), ['b', 'd'])
+
+
+class GenerationJobTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        question_bank._banks.clear()
+        self.addCleanup(question_bank._banks.clear)
+        self.dataset_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dataset_dir)
+        write_dataset(self.dataset_dir, 'categoryQuizzes.csv', [])
+        original = catalog_module._catalog
+        catalog_module._catalog = DatasetCatalog(dataset_dir=self.dataset_dir, check_interval=0)
+        self.addCleanup(setattr, catalog_module, '_catalog', original)
+        patcher = mock.patch.object(generation_jobs, 'INPROCESS_WORKERS', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='jobs', email='jobs@example.com', password='pass12345')
+        self.questions = [{'text': 'Q?', 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a'}]
+
+    def test_create_queues_job_and_worker_completes_it(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/api/auth/quiz/create/', {'category': 'Science', 'title': 'Space', 'num_questions': 1},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['data']['job_id']
+        self.assertEqual(self.client.get(f'/api/quiz/jobs/{job_id}/').json()['status'], 'pending')
+
+        with mock.patch('quiz_app.services.generation_jobs.assemble_quiz_questions', return_value=(self.questions, None)):
+            job = generation_jobs.claim_job()
+            self.assertIsNone(generation_jobs.claim_job())
+            generation_jobs.run_job(job)
+
+        body = self.client.get(f'/api/quiz/jobs/{job_id}/').json()
+        self.assertEqual(body['status'], 'succeeded')
+        quiz = Quiz.objects.get(quiz_id=body['quiz_id'])
+        self.assertEqual((quiz.created_by, quiz.num_questions), (self.user, 1))
+        self.user.profile.refresh_from_db()
+        self.assertIn(quiz.quiz_id, self.user.profile.created_quiz_ids)
+
+        # Other users can't see the job
+        self.client.logout()
+        self.assertEqual(self.client.get(f'/api/quiz/jobs/{job_id}/').status_code, 404)
+
+    def test_failed_and_stale_jobs(self):
+        response = self.client.post('/api/quiz/create/', {'category': 'Science', 'title': 'Space'}, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        with mock.patch('quiz_app.services.generation_jobs.assemble_quiz_questions', return_value=(None, 'down')):
+            generation_jobs.run_job(generation_jobs.claim_job())
+        body = self.client.get(f"/api/quiz/jobs/{response.json()['job_id']}/").json()
+        self.assertEqual((body['status'], body['error']), ('failed', 'Failed to generate questions: down'))
+
+        job = QuizGenerationJob.objects.create(params={}, status=QuizGenerationJob.STATUS_RUNNING, attempts=1,
+                                               started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(generation_jobs.requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, QuizGenerationJob.STATUS_PENDING)
+        self.assertEqual(self.client.post('/api/quiz/create/', {'title': 'x'}, content_type='application/json').status_code, 400)
+
+    def test_inprocess_pool_recovers_stale_jobs(self):
+        params = generation_jobs.quiz_params({'category': 'Science', 'title': 'Orphaned'})
+        job = QuizGenerationJob.objects.create(params=params, status=QuizGenerationJob.STATUS_RUNNING, attempts=1,
+                                               started_at=timezone.now() - timedelta(hours=1))
+        with mock.patch.object(generation_jobs, '_next_recovery', 0.0), \
+                mock.patch('quiz_app.services.generation_jobs.assemble_quiz_questions', return_value=(self.questions, None)):
+            self.assertEqual(generation_jobs.recover_jobs(), 1)
+            # Rate limited per process
+            self.assertEqual(generation_jobs.recover_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (QuizGenerationJob.STATUS_SUCCEEDED, 2))
+
+
+class LiveQuizPoolTest(TestCase):
+
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', password='pass12345')
+        self.questions = [{'text': f'Q{n}?', 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a'} for n in range(5)]
+
+    def test_refill_and_pop(self):
+        with mock.patch('quiz_app.services.live_quiz_pool.assemble_quiz_questions', return_value=(self.questions, None)):
+            self.assertEqual(live_quiz_pool.refill_topic('Science', target=2), 2)
+            self.assertEqual(live_quiz_pool.refill_topic('Science', target=2), 0)
+
+        self.client.force_login(self.host)
+        with mock.patch('quiz_app.services.live_quiz_pool.schedule_refill') as schedule_refill, \
+                mock.patch('quiz_app.services.question_bank.assemble_quiz_questions') as assemble, \
+                mock.patch('quiz_app.views_activity.random.choice', return_value='History'):
+            response = self.client.post('/api/quiz/live/create/')
+        assemble.assert_not_called()
+        # History has nothing pooled, so a Science quiz is used
+        quiz = GameSession.objects.get(pk=response.json()['session_id']).quiz_source
+        self.assertEqual((quiz.topic, quiz.created_by, quiz.questions.count()), ('Science', self.host, 5))
+        self.assertEqual(LiveQuizPoolEntry.objects.count(), 1)
+        schedule_refill.assert_called_with(['Science'])
+
+    def test_pop_skips_seen_entries_and_keeps_failed_ones(self):
+        played = Quiz.objects.create(quiz_id='99001', title='Played', topic='Science', num_questions=1, created_by=self.host)
+        Question.objects.create(quiz=played, order=1, text='q0?', options=['a', 'b', 'c', 'd'], correct_answer='a')
+        fresh = [{'text': f'Fresh {n}?', 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a'} for n in range(5)]
+        seen_entry = LiveQuizPoolEntry.objects.create(topic='Science', title='Seen', questions=self.questions)
+        LiveQuizPoolEntry.objects.create(topic='Science', title='Fresh', questions=fresh)
+
+        with mock.patch('quiz_app.services.live_quiz_pool.schedule_refill'):
+            with mock.patch('quiz_app.services.live_quiz_pool.create_live_quiz', side_effect=RuntimeError('down')):
+                with self.assertRaises(RuntimeError):
+                    live_quiz_pool.pop_pooled_quiz(self.host, 'Science')
+            self.assertEqual(LiveQuizPoolEntry.objects.count(), 2)
+
+            quiz = live_quiz_pool.pop_pooled_quiz(self.host, 'Science')
+            self.assertEqual(quiz.title, 'Fresh')
+            self.assertEqual(list(LiveQuizPoolEntry.objects.values_list('pk', flat=True)), [seen_entry.pk])
+            self.assertIsNone(live_quiz_pool.pop_pooled_quiz(self.host, 'Science'))
+
+    def test_schedule_refill_below_low_water(self):
+        self.addCleanup(live_quiz_pool._refilling.clear)
+        LiveQuizPoolEntry.objects.bulk_create([
+            LiveQuizPoolEntry(topic='Science', title='T', questions=self.questions) for _ in range(live_quiz_pool.LOW_WATER)
+        ])
+        with mock.patch.object(live_quiz_pool.threading, 'Thread') as thread:
+            live_quiz_pool.schedule_refill(['Science', 'History'])
+        thread.assert_called_once_with(target=live_quiz_pool._refill, args=(['History'],), daemon=True)
+
+
+class ActivityGeneratorTest(TestCase):
+
+    def test_generates_missing_activities_concurrently(self):
+        today = timezone.now().date()
+        kept = Activity.objects.create(date=today, type='lightning', title='Kept', difficulty='medium')
+        ActivityQuestion.objects.create(activity=kept, content={'q': 'Kept?'}, correct_answer='0')
+        empty = Activity.objects.create(date=today, type='scramble', title='Empty', difficulty='medium')
+
+        def ask(prompt):
+            if 'Word Scramble' in prompt:
+                raise ValueError('bad output')
+            return '[{"q": "Q?", "o": ["a", "b"], "a": 0}]'
+
+        with mock.patch.object(ActivityGenerator, '_ask_gemini', side_effect=ask):
+            results = ActivityGenerator().generate_daily_activities(max_workers=4)
+
+        self.assertEqual(len(results), (DAYS_AHEAD + 1) * len(ACTIVITY_TYPES) - 1)
+        self.assertTrue(Activity.objects.filter(pk=kept.pk).exists())
+        self.assertFalse(Activity.objects.filter(pk=empty.pk).exists())
+        self.assertEqual(Activity.objects.count(), (DAYS_AHEAD + 1) * len(ACTIVITY_TYPES))
+        self.assertTrue(all(result['fallback'] == (result['type'] == 'scramble') for result in results))
+        scramble = Activity.objects.get(date=today, type='scramble')
+        self.assertEqual(scramble.questions.count(), len(ActivityGenerator()._get_fallback_content('scramble')))
+
+        # Nothing left to generate
+        with mock.patch.object(ActivityGenerator, '_ask_gemini') as ask_gemini:
+            self.assertEqual(ActivityGenerator().generate_daily_activities(), [])
+        ask_gemini.assert_not_called()
+
+
+class ChunkedGenerationTest(TestCase):
+
+    def question(self, text):
+        return {'text': text, 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a'}
+
+    def test_large_quiz_split_into_chunks(self):
+        self.assertEqual(gemini_utils._chunk_sizes(25), [9, 8, 8])
+        self.assertEqual(gemini_utils._chunk_sizes(7), [7])
+        calls = []
+
+        def request(prompt):
+            count = int(prompt.split()[1])
+            focus = prompt.split('- Focus: questions about ')[1].split('\n')[0] if '- Focus:' in prompt else 'top-up'
+            first = focus not in [call[0] for call in calls]
+            calls.append((focus, count))
+            questions = [self.question(f'{focus} {n}?') for n in range(count)]
+            if focus.startswith('numbers') and first:
+                # One bad item: only this chunk asks again, for one question.
+                # One duplicate of another chunk: topped up after merging.
+                questions[0] = {'text': 'Broken', 'options': ['a'], 'correct_answer': 'z'}
+                questions[1] = self.question('core facts, terms and definitions 0?')
+            return [q for q in questions if gemini_utils._valid_question(q)], None
+
+        with mock.patch('quiz_app.gemini_utils.config', return_value='key'), \
+                mock.patch('quiz_app.gemini_utils._request_questions', side_effect=request):
+            questions, error = gemini_utils._generate_quiz_questions('Science', 'Space', 'easy', 25, '', 'English')
+
+        self.assertIsNone(error)
+        self.assertEqual(len(questions), 25)
+        self.assertEqual(len({q['text'].lower() for q in questions}), 25)
+        numbers = [count for focus, count in calls if focus.startswith('numbers')]
+        self.assertEqual(numbers, [8, 1])
+        self.assertEqual([count for focus, count in calls if focus == 'top-up'], [1])
+        self.assertEqual(len(calls), 5)
+
+    def test_failed_chunk_reported(self):
+        with mock.patch('quiz_app.gemini_utils.config', return_value='key'), \
+                mock.patch('quiz_app.gemini_utils._request_questions', return_value=([], 'Gemini API Error: 503')):
+            questions, error = gemini_utils._generate_quiz_questions('Science', 'Space', 'easy', 5, '', 'English')
+        self.assertIsNone(questions)
+        self.assertIn('Gemini API Error: 503', error)
@@ -5,8 +5,14 @@ from .views import (
     QuizQuestionsView,
     GetQuizzesByCategoryView,
     CountQuizzesByCategoryView,
+    QuizFacetsView,
+    SearchQuizzesView,
+    SurpriseMeView,
     GetQuizQuestionsByIdView,
     GetQuizDetailView,
+    QuizBatchView,
+    QuizBundleView,
+    QuizGenerationJobView,
 )
 from .views_activity import (
     ActivityScheduleView, 
@@ -31,8 +37,14 @@ urlpatterns = [
     # New APIs for fetching from CSV
     path('by-category/', GetQuizzesByCategoryView.as_view(), name='quizzes-by-category'),
     path('count-by-category/', CountQuizzesByCategoryView.as_view(), name='count-quizzes-by-category'),
+    path('facets/', QuizFacetsView.as_view(), name='quiz-facets'),
+    path('search/', SearchQuizzesView.as_view(), name='quiz-search'),
+    path('surprise/', SurpriseMeView.as_view(), name='quiz-surprise'),
     path('csv/<str:quiz_id>/questions/', GetQuizQuestionsByIdView.as_view(), name='csv-quiz-questions'),
     path('detail/<str:quiz_id>/', GetQuizDetailView.as_view(), name='quiz-detail'),
+    path('batch/', QuizBatchView.as_view(), name='quiz-batch'),
+    path('bundle/<str:quiz_id>/<str:content_hash>/', QuizBundleView.as_view(), name='quiz-bundle'),
+    path('jobs/<uuid:job_id>/', QuizGenerationJobView.as_view(), name='quiz-generation-job'),
     
     # Leaderboard endpoints
     path('leaderboard/global/', GetGlobalLeaderboardView.as_view(), name='global-leaderboard'),
@@ -423,45 +423,38 @@ def export_user_data(user) -> Dict:
         export['quiz_sessions'].append(session_data)
     
     return export
-import random
-import csv
-import os
 import logging
-from pathlib import Path
 from django.db import transaction
 from django.utils import timezone
+from quiz_app.search_index import index_quiz_on_commit
+from quiz_app.id_allocator import get_quiz_id_allocator
+from quiz_app.services.dataset_writer import get_dataset_writer, quiz_rows
 
 logger = logging.getLogger(__name__)
 
 
-def generate_unique_quiz_id(max_retries=10):
+def generate_unique_quiz_id():
     """
-    Generate a unique 5-digit quiz ID.
+    Allocate a unique quiz ID.
+    
+    IDs come from the per-process block allocator (quiz_app.id_allocator),
+    so no lookup query is needed to check for collisions.
     
-    Args:
-        max_retries: Maximum number of retry attempts
-        
     Returns:
-        str: Unique 5-digit quiz ID
-        
-    Raises:
-        ValueError: If unable to generate unique ID after max_retries
+        str: Unique short quiz ID (e.g. 'q3fz81k0c')
     """
-    from quiz_app.models import Quiz
-    
-    for attempt in range(max_retries):
-        quiz_id = str(random.randint(10000, 99999))
-        
-        if not Quiz.objects.filter(quiz_id=quiz_id).exists():
-            logger.info(f"Generated unique quiz_id: {quiz_id} (attempt {attempt + 1})")
-            return quiz_id
-    
-    raise ValueError(f"Failed to generate unique quiz_id after {max_retries} attempts")
+    quiz_id = get_quiz_id_allocator().allocate()
+    logger.info(f"Generated unique quiz_id: {quiz_id}")
+    return quiz_id
 
 
 def append_quiz_to_csv(quiz, questions):
     """
-    Append quiz and its questions to dataset/quiz.csv
+    Queue quiz and its questions for appending to dataset/quiz.csv
+    
+    The rows are handed to the dataset writer once the current transaction
+    commits, and written by its background flusher (see
+    quiz_app.services.dataset_writer).
     
     Args:
         quiz: Quiz model instance
@@ -471,49 +464,12 @@ def append_quiz_to_csv(quiz, questions):
         bool: True if successful, False otherwise
     """
     try:
-        # Create dataset directory if it doesn't exist
-        dataset_dir = Path(__file__).parent.parent / 'dataset'
-        dataset_dir.mkdir(exist_ok=True)
-        
-        csv_path = dataset_dir / 'quiz.csv'
+        rows = quiz_rows(quiz, questions)
+        transaction.on_commit(lambda: get_dataset_writer().submit(rows))
+        index_quiz_on_commit(quiz, [question.text for question in questions])
         
-        # Check if file exists to determine if we need to write headers
-        file_exists = csv_path.exists()
-        
-        # Open file in append mode with UTF-8 encoding
-        with open(csv_path, 'a', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'quiz_id', 'category', 'title', 'level', 'num_questions',
-                'duration_seconds', 'question_order', 'question_text',
-                'options_json', 'correct_answer', 'created_at'
-            ]
-            
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            # Write header if file is new
-            if not file_exists:
-                writer.writeheader()
-                logger.info(f"Created new CSV file at {csv_path}")
-            
-            # Write each question as a row
-            for question in questions:
-                import json
-                writer.writerow({
-                    'quiz_id': quiz.quiz_id,
-                    'category': quiz.category,
-                    'title': quiz.title,
-                    'level': quiz.level,
-                    'num_questions': quiz.num_questions,
-                    'duration_seconds': quiz.duration_seconds,
-                    'question_order': question.order,
-                    'question_text': question.text,
-                    'options_json': json.dumps(question.options),
-                    'correct_answer': question.correct_answer,
-                    'created_at': quiz.created_at.isoformat(),
-                })
-            
-            logger.info(f"Appended {len(questions)} questions for quiz {quiz.quiz_id} to CSV")
-            return True
+        logger.info(f"Queued {len(rows)} questions for quiz {quiz.quiz_id} for the dataset CSV")
+        return True
             
     except Exception as e:
         logger.error(f"Failed to append quiz to CSV: {str(e)}")
@@ -3,115 +3,80 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from .utils import generate_unique_quiz_id, append_quiz_to_csv
-from .gemini_utils import generate_quiz_questions
-from .models import Quiz, Question
-from django.db import transaction
+from .services.question_bank import take_from_bank
+from .services.generation_jobs import (
+    quiz_params, InvalidQuizParams, save_quiz, enqueue_generation, job_payload
+)
+from .catalog import get_catalog
+from .cache_utils import catalog_cache_key, get_or_build, CATALOG_CACHE_TIMEOUT
+from .services.quiz_listing import (
+    QuizListing, InvalidListingParams, serialize_db_quiz, serialize_dataset_quiz, parse_list_fields, db_quiz_queryset
+)
+from .services.quiz_facets import build_facets
+from .services.quiz_sampling import sample_quizzes, sample_questions, MAX_SAMPLE_SIZE
+from .services.quiz_payloads import (
+    quiz_questions_bytes, dataset_questions_bytes, quiz_detail_bytes, build_quiz_batch, MAX_BATCH_QUIZZES,
+    quiz_content_hashes, quiz_bundle_bytes
+)
+from .search_index import get_search_index
+from .taxonomy import lookup_taxonomy
+from .conditional import catalog_conditional, quiz_conditional
+from .streaming import wants_stream, streaming_json_response, encode_json, STREAMED_ITEMS, STREAMED_COUNT
+from .models import Quiz, QuizGenerationJob
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
 from django.contrib.auth.models import User
 from auth_app.models import UserProfile
 from auth_app.xp_utils import calculate_level
-from django.core.cache import cache
+import gzip
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Content-addressed bundles never change; let browsers and CDNs keep them a year
+BUNDLE_MAX_AGE = 60 * 60 * 24 * 365
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 class CreateQuizView(APIView):
     """
     Create a new quiz with AI-generated questions.
     Saves to CSV file for dataset collection.
+
+    Quizzes the question bank can fill are created right away (201);
+    otherwise a generation job is queued (202) - poll QuizGenerationJobView.
     """
     permission_classes = [permissions.AllowAny]  # Dashboard is protected, so user is already logged in
 
     def post(self, request):
-        # Get quiz details from request
-        category = request.data.get('category')
-        title = request.data.get('title')
-        level = request.data.get('level', 'easy')
-        num_questions = request.data.get('num_questions', 10)
-        duration_seconds = request.data.get('duration_seconds', 600)
-        additional_instructions = request.data.get('additional_instructions', '')
-        
-        # Validate required fields
-        if not category or not title:
-            return Response(
-                {"error": "Category and title are required"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         try:
-            # Step 1: Generate unique quiz_id
-            logger.info(f"Generating quiz: {title} - {category}")
-            quiz_id = generate_unique_quiz_id()
-            logger.info(f"Generated quiz_id: {quiz_id}")
-            
-            # Step 2: Generate questions using Gemini
-            logger.info(f"Calling Gemini API for {num_questions} questions")
-            questions_data, error_msg = generate_quiz_questions(
-                category=category,
-                title=title,
-                level=level,
-                num_questions=num_questions,
-                additional_instructions=additional_instructions
+            params = quiz_params(request.data)
+        except InvalidQuizParams as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user if request.user.is_authenticated else None
+        try:
+            logger.info(f"Creating quiz: {params['title']} - {params['category']}")
+            questions_data, _ = take_from_bank(
+                params['category'], params['level'], params['num_questions'],
+                params['additional_instructions'], params['language'], user
             )
-            
-            if not questions_data:
-                logger.error(f"Gemini API failed: {error_msg}")
-                return Response(
-                    {"error": "Failed to generate questions", "details": error_msg},
-                    status=status.HTTP_502_BAD_GATEWAY
-                )
-            
-            logger.info(f"Successfully generated {len(questions_data)} questions")
-            
-            # Step 3: Create Quiz and Question objects for CSV
-            with transaction.atomic():
-                # Create quiz
-                quiz = Quiz.objects.create(
-                    quiz_id=quiz_id,
-                    category=category,
-                    title=title,
-                    topic=category,
-                    level=level,
-                    difficulty_level=level,
-                    num_questions=num_questions,
-                    duration_seconds=duration_seconds,
-                    duration_minutes=duration_seconds // 60,
-                    created_by=request.user if request.user.is_authenticated else None,
-                    is_mock=False
-                )
-                
-                # Create question objects
-                question_objects = []
-                for idx, q_data in enumerate(questions_data, start=1):
-                    question = Question(
-                        quiz=quiz,
-                        order=idx,
-                        text=q_data['text'],
-                        question_text=q_data['text'],
-                        options=q_data['options'],
-                        correct_answer=q_data['correct_answer'],
-                        metadata={}
-                    )
-                    question_objects.append(question)
-                
-                # Save to database
-                Question.objects.bulk_create(question_objects)
-                
-                # Step 4: Append to CSV file
-                csv_success = append_quiz_to_csv(quiz, question_objects)
-                if not csv_success:
-                    logger.warning(f"CSV append failed for quiz {quiz_id}")
-                else:
-                    logger.info(f"Successfully saved quiz {quiz_id} to CSV")
-            
-            # Step 5: Return success response
+            if len(questions_data) < params['num_questions']:
+                # Gemini is needed: a generation worker takes it from here
+                job = enqueue_generation(params, user)
+                return Response({
+                    "success": True,
+                    "message": "Quiz generation started",
+                    **job_payload(job)
+                }, status=status.HTTP_202_ACCEPTED)
+
+            quiz = save_quiz(params, questions_data, user)
+            logger.info(f"Created quiz {quiz.quiz_id} from the question bank")
             return Response({
                 "success": True,
                 "message": "Quiz created successfully",
                 "quiz_id": quiz.quiz_id,
-                "num_questions": len(question_objects),
+                "num_questions": quiz.num_questions,
                 "category": quiz.category,
                 "title": quiz.title,
                 "level": quiz.level
@@ -125,96 +90,105 @@ class CreateQuizView(APIView):
             )
 
 
+class QuizGenerationJobView(APIView):
+    """
+    Status of a quiz generation job: pending, running, succeeded (with the
+    quiz_id) or failed (with the error).
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, job_id):
+        job = QuizGenerationJob.objects.select_related('quiz').filter(pk=job_id).first()
+        # Jobs of signed-in users are only visible to them
+        if job is None or (job.user_id is not None and job.user_id != request.user.id):
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"success": True, **job_payload(job)})
+
+
 
+@method_decorator(catalog_conditional, name='get')
 class QuizListView(APIView):
     """
-    Get list of all available quizzes with basic details.
-    Cached for 10 minutes to improve performance.
+    Get a page of available quizzes with basic details.
+
+    Query params:
+        cursor: next_cursor from the previous page
+        page_size: quizzes per page (default 50, max 200)
+        category, topic, level, language: case-insensitive filters
+        sort: 'newest' (default) or 'oldest'
+        fields: comma-separated entry fields to return (quiz_id is always included)
+        legacy: 'true' returns the full unpaginated list instead (without content hashes)
+        stream: with legacy, 'true' streams the full list as it is read
+
+    Cached per catalog generation; new or updated quizzes bump the generation.
+    Answers If-None-Match/If-Modified-Since with 304 before building anything.
     """
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
+        if request.query_params.get('legacy', '').lower() in ('1', 'true', 'yes'):
+            try:
+                fields = parse_list_fields(request.query_params.get('fields'))
+            except InvalidListingParams as e:
+                return Response(
+                    {"error": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if wants_stream(request):
+                return streaming_json_response(
+                    request,
+                    {'success': True, 'quizzes': STREAMED_ITEMS, 'count': STREAMED_COUNT},
+                    self.iter_quiz_list(fields)
+                )
+            return self.get_full_list(fields)
+
         try:
-            # Check cache first
-            cached_quizzes = cache.get('explore_quiz_list')
-            if cached_quizzes:
-                logger.info("Returning cached quiz list")
-                return Response({
-                    'success': True,
-                    'quizzes': cached_quizzes,
-                    'count': len(cached_quizzes)
-                }, status=status.HTTP_200_OK)
+            listing = QuizListing(request.query_params)
+        except InvalidListingParams as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            quizzes_map = {}
-            
-            # 1. Fetch from Database
-            db_quizzes = Quiz.objects.all().order_by('-created_at')
-            for quiz in db_quizzes:
-                quizzes_map[str(quiz.quiz_id)] = {
-                    'quiz_id': str(quiz.quiz_id),
-                    'title': quiz.title,
-                    'category': quiz.category or quiz.topic,
-                    'topic': quiz.topic,
-                    'level': quiz.level or quiz.difficulty_level,
-                    'num_questions': quiz.num_questions,
-                    'duration_seconds': quiz.duration_seconds or (quiz.duration_minutes * 60 if quiz.duration_minutes else 600),
-                    'created_at': quiz.created_at.isoformat() if quiz.created_at else None,
-                    'language': quiz.language or 'English',
-                    'source': 'database'
-                }
-            
-            # 2. Fetch from ALL CSV files in dataset folder
-            import csv
-            import os
-            
-            dataset_dir = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                'dataset'
+        try:
+            page = get_or_build(
+                catalog_cache_key('quiz_page', *listing.cache_parts()),
+                lambda: self.build_page(listing),
+                timeout=CATALOG_CACHE_TIMEOUT
+            )
+
+            logger.info(f"Returning page of {page['count']} quizzes (DB+CSV)")
+            return Response({
+                'success': True,
+                **page
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Error fetching quizzes: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch quizzes", "details": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @staticmethod
+    def build_page(listing):
+        page = listing.fetch()
+        if listing.fields is not None and 'content_hash' not in listing.fields:
+            return page
+        # Entries carry the hash for their immutable bundle URL (QuizBundleView)
+        hashes = quiz_content_hashes([quiz['quiz_id'] for quiz in page['quizzes']])
+        for quiz in page['quizzes']:
+            quiz['content_hash'] = hashes.get(quiz['quiz_id'])
+        return page
+
+    def get_full_list(self, fields=None):
+        try:
+            # Served from cache; one worker rebuilds on expiry while others get the stale list
+            quiz_list = get_or_build(
+                catalog_cache_key('explore_quiz_list', *(fields or ())),
+                lambda: self.build_quiz_list(fields),
+                timeout=CATALOG_CACHE_TIMEOUT
             )
-            
-            if os.path.exists(dataset_dir):
-                # Iterate through all files in the directory
-                for filename in os.listdir(dataset_dir):
-                    if filename.endswith('.csv'):
-                        csv_path = os.path.join(dataset_dir, filename)
-                        try:
-                            with open(csv_path, 'r', encoding='utf-8') as file:
-                                reader = csv.DictReader(file)
-                                # validation to ensure it has required columns
-                                if not reader.fieldnames or 'QuizID' not in reader.fieldnames:
-                                    continue
-                                    
-                                for row in reader:
-                                    quiz_id = row.get('QuizID')
-                                    if not quiz_id:
-                                        continue
-                                    
-                                    if quiz_id not in quizzes_map:
-                                        # New quiz found in CSV
-                                        quizzes_map[quiz_id] = {
-                                            'quiz_id': quiz_id,
-                                            'title': row.get('Title', 'Untitled Quiz'),
-                                            'category': row.get('Category', 'General'),
-                                            'topic': row.get('Subtopic', row.get('Category', 'General')),
-                                            'level': row.get('Level', 'Medium'),
-                                            'num_questions': 1, # Initialize count
-                                            'duration_seconds': int(row['DurationSeconds']) if row.get('DurationSeconds') and row['DurationSeconds'].isdigit() else 600,
-                                            'created_at': None,
-                                            'language': 'English', # Default for CSV
-                                            'source': 'dataset'
-                                        }
-                                    elif quizzes_map[quiz_id]['source'] == 'dataset':
-                                        # Increment count for CSV-only quizzes
-                                        quizzes_map[quiz_id]['num_questions'] += 1
-                        except Exception as e:
-                            logger.error(f"Error reading CSV {filename}: {str(e)}")
-                            continue
-            
-            # Convert to list
-            quiz_list = list(quizzes_map.values())
-            
-            # Cache the result for 10 minutes (600 seconds)
-            cache.set('explore_quiz_list', quiz_list, timeout=600)
             
             logger.info(f"Returning {len(quiz_list)} quizzes (DB+CSV)")
             return Response({
@@ -230,6 +204,33 @@ class QuizListView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def iter_quiz_list(self, fields=None):
+        """Yield the same entries as build_quiz_list() without holding them all in memory."""
+        seen = set()
+        queryset = db_quiz_queryset(Quiz.objects.all(), fields).order_by('-created_at')
+        for quiz in queryset.iterator(chunk_size=1000):
+            seen.add(str(quiz.quiz_id))
+            yield serialize_db_quiz(quiz, fields)
+
+        for entry in get_catalog().iter_quizzes():
+            if entry['quiz_id'] not in seen:
+                yield serialize_dataset_quiz(entry, fields)
+
+    def build_quiz_list(self, fields=None):
+        quizzes_map = {}
+        
+        # 1. Fetch from Database
+        for quiz in db_quiz_queryset(Quiz.objects.all(), fields).order_by('-created_at'):
+            quizzes_map[str(quiz.quiz_id)] = serialize_db_quiz(quiz, fields)
+        
+        # 2. Add dataset quizzes from the in-process catalog
+        for entry in get_catalog().all_quizzes():
+            if entry['quiz_id'] not in quizzes_map:
+                quizzes_map[entry['quiz_id']] = serialize_dataset_quiz(entry, fields)
+        
+        # Convert to list
+        return list(quizzes_map.values())
+
 
 class QuizQuestionsView(APIView):
     """
@@ -239,40 +240,16 @@ class QuizQuestionsView(APIView):
 
     def get(self, request, quiz_id):
         try:
-            # Get quiz by quiz_id
-            quiz = Quiz.objects.filter(quiz_id=quiz_id).first()
+            data = quiz_questions_bytes(quiz_id)
             
-            if not quiz:
+            if data is None:
                 return Response(
                     {"error": "Quiz not found"},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Get all questions for this quiz
-            questions = Question.objects.filter(quiz=quiz).order_by('order')
-            
-            questions_list = []
-            for q in questions:
-                questions_list.append({
-                    'id': q.id,
-                    'order': q.order,
-                    'text': q.text or q.question_text,
-                    'options': q.options,
-                    'correct_answer': q.correct_answer
-                })
-            
-            logger.info(f"Returning {len(questions_list)} questions for quiz {quiz_id}")
-            return Response({
-                'success': True,
-                'quiz_id': quiz.quiz_id,
-                'title': quiz.title,
-                'category': quiz.category or quiz.topic,
-                'level': quiz.level or quiz.difficulty_level,
-                'duration_seconds': quiz.duration_seconds or (quiz.duration_minutes * 60 if quiz.duration_minutes else 600),
-                'language': quiz.language or 'English',
-                'questions': questions_list,
-                'total_questions': len(questions_list)
-            }, status=status.HTTP_200_OK)
+            logger.info(f"Returning questions for quiz {quiz_id}")
+            return HttpResponse(data, content_type='application/json', status=status.HTTP_200_OK)
             
         except Exception as e:
             logger.error(f"Error fetching quiz questions: {str(e)}")
@@ -282,6 +259,14 @@ class QuizQuestionsView(APIView):
             )
 
 
+def topic_filter(category, subtopic):
+    """Quiz filter kwargs for a (category, subtopic) pair, as indexed taxonomy id lookups."""
+    category_id, subcategory_id = lookup_taxonomy(category, subtopic)
+    if category_id is None or subcategory_id is None:
+        return {'pk__in': []}
+    return {'category_ref_id': category_id, 'subcategory_ref_id': subcategory_id}
+
+
 class GetQuizzesByCategoryView(APIView):
     """
     Fetch unique quizzes by category and subtopic from categoryQuizzes.csv.
@@ -290,10 +275,6 @@ class GetQuizzesByCategoryView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        import csv
-        import os
-        from collections import OrderedDict
-        
         category = request.query_params.get('category')
         subtopic = request.query_params.get('subtopic')
         
@@ -305,90 +286,13 @@ class GetQuizzesByCategoryView(APIView):
             )
         
         try:
-            # Create a safe cache key
-            cache_key = f"cat_quizzes_{category.replace(' ', '_')}_{subtopic.replace(' ', '_')}"
-            
-            # Check cache
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                logger.info(f"Returning cached quizzes for {category}/{subtopic}")
-                return Response(cached_data, status=status.HTTP_200_OK)
-
-            # 1. Fetch from Database
-            db_quizzes = Quiz.objects.filter(
-                category__iexact=category,
-                topic__iexact=subtopic
-            ).order_by('-created_at')
-
-            unique_quizzes = OrderedDict()
-            
-            # Add DB quizzes first
-            for quiz in db_quizzes:
-                if str(quiz.quiz_id) not in unique_quizzes:
-                    unique_quizzes[str(quiz.quiz_id)] = {
-                        'quiz_id': str(quiz.quiz_id),
-                        'title': quiz.title,
-                        'level': quiz.level or quiz.difficulty_level,
-                        'language': quiz.language or 'English',
-                        'source': 'database'
-                    }
-
-            # 2. Fetch from ALL CSV files in dataset folder
-            dataset_dir = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                'dataset'
+            response_data = get_or_build(
+                catalog_cache_key('cat_quizzes', category, subtopic),
+                lambda: self.build_response(category, subtopic),
+                timeout=CATALOG_CACHE_TIMEOUT
             )
             
-            if os.path.exists(dataset_dir):
-                for filename in os.listdir(dataset_dir):
-                    if filename.endswith('.csv'):
-                        csv_path = os.path.join(dataset_dir, filename)
-                        try:
-                            with open(csv_path, 'r', encoding='utf-8') as file:
-                                reader = csv.DictReader(file)
-                                # Basic validation
-                                if not reader.fieldnames or 'QuizID' not in reader.fieldnames:
-                                    continue
-                                    
-                                for row in reader:
-                                    # Safe get for columns
-                                    row_cat = row.get('Category', '').strip().lower()
-                                    row_sub = row.get('Subtopic', '').strip().lower()
-                                    target_cat = category.strip().lower()
-                                    target_sub = subtopic.strip().lower()
-
-                                    # Match category and subtopic
-                                    if row_cat == target_cat and row_sub == target_sub:
-                                        quiz_id = row['QuizID']
-                                        
-                                        # Add if not already present (DB takes precedence)
-                                        if quiz_id not in unique_quizzes:
-                                            unique_quizzes[quiz_id] = {
-                                                'quiz_id': quiz_id,
-                                                'title': row.get('Title', 'Untitled'),
-                                                'level': row.get('Level', 'Medium'),
-                                                'language': 'English', # Default for CSV
-                                                'source': 'dataset'
-                                            }
-                        except Exception as e:
-                            logger.error(f"Error reading CSV {filename}: {str(e)}")
-                            continue
-            
-            # Convert to list
-            quiz_list = list(unique_quizzes.values())
-            
-            response_data = {
-                'success': True,
-                'category': category,
-                'subtopic': subtopic,
-                'quizzes': quiz_list,
-                'count': len(quiz_list)
-            }
-            
-            # Cache the response data
-            cache.set(cache_key, response_data, timeout=900)
-            
-            logger.info(f"Found {len(quiz_list)} unique quizzes for {category}/{subtopic}")
+            logger.info(f"Found {response_data['count']} unique quizzes for {category}/{subtopic}")
             return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -398,6 +302,50 @@ class GetQuizzesByCategoryView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def build_response(self, category, subtopic):
+        from collections import OrderedDict
+        
+        # 1. Fetch from Database, by taxonomy ids
+        db_quizzes = Quiz.objects.filter(**topic_filter(category, subtopic)).order_by('-created_at')
+
+        unique_quizzes = OrderedDict()
+        
+        # Add DB quizzes first
+        for quiz in db_quizzes:
+            if str(quiz.quiz_id) not in unique_quizzes:
+                unique_quizzes[str(quiz.quiz_id)] = {
+                    'quiz_id': str(quiz.quiz_id),
+                    'title': quiz.title,
+                    'level': quiz.level or quiz.difficulty_level,
+                    'language': quiz.language or 'English',
+                    'source': 'database'
+                }
+
+        # 2. Add dataset quizzes from the catalog's (category, subtopic) index
+        for entry in get_catalog().quizzes_for_topic(category, subtopic):
+            quiz_id = entry['quiz_id']
+            
+            # Add if not already present (DB takes precedence)
+            if quiz_id not in unique_quizzes:
+                unique_quizzes[quiz_id] = {
+                    'quiz_id': quiz_id,
+                    'title': entry['title'],
+                    'level': entry['level'],
+                    'language': 'English', # Default for CSV
+                    'source': 'dataset'
+                }
+        
+        # Convert to list
+        quiz_list = list(unique_quizzes.values())
+        
+        return {
+            'success': True,
+            'category': category,
+            'subtopic': subtopic,
+            'quizzes': quiz_list,
+            'count': len(quiz_list)
+        }
+
 
 class CountQuizzesByCategoryView(APIView):
     """
@@ -407,9 +355,6 @@ class CountQuizzesByCategoryView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        import csv
-        import os
-        
         category = request.query_params.get('category')
         subtopic = request.query_params.get('subtopic')
         
@@ -421,67 +366,11 @@ class CountQuizzesByCategoryView(APIView):
             )
         
         try:
-            # Create a safe cache key
-            cache_key = f"cat_count_{category.replace(' ', '_')}_{subtopic.replace(' ', '_')}"
-            
-            # Check cache
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                # logger.info(f"Returning cached count for {category}/{subtopic}")
-                return Response(cached_data, status=status.HTTP_200_OK)
-
-            # Using a set to track unique IDs
-            unique_quiz_ids = set()
-
-            # 1. Count from Database
-            db_quizzes_ids = Quiz.objects.filter(
-                category__iexact=category,
-                topic__iexact=subtopic
-            ).values_list('quiz_id', flat=True)
-            
-            for qid in db_quizzes_ids:
-                unique_quiz_ids.add(str(qid))
-
-            # 2. Count from ALL CSV files
-            dataset_dir = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                'dataset'
+            response_data = get_or_build(
+                catalog_cache_key('cat_count', category, subtopic),
+                lambda: self.build_response(category, subtopic),
+                timeout=CATALOG_CACHE_TIMEOUT
             )
-            
-            if os.path.exists(dataset_dir):
-                for filename in os.listdir(dataset_dir):
-                    if filename.endswith('.csv'):
-                        csv_path = os.path.join(dataset_dir, filename)
-                        try:
-                            with open(csv_path, 'r', encoding='utf-8') as file:
-                                reader = csv.DictReader(file)
-                                if not reader.fieldnames or 'QuizID' not in reader.fieldnames:
-                                    continue
-                                    
-                                for row in reader:
-                                    row_cat = row.get('Category', '').strip().lower()
-                                    row_sub = row.get('Subtopic', '').strip().lower()
-                                    target_cat = category.strip().lower()
-                                    target_sub = subtopic.strip().lower()
-
-                                    if row_cat == target_cat and row_sub == target_sub:
-                                        unique_quiz_ids.add(row['QuizID'])
-                        except Exception:
-                            continue
-            
-            count = len(unique_quiz_ids)
-            
-            response_data = {
-                'success': True,
-                'category': category,
-                'subtopic': subtopic,
-                'count': count
-            }
-            
-            # Cache the result
-            cache.set(cache_key, response_data, timeout=900)
-            
-            logger.info(f"Found {count} unique quizzes for {category}/{subtopic}")
             return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -491,6 +380,169 @@ class CountQuizzesByCategoryView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def build_response(self, category, subtopic):
+        # Using a set to track unique IDs
+        unique_quiz_ids = set()
+
+        # 1. Count from Database, by taxonomy ids
+        db_quizzes_ids = Quiz.objects.filter(**topic_filter(category, subtopic)).values_list('quiz_id', flat=True)
+        
+        for qid in db_quizzes_ids:
+            unique_quiz_ids.add(str(qid))
+
+        # 2. Count from the dataset catalog
+        unique_quiz_ids.update(get_catalog().quiz_ids_for_topic(category, subtopic))
+        
+        count = len(unique_quiz_ids)
+        logger.info(f"Found {count} unique quizzes for {category}/{subtopic}")
+        
+        return {
+            'success': True,
+            'category': category,
+            'subtopic': subtopic,
+            'count': count
+        }
+
+
+class QuizFacetsView(APIView):
+    """
+    Quiz counts per category, (category, subtopic), level and language,
+    over both DB and dataset quizzes, in one response.
+    Cached per catalog generation.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            facets = get_or_build(
+                catalog_cache_key('quiz_facets'),
+                build_facets,
+                timeout=CATALOG_CACHE_TIMEOUT
+            )
+            return Response({
+                'success': True,
+                **facets
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Error computing quiz facets: {str(e)}")
+            return Response(
+                {"error": "Failed to compute quiz facets", "details": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class SearchQuizzesView(APIView):
+    """
+    Full-text search over quiz titles, categories, subtopics and question text.
+
+    Query params:
+        q: search terms (all must match; the last one also matches as a prefix)
+        page: 1-based page number
+        page_size: results per page (default 20, max 100)
+    """
+    permission_classes = [permissions.AllowAny]
+
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+
+    def get(self, request):
+        query = (request.query_params.get('q') or '').strip()
+        if not query:
+            return Response(
+                {"error": "q is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            page = max(1, int(request.query_params.get('page') or 1))
+            page_size = int(request.query_params.get('page_size') or self.DEFAULT_PAGE_SIZE)
+        except ValueError:
+            return Response(
+                {"error": "page and page_size must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        page_size = max(1, min(page_size, self.MAX_PAGE_SIZE))
+
+        try:
+            total, matches = get_search_index().search(query, offset=(page - 1) * page_size, limit=page_size)
+            results = [dict(summary, score=score) for score, summary in matches]
+
+            logger.info(f"Search '{query}' matched {total} quizzes")
+            return Response({
+                'success': True,
+                'query': query,
+                'results': results,
+                'count': len(results),
+                'total': total,
+                'page': page,
+                'page_size': page_size,
+                'has_more': page * page_size < total
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Error searching quizzes: {str(e)}")
+            return Response(
+                {"error": "Failed to search quizzes", "details": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class SurpriseMeView(APIView):
+    """
+    Random quizzes (or questions) for "surprise me" play.
+
+    Query params:
+        category, level: optional filters
+        count: how many to return (default 1, max 20)
+        kind: 'quiz' (default) or 'question'
+
+    Picks are uniform over DB and dataset quizzes (or over all their
+    questions) and cost one query, however large the catalog.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            count = int(request.query_params.get('count') or 1)
+        except ValueError:
+            return Response(
+                {"error": "count must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        count = max(1, min(count, MAX_SAMPLE_SIZE))
+        kind = (request.query_params.get('kind') or 'quiz').lower()
+        if kind not in ('quiz', 'question'):
+            return Response(
+                {"error": "kind must be 'quiz' or 'question'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        category = request.query_params.get('category')
+        level = request.query_params.get('level')
+
+        try:
+            if kind == 'question':
+                questions = sample_questions(count, category, level)
+                return Response({
+                    'success': True,
+                    'questions': questions,
+                    'count': len(questions)
+                }, status=status.HTTP_200_OK)
+
+            quizzes = sample_quizzes(count, category, level)
+            return Response({
+                'success': True,
+                'quizzes': quizzes,
+                'count': len(quizzes)
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Error sampling random quizzes: {str(e)}")
+            return Response(
+                {"error": "Failed to pick random quizzes", "details": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
 
 class GetQuizQuestionsByIdView(APIView):
     """
@@ -500,68 +552,18 @@ class GetQuizQuestionsByIdView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, quiz_id):
-        import csv
-        import os
-        
         try:
-            # Path to CSV file
-            csv_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                'dataset',
-                'categoryQuizzes.csv'
-            )
-            
-            if not os.path.exists(csv_path):
-                return Response(
-                    {"error": "Quiz dataset not found"},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            # Read CSV and collect all questions for this quiz_id
-            questions = []
-            quiz_info = None
-            
-            with open(csv_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['QuizID'] == str(quiz_id):
-                        # Store quiz info from first row
-                        if not quiz_info:
-                            quiz_info = {
-                                'quiz_id': row['QuizID'],
-                                'category': row['Category'],
-                                'subtopic': row['Subtopic'],
-                                'title': row['Title'],
-                                'level': row['Level'],
-                                'duration_seconds': row['DurationSeconds']
-                            }
-                        
-                        # Add question
-                        questions.append({
-                            'question_text': row['QuestionText'],
-                            'options': {
-                                'A': row['OptionA'],
-                                'B': row['OptionB'],
-                                'C': row['OptionC'],
-                                'D': row['OptionD']
-                            },
-                            'correct_answer': row['CorrectAnswer']
-                        })
+            data = dataset_questions_bytes(quiz_id)
             
             # Check if quiz was found
-            if not quiz_info:
+            if data is None:
                 return Response(
                     {"error": "Quiz not found"},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            logger.info(f"Found {len(questions)} questions for quiz {quiz_id}")
-            return Response({
-                'success': True,
-                'quiz_info': quiz_info,
-                'questions': questions,
-                'total_questions': len(questions)
-            }, status=status.HTTP_200_OK)
+            logger.info(f"Found questions for quiz {quiz_id}")
+            return HttpResponse(data, content_type='application/json', status=status.HTTP_200_OK)
             
         except Exception as e:
             logger.error(f"Error fetching quiz questions: {str(e)}")
@@ -657,129 +659,139 @@ class GetLeaderboardView(APIView):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(quiz_conditional, name='get')
 class GetQuizDetailView(APIView):
     """
     Unified API to fetch quiz details by quiz_id.
     Prioritizes CSV dataset, falls back to Database.
     Returns standardized quiz object with questions.
+    Answers If-None-Match/If-Modified-Since with 304 from a per-quiz content hash.
     """
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, quiz_id):
-        import csv
-        import os
-        
-        # 1. Search in ALL CSV files (Primary Source for dataset quizzes)
+        # Dataset catalog first, then the Database (see build_quiz_detail)
         try:
-            dataset_dir = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                'dataset'
+            data = quiz_detail_bytes(quiz_id)
+        except Exception as e:
+            logger.error(f"Error searching DB for quiz {quiz_id}: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch quiz details", "details": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-            
-            if os.path.exists(dataset_dir):
-                for filename in os.listdir(dataset_dir):
-                    if filename.endswith('.csv'):
-                        csv_path = os.path.join(dataset_dir, filename)
-                        try:
-                            questions = []
-                            quiz_metadata = None
-                            
-                            with open(csv_path, 'r', encoding='utf-8') as file:
-                                reader = csv.DictReader(file)
-                                # Basic validation
-                                if not reader.fieldnames or 'QuizID' not in reader.fieldnames:
-                                    continue
-
-                                for row in reader:
-                                    if row['QuizID'] == str(quiz_id):
-                                        # Capture metadata from the first row found
-                                        if not quiz_metadata:
-                                            quiz_metadata = {
-                                                'quiz_id': row['QuizID'],
-                                                'title': row.get('Title', 'Untitled Quiz'),
-                                                'category': row.get('Category', 'General'),
-                                                'subtopic': row.get('Subtopic', row.get('Category', 'General')),
-                                                'level': row.get('Level', 'Medium'),
-                                                'level': row.get('Level', 'Medium'),
-                                                'duration_seconds': int(row['DurationSeconds']) if row.get('DurationSeconds') and row['DurationSeconds'].isdigit() else 600,
-                                                'language': 'English', # Default for CSV
-                                                'source': 'dataset'
-                                            }
-                                        
-                                        # Add question
-                                        questions.append({
-                                            'text': row.get('QuestionText', ''),
-                                            'options': {
-                                                'A': row.get('OptionA', ''),
-                                                'B': row.get('OptionB', ''),
-                                                'C': row.get('OptionC', ''),
-                                                'D': row.get('OptionD', '')
-                                            },
-                                            'correct_answer': row.get('CorrectAnswer', '')
-                                        })
-                            
-                            if quiz_metadata:
-                                logger.info(f"Quiz {quiz_id} found in CSV: {filename}")
-                                return Response({
-                                    'success': True,
-                                    'data': {
-                                        **quiz_metadata,
-                                        'questions': questions,
-                                        'total_questions': len(questions)
-                                    }
-                                }, status=status.HTTP_200_OK)
-                                
-                        except Exception as e:
-                            logger.error(f"Error reading CSV {filename}: {str(e)}")
-                            continue
-        
+
+        if data is None:
+            return Response(
+                {"error": "Quiz not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return HttpResponse(data, content_type='application/json', status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class QuizBatchView(APIView):
+    """
+    Fetch the details of many quizzes in one request, for prefetching.
+
+    Quizzes are chosen by id or by topic:
+        GET  ?ids=101,102,103
+        POST {"quiz_ids": ["101", "102", "103"]}
+        GET  ?category=Science&topic=Physics (newest first, with listing filters)
+
+    At most MAX_BATCH_QUIZZES quizzes are returned. With bundle=true the
+    JSON is returned gzip-compressed as a downloadable .json.gz file, for
+    clients that store it for offline play.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        ids = request.query_params.get('ids')
+        return self._respond(request, ids.split(',') if ids else None, request.query_params)
+
+    def post(self, request):
+        quiz_ids = request.data.get('quiz_ids')
+        if quiz_ids is not None and not isinstance(quiz_ids, list):
+            return Response(
+                {"error": "quiz_ids must be a list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self._respond(request, quiz_ids, request.data)
+
+    def _respond(self, request, quiz_ids, params):
+        try:
+            if quiz_ids is None:
+                if not any(params.get(field) for field in ('category', 'topic')):
+                    return Response(
+                        {"error": "Provide quiz_ids, or a category/topic to prefetch"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                listing = QuizListing({
+                    'category': params.get('category'),
+                    'topic': params.get('topic'),
+                    'level': params.get('level'),
+                    'page_size': MAX_BATCH_QUIZZES,
+                })
+                quiz_ids = [quiz['quiz_id'] for quiz in listing.fetch()['quizzes']]
+
+            # De-duplicate, keeping request order
+            quiz_ids = list(dict.fromkeys(str(quiz_id).strip() for quiz_id in quiz_ids if str(quiz_id).strip()))
+            if len(quiz_ids) > MAX_BATCH_QUIZZES:
+                return Response(
+                    {"error": f"At most {MAX_BATCH_QUIZZES} quizzes can be fetched at once"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            quizzes, missing = build_quiz_batch(quiz_ids)
+            logger.info(f"Batch fetch: {len(quizzes)} quizzes, {len(missing)} missing")
+            payload = {
+                'success': True,
+                'quizzes': quizzes,
+                'missing': missing,
+                'count': len(quizzes)
+            }
+
+            if str(params.get('bundle', '')).lower() in ('1', 'true', 'yes'):
+                response = HttpResponse(gzip.compress(encode_json(payload)), content_type='application/gzip')
+                response['Content-Disposition'] = 'attachment; filename="quizzes.json.gz"'
+                return response
+            return Response(payload, status=status.HTTP_200_OK)
+
+        except InvalidListingParams as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error searching CSVs for quiz {quiz_id}: {str(e)}")
-            # Continue to DB search if CSV fails
+            logger.error(f"Error fetching quiz batch: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch quizzes", "details": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class QuizBundleView(APIView):
+    """
+    Content-addressed quiz details: /bundle/<quiz_id>/<content_hash>/.
+
+    The hash (listed as content_hash in the quiz list) covers the whole
+    detail payload, so the response at a given URL never changes and is
+    served as immutable for a year. Once the quiz changes the old URL
+    returns 404 and the list carries the new hash.
+    """
+    permission_classes = [permissions.AllowAny]
 
-        # 2. Search in Database (Fallback for generated quizzes)
+    def get(self, request, quiz_id, content_hash):
         try:
-            quiz = Quiz.objects.filter(quiz_id=quiz_id).first()
-            if quiz:
-                questions_qs = Question.objects.filter(quiz=quiz).order_by('order')
-                questions_list = []
-                for q in questions_qs:
-                    questions_list.append({
-                        'id': q.id,
-                        'text': q.text or q.question_text,
-                        'options': q.options,
-                        'correct_answer': q.correct_answer
-                    })
-                
-                logger.info(f"Quiz {quiz_id} found in Database.")
-                return Response({
-                    'success': True,
-                    'data': {
-                        'quiz_id': quiz.quiz_id,
-                        'title': quiz.title,
-                        'category': quiz.category or quiz.topic,
-                        'subtopic': quiz.topic, # topic is often used as subtopic equivalent for DB quizzes
-                        'level': quiz.level or quiz.difficulty_level,
-                        'level': quiz.level or quiz.difficulty_level,
-                        'num_questions': quiz.num_questions,
-                        'duration_seconds': quiz.duration_seconds or (quiz.duration_minutes * 60 if quiz.duration_minutes else 600),
-                        'created_at': quiz.created_at.isoformat() if quiz.created_at else None,
-                        'language': quiz.language or 'English',
-                        'source': 'database',
-                        'questions': questions_list,
-                        'total_questions': len(questions_list)
-                    }
-                }, status=status.HTTP_200_OK)
-                
+            data = quiz_bundle_bytes(quiz_id, content_hash)
         except Exception as e:
-            logger.error(f"Error searching DB for quiz {quiz_id}: {str(e)}")
+            logger.error(f"Error fetching quiz bundle {quiz_id}/{content_hash}: {str(e)}")
             return Response(
                 {"error": "Failed to fetch quiz details", "details": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        # 3. Not found
-        return Response(
-            {"error": "Quiz not found"},
-            status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+        if data is None:
+            return Response(
+                {"error": "Quiz not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        response = HttpResponse(data, content_type='application/json', status=status.HTTP_200_OK)
+        patch_cache_control(response, public=True, max_age=BUNDLE_MAX_AGE, immutable=True)
+        return response
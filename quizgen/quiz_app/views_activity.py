@@ -228,54 +228,41 @@ class CreateGameSessionView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        from .gemini_utils import generate_quiz_questions
+        from .services.question_bank import assemble_quiz_questions
+        from .services.live_quiz_pool import (
+            LIVE_TOPICS, LIVE_LEVEL, LIVE_QUESTIONS, pop_pooled_quiz, create_live_quiz, live_quiz_title, schedule_refill
+        )
         from .utils import generate_unique_quiz_id
         from .models import Quiz, Question
+        from .services.quiz_sampling import random_db_quiz
 
         host = request.user
         
-        # Always generate a NEW quiz for live sessions to ensure freshness
-        topics = ["General Knowledge", "Science", "History", "Technology", "Movies", "Geography", "Literature", "Sports", "Pop Culture", "Animals"]
-        topic = random.choice(topics)
-        title = f"{topic} Challenge {random.randint(100, 999)}"
+        # Always use a NEW quiz for live sessions to ensure freshness
+        topic = random.choice(LIVE_TOPICS)
         
         quiz_to_use = None
         
         try:
-            # Generate fresh questions using Gemini
-            questions_data, _ = generate_quiz_questions(
-                category=topic, 
-                title=title, 
-                level="easy", 
-                num_questions=5 
-            )
-            
-            if questions_data:
-                with transaction.atomic():
-                    quiz_to_use = Quiz.objects.create(
-                        quiz_id=generate_unique_quiz_id(),
-                        title=title,
-                        topic=topic,
-                        difficulty_level="easy",
-                        num_questions=len(questions_data),
-                        created_by=host 
-                    )
-                    
-                    question_objs = []
-                    for idx, q in enumerate(questions_data):
-                        question_objs.append(Question(
-                            quiz=quiz_to_use,
-                            order=idx + 1,
-                            text=q['text'],
-                            options=q['options'],
-                            correct_answer=q['correct_answer']
-                        ))
-                    Question.objects.bulk_create(question_objs)
+            # Ready-made quizzes come from the warm pool
+            quiz_to_use = pop_pooled_quiz(host, topic)
+            if quiz_to_use is None:
+                # Pool is empty: generate one now and get the pool refilled
+                schedule_refill(LIVE_TOPICS)
+                title = live_quiz_title(topic)
+                questions_data, _ = assemble_quiz_questions(
+                    category=topic,
+                    title=title,
+                    level=LIVE_LEVEL,
+                    num_questions=LIVE_QUESTIONS,
+                    user=host
+                )
+                if questions_data:
+                    quiz_to_use = create_live_quiz(topic, title, questions_data, host)
         except Exception as e:
             print(f"Failed to auto-generate quiz: {e}")
             # Fallback to ANY existing quiz if generation fails
-            if Quiz.objects.exists():
-                quiz_to_use = Quiz.objects.order_by('?').first()
+            quiz_to_use = random_db_quiz()
 
         # If absolutely no quiz could be created or found (rare edge case)
         if not quiz_to_use:
@@ -3,35 +3,59 @@ from .models import GameSession, PlayerSession
 from .serializers import GameSessionSerializer, PlayerSessionSerializer
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db.models.functions import Coalesce
+from .streaming import wants_stream, streaming_json_response, STREAMED_ITEMS
+from .fieldsets import Fieldset, InvalidFields
+
+# Entries of LiveQuizHistoryView, for ?fields=
+LIVE_HISTORY_FIELDS = Fieldset({
+    'session_id': (('game_session_id',), lambda ps: ps.game_session_id),
+    'join_code': (('game_session__join_code',), lambda ps: ps.game_session.join_code),
+    'played_at': (('game_session__completed_at',), lambda ps: ps.game_session.completed_at),
+    'created_at': (('game_session__created_at',), lambda ps: ps.game_session.created_at),
+    'host': (('game_session__host__username',), lambda ps: ps.game_session.host.username),
+    'quiz_title': (
+        ('game_session__join_code', 'game_session__quiz_source__title'),
+        lambda ps: ps.game_session.quiz_source.title if ps.game_session.quiz_source else f"Live Session {ps.game_session.join_code}"
+    ),
+    'score': (('score',), lambda ps: ps.score),
+    'rank': (('rank',), lambda ps: ps.rank),
+    'xp_earned': (('xp_earned',), lambda ps: ps.xp_earned),
+    'status': (('game_session__status',), lambda ps: ps.game_session.status),
+}, always=('id', 'game_session'), relations=('game_session', 'game_session__host', 'game_session__quiz_source'))
+
 
 class LiveQuizHistoryView(APIView):
+    """
+    Finished live sessions the user played in, most recent first.
+    Pass ?stream=true to stream the sessions instead of building the full list,
+    and ?fields=a,b,c to return (and load) only those fields.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        # Fetch sessions where user was a player (Host is also a player)
-        player_sessions = PlayerSession.objects.filter(
-            user=request.user,
+        try:
+            fields = LIVE_HISTORY_FIELDS.parse(request.query_params.get('fields'))
+        except InvalidFields as e:
+            return Response({"error": str(e)}, status=400)
+
+        history = self.iter_history(request.user, fields)
+        if wants_stream(request):
+            return streaming_json_response(request, STREAMED_ITEMS, history)
+        return Response(list(history))
+
+    def iter_history(self, user, fields=None):
+        # Fetch sessions where user was a player (Host is also a player),
+        # most recent (played_at or created_at) first
+        player_sessions = LIVE_HISTORY_FIELDS.apply(PlayerSession.objects.filter(
+            user=user,
             game_session__status='finished'
-        ).select_related('game_session', 'game_session__host')
-        
-        history = []
-        for ps in player_sessions:
-            history.append({
-                'session_id': ps.game_session.id,
-                'join_code': ps.game_session.join_code,
-                'played_at': ps.game_session.completed_at,
-                'created_at': ps.game_session.created_at,
-                'host': ps.game_session.host.username,
-                'quiz_title': ps.game_session.quiz_source.title if ps.game_session.quiz_source else f"Live Session {ps.game_session.join_code}",
-                'score': ps.score,
-                'rank': ps.rank,
-                'xp_earned': ps.xp_earned,
-                'status': ps.game_session.status
-            })
+        ), fields).order_by(
+            Coalesce('game_session__completed_at', 'game_session__created_at').desc()
+        )
         
-        # Sort by most recent (played_at or created_at)
-        history.sort(key=lambda x: x['played_at'] or x['created_at'], reverse=True)
-        return Response(history)
+        for ps in player_sessions.iterator(chunk_size=500):
+            yield LIVE_HISTORY_FIELDS.serialize(ps, fields)
 
 class LiveQuizResultView(APIView):
     permission_classes = [permissions.IsAuthenticated]